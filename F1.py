@@ -1,14 +1,20 @@
-import pandas as pd
-# Define a new sample flat to predict its resale price
-new_flat = pd.DataFrame({
-    'floor_area_sqm': [90],
-    'flat_type': ['4 ROOM'],
-    'town': ['ANG MO KIO']
-})
-
-# Predict the resale price using the trained pipeline model
-try:
-    prediction = model.predict(new_flat)
-    print(f"Estimated resale price: ${prediction[0]:,.2f}")
-except Exception as e:
-    print("Prediction failed:", e)
\ No newline at end of file
+import pandas as pd
+from hdb_model import load_model
+# Define a new sample flat to predict its resale price
+new_flat = pd.DataFrame({
+    'floor_area_sqm': [90],
+    'flat_type': ['4 ROOM'],
+    'town': ['ANG MO KIO'],
+    'flat_model': ['MODEL A'],
+    'storey_range': ['07 TO 09'],
+    'remaining_lease': [70]
+})
+
+# Predict the resale price using the trained pipeline model
+try:
+    model = load_model()
+    prediction = model.predict_interval_batch(new_flat).iloc[0]
+    print(f"Estimated resale price: ${prediction['estimate']:,.2f} (model {model.version})")
+    print(f"{model.intervals.coverage:.0%} prediction interval: ${prediction['lower']:,.2f} - ${prediction['upper']:,.2f}")
+except Exception as e:
+    print("Prediction failed:", e)
@@ -1,163 +1,353 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-HDB Resale Price Prediction Chatbot
-
-This application helps users estimate HDB resale prices based on
-various attributes like flat type, location, and lease.
-"""
-import streamlit as st  # Importing Streamlit for the web interface
-import logging  # Importing logging module for tracking application events
-import os  # Importing os module for file operations
-from datetime import datetime  # Importing datetime for timestamping logs
-
-# Configure logging to save to a file
-if not os.path.exists('logs'):  # Check if logs directory exists
-    os.makedirs('logs')  # Create logs directory if it doesn't exist
-
-log_filename = f"logs/hdb_chatbot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"  # Create unique log filename with timestamp
-logging.basicConfig(
-    filename=log_filename,  # Set log file path
-    level=logging.INFO,  # Set logging level to INFO
-    format='%(asctime)s - %(levelname)s - %(message)s',  # Define log format with timestamp, level and message
-    datefmt='%Y-%m-%d %H:%M:%S'  # Define date format for logs
-)
-
-# Define the options for dropdowns with descriptive variable names
-TOWNS = [  # Using uppercase for constants per PEP 8
-    "ANG MO KIO", "BEDOK", "BISHAN", "BUKIT BATOK", "BUKIT MERAH", "BUKIT PANJANG",
-    "BUKIT TIMAH", "CENTRAL AREA", "CHOA CHU KANG", "CLEMENTI", "GEYLANG", "HOUGANG",
-    "JURONG EAST", "JURONG WEST", "KALLANG/WHAMPOA", "MARINE PARADE", "PASIR RIS",
-    "PUNGGOL", "QUEENSTOWN", "SEMBAWANG", "SENGKANG", "SERANGOON", "TAMPINES",
-    "TOA PAYOH", "WOODLANDS", "YISHUN"
-]  # List of all HDB towns in Singapore
-
-FLAT_TYPES = ["3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI-GENERATION"]  # Different HDB flat types available
-FLAT_MODELS = ["STANDARD", "IMPROVED", "NEW GENERATION", "DBSS", "PREMIUM APARTMENT", "MODEL A", "MAISONETTE"]  # Different HDB flat models
-STOREY_RANGES = ["01 TO 03", "04 TO 06", "07 TO 09", "10 TO 12", "13 TO 15", "16 TO 18",
-                "19 TO 21", "22 TO 24", "25 TO 27", "28 TO 30"]  # Storey ranges in HDB buildings
-
-def validate_inputs(floor_area: int, lease: int) -> bool:
-    """
-    Validate user inputs for floor area and lease.
-    
-    Args:
-        floor_area: Floor area in square meters
-        lease: Remaining lease in years
-        
-    Returns:
-        bool: True if inputs are valid, False otherwise
-    """
-    if floor_area < 40 or floor_area > 200:  # Check if floor area is within reasonable range
-        st.error("Floor area should be between 40 and 200 square meters")  # Display error message for invalid floor area
-        logging.error(f"Invalid floor area input: {floor_area}")  # Log error for invalid floor area
-        return False  # Return False to indicate validation failure
-    
-    if lease < 0 or lease > 99:  # Check if remaining lease is within valid range
-        st.error("Remaining lease should be between 0 and 99 years")  # Display error message for invalid lease
-        logging.error(f"Invalid lease input: {lease}")  # Log error for invalid lease
-        return False  # Return False to indicate validation failure
-    
-    return True  # Return True to indicate all inputs are valid
-
-def calculate_price(town: str, flat_type: str, flat_model: str, 
-                   storey_range: str, floor_area: int, lease: int) -> tuple:
-    """
-    Calculate estimated resale price based on input parameters.
-    
-    Args:
-        town: HDB town location
-        flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
-        flat_model: Model of flat (e.g., STANDARD, IMPROVED)
-        storey_range: Floor level range
-        floor_area: Floor area in square meters
-        lease: Remaining lease in years
-        
-    Returns:
-        tuple: (estimated_price, confidence_range_low, confidence_range_high)
-    """
-    logging.info(f"Calculating price for: {town}, {flat_type}, {flat_model}, {storey_range}, {floor_area}sqm, {lease}yrs")  # Log price calculation inputs
-    
-    # Simple price calculation model - this would be replaced with a real ML model in production
-    base_price = 300000  # Base price in SGD
-    
-    # Adjust price based on town (simplified example)
-    town_multiplier = 1.0  # Default multiplier
-    if town in ["BUKIT TIMAH", "CENTRAL AREA"]:  # Premium locations
-        town_multiplier = 1.3  # Higher multiplier for premium locations
-    elif town in ["ANG MO KIO", "BISHAN", "QUEENSTOWN"]:  # Mature estates
-        town_multiplier = 1.2  # Higher multiplier for mature estates
-    
-    # Adjust price based on flat type
-    type_addition = {
-        "3 ROOM": 0,
-        "4 ROOM": 100000,
-        "5 ROOM": 200000,
-        "EXECUTIVE": 250000,
-        "MULTI-GENERATION": 300000
-    }.get(flat_type, 0)  # Price addition based on flat type, defaulting to 0
-    
-    # Factor in storey range (higher floors typically cost more)
-    storey_factor = STOREY_RANGES.index(storey_range) * 10000 if storey_range in STOREY_RANGES else 0  # Higher floors get higher price
-    
-    # Calculate the final estimated price
-    estimated_price = (base_price + type_addition + storey_factor + 
-                      (floor_area * 3000) + (lease * 1000)) * town_multiplier  # Combined price calculation
-    
-    # Generate confidence range (±10%)
-    confidence_low = round(estimated_price * 0.9)  # Lower bound of confidence range
-    confidence_high = round(estimated_price * 1.1)  # Upper bound of confidence range
-    
-    logging.info(f"Price estimate: ${estimated_price:,.2f} (Range: ${confidence_low:,.2f} - ${confidence_high:,.2f})")  # Log price calculation results
-    
-    return (round(estimated_price), confidence_low, confidence_high)  # Return the estimated price and confidence range
-
-def main() -> None:
-    """
-    Main function to run the Streamlit application.
-    """
-    logging.info("Application started")  # Log application start
-    
-    st.title("🏠 HDB Resale Price Predictor Chatbot")  # Set application title
-    st.write("Enter details about the flat to get an estimated resale price.")  # Add descriptive text for users
-    
-    # Collect user inputs through Streamlit widgets
-    town = st.selectbox("Town", TOWNS)  # Dropdown for selecting HDB town
-    flat_type = st.selectbox("Flat Type", FLAT_TYPES)  # Dropdown for selecting flat type
-    flat_model = st.selectbox("Flat Model", FLAT_MODELS)  # Dropdown for selecting flat model
-    storey_range = st.selectbox("Storey Range", STOREY_RANGES)  # Dropdown for selecting storey range
-    
-    # Sliders for numerical inputs with appropriate ranges
-    floor_area = st.slider("Floor Area (sqm)", min_value=40, max_value=150, value=90)  # Slider for floor area input
-    lease = st.slider("Remaining Lease (years)", min_value=0, max_value=99, value=60)  # Slider for remaining lease input
-    
-    # Optional address input
-    address = st.text_input("Block & Street (optional)")  # Text input for address
-    
-    # Add a button to trigger the prediction
-    if st.button("Calculate Resale Price"):  # Button to trigger price calculation
-        if validate_inputs(floor_area, lease):  # Validate inputs before calculation
-            try:
-                estimated_price, confidence_low, confidence_high = calculate_price(
-                    town, flat_type, flat_model, storey_range, floor_area, lease
-                )  # Calculate price using the function
-                
-                # Display the results
-                st.subheader("💰 Estimated Resale Price:")  # Heading for price results
-                st.write(f"${estimated_price:,.2f}")  # Display the estimated price
-                st.write(f"Confidence Range: ${confidence_low:,.2f} - ${confidence_high:,.2f}")  # Display confidence range
-                
-                # Log the successful estimation
-                logging.info(f"Successful estimation for {address if address else town}")  # Log successful estimation
-                
-            except Exception as e:  # Catch any unexpected errors
-                st.error("An error occurred during price calculation. Please try again.")  # Display general error message
-                logging.error(f"Error in price calculation: {str(e)}")  # Log the specific error
-    
-    st.markdown("---")  # Add a separator line
-    st.caption("Note: This is a simplified model for educational purposes only.")  # Add disclaimer
-    
-    logging.info("Page rendered successfully")  # Log successful page rendering
-
-if __name__ == "__main__":
-    main()  # Run the main function when the script is executed directly
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HDB Resale Price Prediction Chatbot
+
+This application helps users estimate HDB resale prices based on
+various attributes like flat type, location, and lease.
+"""
+import json  # Importing JSON to read the model pointer
+from typing import TYPE_CHECKING  # Importing the flag for annotation-only imports
+import streamlit as st  # Importing Streamlit for the web interface
+from hdb_cache import EstimateCache, estimate_key  # Importing the shared estimate cache
+from hdb_data import dataset_signature  # Importing the dataset version check
+from hdb_logging import setup_logging  # Importing structured asynchronous logging
+from hdb_metrics import StageTimer, debug_panel, start_rerun  # Importing stage timing and the debug panel
+from hdb_warmup import result, warm, warm_imports  # Importing background warm-up of the model, comparables and charts
+
+if TYPE_CHECKING:  # The model and comparables modules pull in scikit-learn, so they are imported on first use
+    from hdb_comparables import ComparablesIndex
+    from hdb_model import PriceModel
+
+# JSON-lines log in logs/hdb_chatbot.log, written by a background thread and rotated by size
+logger = setup_logging("hdb_chatbot")  # Configured once per process, reused on every rerun
+
+# Define the options for dropdowns with descriptive variable names
+TOWNS = [  # Using uppercase for constants per PEP 8
+    "ANG MO KIO", "BEDOK", "BISHAN", "BUKIT BATOK", "BUKIT MERAH", "BUKIT PANJANG",
+    "BUKIT TIMAH", "CENTRAL AREA", "CHOA CHU KANG", "CLEMENTI", "GEYLANG", "HOUGANG",
+    "JURONG EAST", "JURONG WEST", "KALLANG/WHAMPOA", "MARINE PARADE", "PASIR RIS",
+    "PUNGGOL", "QUEENSTOWN", "SEMBAWANG", "SENGKANG", "SERANGOON", "TAMPINES",
+    "TOA PAYOH", "WOODLANDS", "YISHUN"
+]  # List of all HDB towns in Singapore
+
+FLAT_TYPES = ["3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI-GENERATION"]  # Different HDB flat types available
+FLAT_MODELS = ["STANDARD", "IMPROVED", "NEW GENERATION", "DBSS", "PREMIUM APARTMENT", "MODEL A", "MAISONETTE"]  # Different HDB flat models
+STOREY_RANGES = ["01 TO 03", "04 TO 06", "07 TO 09", "10 TO 12", "13 TO 15", "16 TO 18",
+                "19 TO 21", "22 TO 24", "25 TO 27", "28 TO 30"]  # Storey ranges in HDB buildings
+COMPARABLES = 5  # Number of comparable recent sales shown with an estimate
+MODEL_POINTER = "models/latest.json"  # Written by hdb_model on every training run
+SWEEP_TABLE_ROWS = 5000  # Larger sweeps are summarised per town, floor area and lease in the table
+
+def build_price_model() -> "PriceModel":
+    """
+    Import the model service and load the latest trained model.
+    
+    Returns:
+        PriceModel: The latest trained model artifact
+    """
+    from hdb_model import load_model  # Imported here so the page renders before scikit-learn loads
+    return load_model()  # Loads models/latest.json, training a model on first use
+
+def build_comparables() -> "ComparablesIndex":
+    """
+    Import the comparables module and index the recent sales.
+    
+    Returns:
+        ComparablesIndex: Per-town and flat type KD-trees over recent sales
+    """
+    from hdb_comparables import ComparablesIndex  # Imported here so the page renders before scikit-learn loads
+    return ComparablesIndex.build()  # Indexes the recent months of Dataset.csv
+
+def model_version() -> str:
+    """
+    Version of the latest trained model, read from its pointer file without importing the model service.
+    
+    Returns:
+        str: Artifact version, or None if no model has been trained yet
+    """
+    try:
+        with open(MODEL_POINTER) as pointer:  # Small JSON file, cheap to read on every rerun
+            return json.load(pointer)["version"]
+    except (OSError, ValueError, KeyError):  # Not trained yet or being replaced
+        return None
+
+@st.cache_resource(max_entries=1)
+def get_price_model(version: str) -> "PriceModel":
+    """
+    Load the trained price model once per artifact version and share it across sessions.
+    
+    Args:
+        version: Version from the model pointer; a retrained model is loaded on the next rerun
+        
+    Returns:
+        PriceModel: The latest trained model artifact
+    """
+    return result(("price_model", version), build_price_model)  # Waits for the background warm-up if it is still running
+
+def current_model() -> "PriceModel":
+    """
+    The shared model for the latest trained artifact.
+    
+    Returns:
+        PriceModel: The latest trained model artifact
+    """
+    return get_price_model(model_version())  # Cache hit unless train_model.py wrote a new version
+
+@st.cache_resource(max_entries=1)
+def get_comparables(signature: str) -> "ComparablesIndex":
+    """
+    Build the comparable-sales index once per dataset version and share it across sessions.
+    
+    Args:
+        signature: Dataset signature; a new value rebuilds the index
+        
+    Returns:
+        ComparablesIndex: Per-town and flat type KD-trees over recent sales
+    """
+    return result(("comparables", signature), build_comparables)  # Waits for the background warm-up if it is still running
+
+def validate_inputs(floor_area: int, lease: int) -> bool:
+    """
+    Validate user inputs for floor area and lease.
+    
+    Args:
+        floor_area: Floor area in square meters
+        lease: Remaining lease in years
+        
+    Returns:
+        bool: True if inputs are valid, False otherwise
+    """
+    if floor_area < 40 or floor_area > 200:  # Check if floor area is within reasonable range
+        st.error("Floor area should be between 40 and 200 square meters")  # Display error message for invalid floor area
+        logger.warning("Invalid floor area input", extra={"event": "invalid_input", "floor_area": floor_area})  # Log invalid floor area
+        return False  # Return False to indicate validation failure
+    
+    if lease < 0 or lease > 99:  # Check if remaining lease is within valid range
+        st.error("Remaining lease should be between 0 and 99 years")  # Display error message for invalid lease
+        logger.warning("Invalid lease input", extra={"event": "invalid_input", "lease": lease})  # Log invalid lease
+        return False  # Return False to indicate validation failure
+    
+    return True  # Return True to indicate all inputs are valid
+
+def calculate_price(town: str, flat_type: str, flat_model: str, 
+                   storey_range: str, floor_area: int, lease: int) -> tuple:
+    """
+    Calculate estimated resale price based on input parameters.
+    
+    Args:
+        town: HDB town location
+        flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
+        flat_model: Model of flat (e.g., STANDARD, IMPROVED)
+        storey_range: Floor level range
+        floor_area: Floor area in square meters
+        lease: Remaining lease in years
+        
+    Returns:
+        tuple: (estimated_price, interval_low, interval_high)
+    """
+    # Score the flat with the trained pipeline shared across sessions
+    estimated_price, interval_low, interval_high = current_model().predict_interval_one(
+        town, flat_type, flat_model, storey_range, floor_area, lease
+    )  # Model estimate in SGD and the interval from past residuals in the flat's segment
+    
+    interval_low = round(interval_low)  # Lower bound of prediction interval
+    interval_high = round(interval_high)  # Upper bound of prediction interval
+    
+    return (round(estimated_price), interval_low, interval_high)  # Return the estimated price and prediction interval
+
+@st.cache_resource
+def get_estimate_cache() -> EstimateCache:
+    """
+    Create the process-wide estimate cache shared by all sessions.
+    
+    Returns:
+        EstimateCache: LRU/TTL cache of (price, low, high) tuples
+    """
+    return EstimateCache(max_entries=4096, ttl_seconds=6 * 3600)  # Bounded so memory stays flat
+
+def estimate_price(town: str, flat_type: str, flat_model: str,
+                   storey_range: str, floor_area: int, lease: int) -> tuple:
+    """
+    Return the price estimate, reusing a cached result for repeated inputs.
+    
+    Cached entries belong to the model version that produced them and are
+    dropped automatically when a new model is loaded.
+    
+    Args:
+        town: HDB town location
+        flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
+        flat_model: Model of flat (e.g., STANDARD, IMPROVED)
+        storey_range: Floor level range
+        floor_area: Floor area in square meters
+        lease: Remaining lease in years
+        
+    Returns:
+        tuple: (estimated_price, interval_low, interval_high)
+    """
+    key = estimate_key(town, flat_type, flat_model, storey_range, floor_area, lease)  # Normalized input tuple
+    return get_estimate_cache().get_or_compute(
+        key,
+        lambda: calculate_price(town, flat_type, flat_model, storey_range, floor_area, lease),
+        version=current_model().version
+    )  # Model evaluation only runs on a cache miss
+
+def scenario_sweep(town: str, flat_type: str, flat_model: str, storey_range: str) -> None:
+    """
+    Price a grid of what-if scenarios and show it as a heatmap and table.
+    
+    Every combination of the selected towns, flat types, flat models, storey
+    ranges, floor areas and remaining leases is scored in one batch.
+    
+    Args:
+        town: Town selected in the form, the default sweep town
+        flat_type: Flat type selected in the form
+        flat_model: Flat model selected in the form
+        storey_range: Storey range selected in the form
+    """
+    with st.expander("📊 What-if Price Sweep"):  # Collapsed so the single estimate stays the main flow
+        towns = st.multiselect("Towns", TOWNS, default=[town])  # Towns to compare
+        flat_types = st.multiselect("Flat Types", FLAT_TYPES, default=[flat_type])  # Flat types to compare
+        flat_models = st.multiselect("Flat Models", FLAT_MODELS, default=[flat_model])  # Flat models to compare
+        storey_ranges = st.multiselect("Storey Ranges", STOREY_RANGES, default=[storey_range])  # Storey ranges to compare
+        area_low, area_high = st.slider("Floor Area range (sqm)", min_value=40, max_value=150, value=(60, 120))  # Floor area axis
+        area_step = st.number_input("Floor Area step (sqm)", min_value=1, max_value=50, value=5)  # Floor area spacing
+        lease_low, lease_high = st.slider("Remaining Lease range (years)", min_value=0, max_value=99, value=(50, 95))  # Lease axis
+        lease_step = st.number_input("Remaining Lease step (years)", min_value=1, max_value=20, value=5)  # Lease spacing
+        
+        if not st.button("Run Sweep"):  # Only score the grid on request
+            return
+        
+        from hdb_scenarios import scenario_grid, sweep, value_range  # Imported here so the page renders before scikit-learn loads
+        timer = StageTimer()  # Per-stage timings for this sweep, logged with the result
+        try:
+            with timer.stage("grid"):
+                grid = scenario_grid(
+                    town=towns, flat_type=flat_types, flat_model=flat_models, storey_range=storey_ranges,
+                    floor_area_sqm=value_range(area_low, area_high, area_step),
+                    remaining_lease=value_range(lease_low, lease_high, lease_step),
+                )  # Every combination of the selected values
+        except ValueError as error:  # Empty selection or a grid over the size limit
+            st.error(f"Cannot build the sweep: {error}")  # Explain what to change
+            return
+        
+        try:
+            with timer.stage("sweep"):
+                prices = sweep(current_model(), grid)  # One vectorized batch, chunked over processes when very large
+            
+            with timer.stage("render"):
+                import altair as alt  # Imported here; warmed in the background at startup
+                
+                # Average over the flat types, models and storeys in the grid for one cell per town, area and lease
+                summary = prices.groupby(["town", "floor_area_sqm", "remaining_lease"], as_index=False)[
+                    ["estimate", "lower", "upper"]].mean().round(-2)  # Prices to the nearest hundred dollars
+                heatmap = alt.Chart(summary).mark_rect().encode(
+                    x=alt.X("floor_area_sqm:O", title="Floor Area (sqm)"),
+                    y=alt.Y("remaining_lease:O", title="Remaining Lease (years)", sort="descending"),
+                    color=alt.Color("estimate:Q", title="Estimate (SGD)", scale=alt.Scale(scheme="viridis")),
+                    tooltip=["town", "floor_area_sqm", "remaining_lease",
+                             alt.Tooltip("estimate:Q", format=",.0f"), alt.Tooltip("lower:Q", format=",.0f"),
+                             alt.Tooltip("upper:Q", format=",.0f")],
+                    facet=alt.Facet("town:N", title=None, columns=2),
+                )  # One estimate grid per town
+                
+                st.write(f"Priced {len(prices):,} scenarios in {timer.timings_ms['sweep']:,.0f} ms.")  # Sweep size and latency
+                st.altair_chart(heatmap)  # Display the heatmap
+                table = prices if len(prices) <= SWEEP_TABLE_ROWS else summary  # Full grid only when it stays readable
+                st.dataframe(table, hide_index=True)  # Display the scenario table
+                st.download_button("Download all scenarios (CSV)", prices.to_csv(index=False),
+                                   file_name="hdb_price_sweep.csv", mime="text/csv")  # Full grid for offline analysis
+            
+            # Log the sweep as one structured record
+            logger.info("Sweep served", extra={
+                "event": "sweep", "scenarios": len(prices), "towns": towns, "flat_types": flat_types,
+                **timer.fields(),
+            })  # Grid size, selection and per-stage latency
+        
+        except Exception:  # Catch any unexpected errors
+            st.error("An error occurred during the price sweep. Please try again.")  # Display general error message
+            logger.exception("Error in price sweep", extra={"event": "error", **timer.fields()})  # Log the error with its traceback
+
+def main() -> None:
+    """
+    Main function to run the Streamlit application.
+    """
+    trace = start_rerun("hdb_chatbot")  # Time this rerun's stages (and profile it when HDB_PROFILE selects it)
+    logger.debug("Application started", extra={"event": "rerun"})  # Per-rerun trace, off at the default INFO level
+    
+    # Load the model and comparables in the background while the form renders
+    warm(("price_model", model_version()), build_price_model)  # No-op once this model version has been collected
+    warm(("comparables", dataset_signature()), build_comparables)  # Warmed again only for a new dataset version
+    warm_imports("altair")  # Chart library for the what-if sweep
+    
+    st.title("🏠 HDB Resale Price Predictor Chatbot")  # Set application title
+    st.write("Enter details about the flat to get an estimated resale price.")  # Add descriptive text for users
+    
+    # Collect user inputs through Streamlit widgets
+    town = st.selectbox("Town", TOWNS)  # Dropdown for selecting HDB town
+    flat_type = st.selectbox("Flat Type", FLAT_TYPES)  # Dropdown for selecting flat type
+    flat_model = st.selectbox("Flat Model", FLAT_MODELS)  # Dropdown for selecting flat model
+    storey_range = st.selectbox("Storey Range", STOREY_RANGES)  # Dropdown for selecting storey range
+    
+    # Sliders for numerical inputs with appropriate ranges
+    floor_area = st.slider("Floor Area (sqm)", min_value=40, max_value=150, value=90)  # Slider for floor area input
+    lease = st.slider("Remaining Lease (years)", min_value=0, max_value=99, value=60)  # Slider for remaining lease input
+    
+    # Optional address input
+    address = st.text_input("Block & Street (optional)")  # Text input for address
+    
+    # Add a button to trigger the prediction
+    if st.button("Calculate Resale Price"):  # Button to trigger price calculation
+        timer = StageTimer()  # Per-stage timings for this request, logged with the result
+        with timer.stage("validate"):
+            valid = validate_inputs(floor_area, lease)  # Validate inputs before calculation
+        if valid:
+            try:
+                with timer.stage("predict"):
+                    estimated_price, interval_low, interval_high = estimate_price(
+                        town, flat_type, flat_model, storey_range, floor_area, lease
+                    )  # Calculate price, or reuse the cached estimate for the same inputs
+                
+                with timer.stage("comparables"):
+                    comparables = get_comparables(dataset_signature()).query(
+                        town, flat_type, storey_range, floor_area, lease, k=COMPARABLES
+                    )  # Nearest recent sales of the same town and flat type
+                
+                with timer.stage("render"):
+                    # Display the results
+                    st.subheader("💰 Estimated Resale Price:")  # Heading for price results
+                    st.write(f"${estimated_price:,.2f}")  # Display the estimated price
+                    coverage = current_model().intervals.coverage  # Share of past prices the interval covers
+                    st.write(f"{coverage:.0%} Prediction Interval: ${interval_low:,.2f} - ${interval_high:,.2f}")  # Display prediction interval
+                    
+                    # Show the most similar recent sales behind the estimate
+                    st.subheader("🏘️ Comparable Recent Sales:")  # Heading for comparables
+                    if comparables.empty:  # No recent sales of this flat type in the town
+                        st.info(f"No recent {flat_type} sales in {town} to compare with.")  # Explain the missing table
+                    else:
+                        comparables["month"] = comparables["month"].dt.strftime("%Y-%m")  # Show sale months without a time
+                        st.dataframe(comparables.drop(columns="distance"), hide_index=True)  # Display the comparable sales
+                
+                # Log the successful estimation as one structured record
+                logger.info("Estimate served", extra={
+                    "event": "estimate", "town": town, "flat_type": flat_type, "flat_model": flat_model,
+                    "storey_range": storey_range, "floor_area": floor_area, "lease": lease,
+                    "address": address or None, "estimate": estimated_price,
+                    "comparables": len(comparables), **timer.fields(),
+                })  # Inputs, result and per-stage latency
+                
+            except Exception:  # Catch any unexpected errors
+                st.error("An error occurred during price calculation. Please try again.")  # Display general error message
+                logger.exception("Error in price calculation", extra={"event": "error", **timer.fields()})  # Log the error with its traceback
+    
+    scenario_sweep(town, flat_type, flat_model, storey_range)  # Compare prices across many scenarios at once
+    
+    st.markdown("---")  # Add a separator line
+    st.caption("Note: Estimates come from a linear model trained on past resale transactions and are for educational purposes only.")  # Add disclaimer
+    
+    trace.finish()  # Record the rerun's timings in the process metrics
+    logger.debug("Page rendered successfully", extra={"event": "rendered", "total_ms": trace.total_ms})  # Per-rerun trace, off at the default INFO level
+    debug_panel("hdb_chatbot", {"Estimate cache": get_estimate_cache().stats()})  # Stage timings and cache counters when HDB_DEBUG or ?debug=1 is set
+
+if __name__ == "__main__":
+    main()  # Run the main function when the script is executed directly
@@ -1,187 +1,251 @@
-import streamlit as st
-import pandas as pd
-import folium
-from streamlit_folium import st_folium
-import branca.colormap as cm
-import altair as alt
- 
-# ---- PAGE CONFIG ----
-st.set_page_config(page_title="ChopeFlat – Smart HDB Resale Finder", layout="wide")
-st.title("🏠 ChopeFlat – Your Smart HDB Resale Companion")
- 
-# ---- LOAD DATA ----
-df = pd.read_csv("Dataset.csv")
-df['month'] = pd.to_datetime(df['month'])
- 
-# ---- TOWN COORDINATES ----
-coordinates = {
-    "ANG MO KIO": (1.3691, 103.8499), "BEDOK": (1.3244, 103.9301), "BISHAN": (1.3500, 103.8499),
-    "BUKIT BATOK": (1.3504, 103.7465), "BUKIT MERAH": (1.2804, 103.8238), "BUKIT PANJANG": (1.3812, 103.7636),
-    "BUKIT TIMAH": (1.3403, 103.7760), "CENTRAL AREA": (1.2838, 103.8600), "CHOA CHU KANG": (1.3852, 103.7440),
-    "CLEMENTI": (1.3152, 103.7654), "GEYLANG": (1.3208, 103.8860), "HOUGANG": (1.3710, 103.8877),
-    "JURONG EAST": (1.3323, 103.7437), "JURONG WEST": (1.3454, 103.7053), "KALLANG/WHAMPOA": (1.3133, 103.8639),
-    "MARINE PARADE": (1.3001, 103.9058), "PASIR RIS": (1.3723, 103.9493), "PUNGGOL": (1.4039, 103.9114),
-    "QUEENSTOWN": (1.2944, 103.8055), "SEMBAWANG": (1.4500, 103.8200), "SENGKANG": (1.3911, 103.8973),
-    "SERANGOON": (1.3500, 103.8700), "TAMPINES": (1.3536, 103.9456), "TOA PAYOH": (1.3344, 103.8467),
-    "WOODLANDS": (1.4380, 103.7860), "YISHUN": (1.4295, 103.8356)
-}
- 
-# ---- SIDEBAR FILTERS ----
-st.sidebar.header("🔍 Filter Your Preferences")
-flat_type = st.sidebar.selectbox("🏢 Flat Type", df['flat_type'].unique())
-flat_model = st.sidebar.selectbox("🏗 Flat Model", df['flat_model'].unique())
-storey = st.sidebar.selectbox("📶 Storey Range", df['storey_range'].unique())
-street = st.sidebar.selectbox("🛣 Street Name", df['street_name'].unique())
-floor_range = st.sidebar.slider("📏 Floor Area (sqm)", 
-                                 int(df['floor_area_sqm'].min()), 
-                                 int(df['floor_area_sqm'].max()), 
-                                 (60, 120))
- 
-selected_town = st.sidebar.selectbox("🧭 Zoom to Town (Map)", ["All"] + list(coordinates.keys()))
- 
-# ---- FILTER DATA ----
-filtered_df = df[
-    (df['flat_type'] == flat_type) &
-    (df['flat_model'] == flat_model) &
-    (df['storey_range'] == storey) &
-    (df['street_name'] == street) &
-    (df['floor_area_sqm'] >= floor_range[0]) &
-    (df['floor_area_sqm'] <= floor_range[1])
-]
- 
-# ---- SAVED FLATS STORAGE ----
-if 'saved_flats' not in st.session_state:
-    st.session_state['saved_flats'] = []
- 
-# ---- METRICS & SAVE BUTTON ----
-if not filtered_df.empty:
-    mean_price = filtered_df['resale_price'].mean()
-    st.metric(label="💰 Average Resale Price", value=f"${mean_price:,.0f}")
-    st.dataframe(filtered_df[['block', 'street_name', 'floor_area_sqm', 'resale_price']])
- 
-    if st.button("❤ Save This Flat"):
-        st.session_state['saved_flats'].append(filtered_df.iloc[0].to_dict())
-        st.success("Flat saved to your list!")
-else:
-    st.warning("⚠ No matching flats found. Please adjust your filters.")
- 
-# ---- TREND CHART ----
-st.subheader("📈 Resale Price Trend by Town")
-trend_df = df[df['town'] == selected_town] if selected_town != "All" else df
-trend_chart = trend_df.groupby('month')['resale_price'].mean().reset_index()
-chart = alt.Chart(trend_chart).mark_line(point=True).encode(
-    x=alt.X('month:T', title='Month'),
-    y=alt.Y(
-        'resale_price:Q',
-        title='Average Resale Price',
-        axis=alt.Axis(format=',.0f')  # Format y-axis labels with no decimals
-    ),
-    tooltip=[
-        alt.Tooltip('month:T', title='Month'),
-        alt.Tooltip('resale_price:Q', title='Avg Price', format=',.0f')  # Format tooltip
-    ]
-).properties(
-    width=900,
-    height=300,
-    title=f"Average Monthly Resale Price in {selected_town if selected_town != 'All' else 'All Towns'}"
-)
-
-st.altair_chart(chart, use_container_width=True)
-
-
- 
-# ---- MAP ----
-# ---- MAP ----
-town_prices = []
-towns_to_plot = [selected_town] if selected_town != "All" else coordinates.keys()
-
-# Step 1: Build town price summary
-for town in towns_to_plot:
-    if town in coordinates:
-        lat, lon = coordinates[town]
-        town_df = df[df['town'] == town]
-        if not town_df.empty:
-            avg_price = town_df['resale_price'].mean()
-            count = town_df.shape[0]
-            max_price = town_df['resale_price'].max()
-            town_prices.append({
-                'town': town,
-                'lat': lat,
-                'lon': lon,
-                'avg_price': avg_price,
-                'count': count,
-                'max_price': max_price
-            })
-
-# Step 2: Bin average prices into 5 levels
-
-prices = [t['avg_price'] for t in town_prices]
-
-# If all prices are identical, assign the same bin index
-if len(set(prices)) == 1:
-    for town in town_prices:
-        town['price_bin'] = 2  # Use the "middle" color
-else:
-    price_bins = pd.qcut(prices, 5, labels=False, duplicates='drop')  # Drop duplicate edges safely
-    for i, town in enumerate(town_prices):
-        town['price_bin'] = price_bins[i]
-
-# Step 3: Map bin to folium icon colors
-color_map = {
-    0: "lightblue",
-    1: "blue",
-    2: "cadetblue",
-    3: "darkblue",
-    4: "purple"
-}
-
-# Step 4: Create map
-map_location = coordinates[selected_town] if selected_town != "All" else [1.3521, 103.8198]
-zoom_level = 13 if selected_town != "All" else 11
-m = folium.Map(location=map_location, zoom_start=zoom_level, tiles="cartodbpositron")
-
-# Step 5: Add color-coded icon markers with hover tooltips
-for town in town_prices:
-    price = town['avg_price']
-    lat, lon = town['lat'], town['lon']
-    count = town['count']
-    max_price = town['max_price']
-    bin_index = town['price_bin']
-    icon_color = color_map.get(bin_index, "blue")
-
-    tooltip_html = f"""
-<b>🏘 {town['town']}</b><br>
-💵 Avg Price: ${price:,.0f}<br>
-🔢 Units Sold: {count}<br>
-💰 Highest Price: ${max_price:,.0f}
-"""
-
-    folium.Marker(
-        location=[lat, lon],
-        tooltip=tooltip_html,
-        icon=folium.Icon(color=icon_color, icon="home")
-    ).add_to(m)
-
-# Step 6: Show map in Streamlit
-st.subheader("🗺 Explore Average Prices on the Map")
-legend_html = """
-<div style="
-    position: fixed; 
-    bottom: 50px; left: 50px; width: 180px; height: 150px; 
-    background-color: white; z-index:9999; font-size:14px;
-    border:2px solid grey; padding: 10px; border-radius: 8px;">
-    <b>Legend – Avg Resale Price</b><br>
-    <i class="fa fa-map-marker" style="color:lightblue"></i> Lowest 20%<br>
-    <i class="fa fa-map-marker" style="color:blue"></i> Low-Mid<br>
-    <i class="fa fa-map-marker" style="color:cadetblue"></i> Mid<br>
-    <i class="fa fa-map-marker" style="color:darkblue"></i> Mid-High<br>
-    <i class="fa fa-map-marker" style="color:purple"></i> Highest 20%
-</div>
-"""
-m.get_root().html.add_child(folium.Element(legend_html))
-st_folium(m, width=1000, height=600)
-
- 
-if st.session_state['saved_flats']:
-    st.subheader("❤ Saved Flats")
-    st.write(pd.DataFrame(st.session_state['saved_flats']))
+import math
+import streamlit as st
+from hdb_data import dataset_signature
+from hdb_dataplane import DataPlane
+from hdb_colorscale import PriceScale
+from hdb_forecast import TrendForecast
+from hdb_gazetteer import Gazetteer, load_gazetteer
+from hdb_metrics import debug_panel, start_rerun, timed
+from hdb_warmup import result, warm, warm_imports
+ 
+# ---- PAGE CONFIG ----
+st.set_page_config(page_title="ChopeFlat – Smart HDB Resale Finder", layout="wide")
+trace = start_rerun("predictor")  # Per-stage timings of this rerun; shown with HDB_DEBUG=1 or ?debug=1
+st.title("🏠 ChopeFlat – Your Smart HDB Resale Companion")
+
+# ---- WARM-UP ----
+# The data plane loads and the chart and map libraries import in the background while the
+# page starts rendering; each section imports its library only when it renders.
+signature = dataset_signature()
+warm(("data_plane", signature), DataPlane.load)
+warm_imports("altair", "folium")  # streamlit_folium registers a component, so it is imported on the script thread
+ 
+# ---- LOAD DATA ----
+# One read-only data plane per dataset snapshot, shared by every session in the process.
+# It is keyed on the CSV signature so an updated Dataset.csv is picked up. The full history is
+# never loaded as one frame: aggregates are folded chunk by chunk and raw rows are read from
+# the columnar cache only when displayed. Sessions keep filter state and row ids only.
+PAGE_ROWS = 50
+
+@st.cache_resource(max_entries=1)
+def load_data_plane(signature: str) -> DataPlane:
+    return result(("data_plane", signature), DataPlane.load)
+
+with timed("load"):
+    plane = load_data_plane(signature)
+cube = plane.cube
+index = plane.index
+options = plane.options
+
+# Trend forecasts are fitted once per snapshot and persisted in .cache/; reading them starts in the background
+warm(("forecast", signature), TrendForecast.load, cube)
+
+@st.cache_resource(max_entries=1)
+def load_forecast(signature: str) -> TrendForecast:
+    return result(("forecast", signature), TrendForecast.load, cube)
+ 
+# ---- TOWN COORDINATES ----
+@st.cache_resource
+def get_gazetteer() -> Gazetteer:
+    # Versioned local town coordinates (data/gazetteer.json); no network lookups at startup
+    return load_gazetteer()
+
+with timed("gazetteer"):
+    gazetteer = get_gazetteer()
+coordinates = gazetteer.towns
+ 
+# ---- SIDEBAR FILTERS ----
+def cascading_selectbox(label, *selected):
+    # Options depend on the values picked above; counts show how many transactions each leaves
+    counts = dict(options.options(*selected))
+    return st.sidebar.selectbox(label, list(counts), format_func=lambda value: f"{value} ({counts[value]:,})")
+
+with timed("sidebar"):
+    st.sidebar.header("🔍 Filter Your Preferences")
+    flat_type = cascading_selectbox("🏢 Flat Type")
+    flat_model = cascading_selectbox("🏗 Flat Model", flat_type)
+    storey = cascading_selectbox("📶 Storey Range", flat_type, flat_model)
+    street = cascading_selectbox("🛣 Street Name", flat_type, flat_model, storey)
+    # Slider bounds follow the selections above, so the default range always contains matching flats
+    floor_min, floor_max = options.value_range('floor_area_sqm', flat_type, flat_model, storey, street)
+    floor_min, floor_max = math.floor(floor_min), max(math.ceil(floor_max), math.floor(floor_min) + 1)
+    floor_low, floor_high = st.session_state.get('floor_range', (floor_min, floor_max))
+    if floor_high < floor_min or floor_low > floor_max:  # Old range misses the new selection entirely
+        floor_low, floor_high = floor_min, floor_max
+    st.session_state['floor_range'] = (max(floor_low, floor_min), min(floor_high, floor_max))
+    floor_range = st.sidebar.slider("📏 Floor Area (sqm)", 
+                                     floor_min, 
+                                     floor_max, 
+                                     key='floor_range')
+ 
+    selected_town = st.sidebar.selectbox("🧭 Zoom to Town (Map)", ["All"] + list(coordinates.keys()))
+ 
+# ---- FILTER DATA ----
+with timed("filter"):
+    matching_rows = index.query(
+        flat_type=flat_type,
+        flat_model=flat_model,
+        storey_range=storey,
+        street_name=street,
+        floor_area_sqm=floor_range
+    )
+ 
+# ---- SAVED FLATS STORAGE ----
+# Row ids refer to one data snapshot, so the list is reset when the dataset changes
+if st.session_state.get('saved_flats_version') != plane.version:
+    st.session_state['saved_flats'] = []
+    st.session_state['saved_flats_version'] = plane.version
+ 
+# ---- METRICS & SAVE BUTTON ----
+with timed("table"):
+    if matching_rows.size:
+        mean_price = index.frame(matching_rows, ['resale_price'])['resale_price'].mean()
+        st.metric(label="💰 Average Resale Price", value=f"${mean_price:,.0f}")
+
+        # Only the visible page of matches is materialised and sent to the browser
+        pages = max(1, -(-matching_rows.size // PAGE_ROWS))
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        page_rows = matching_rows[(page - 1) * PAGE_ROWS:page * PAGE_ROWS]
+        st.dataframe(index.frame(page_rows, ['block', 'street_name', 'floor_area_sqm', 'resale_price']))
+        st.caption(f"Showing {page_rows.size:,} of {matching_rows.size:,} matching flats")
+ 
+        if st.button("❤ Save This Flat"):
+            st.session_state['saved_flats'].append(int(matching_rows[0]))
+            st.success("Flat saved to your list!")
+    else:
+        st.warning("⚠ No matching flats found. Please adjust your filters.")
+ 
+# ---- TREND CHART ----
+st.subheader("📈 Resale Price Trend by Town")
+with timed("trend"):
+    import altair as alt
+    trend_town = selected_town if selected_town != "All" else None
+    trend_chart = cube.rollup(['month'], town=trend_town)['mean'].rename('resale_price').reset_index()
+    history = alt.Chart(trend_chart).mark_line(point=True).encode(
+        x=alt.X('month:T', title='Month'),
+        y=alt.Y(
+            'resale_price:Q',
+            title='Average Resale Price',
+            axis=alt.Axis(format=',.0f')  # Format y-axis labels with no decimals
+        ),
+        tooltip=[
+            alt.Tooltip('month:T', title='Month'),
+            alt.Tooltip('resale_price:Q', title='Avg Price', format=',.0f')  # Format tooltip
+        ]
+    )
+
+    # Precomputed trend forecast for the town, drawn as a dashed line with its band
+    forecast = load_forecast(signature)
+    forecast_series = forecast.series(trend_town)
+    layers = [history]
+    if forecast_series is not None:
+        forecast_chart = forecast_series.reset_index()
+        band = alt.Chart(forecast_chart).mark_area(opacity=0.2).encode(
+            x='month:T',
+            y=alt.Y('lower:Q', title='Average Resale Price'),
+            y2='upper:Q'
+        )
+        forecast_line = alt.Chart(forecast_chart).mark_line(strokeDash=[6, 4]).encode(
+            x='month:T',
+            y='estimate:Q',
+            tooltip=[
+                alt.Tooltip('month:T', title='Month'),
+                alt.Tooltip('estimate:Q', title='Forecast', format=',.0f'),
+                alt.Tooltip('lower:Q', title='Low', format=',.0f'),
+                alt.Tooltip('upper:Q', title='High', format=',.0f')
+            ]
+        )
+        layers = [band, history, forecast_line]
+    chart = alt.layer(*layers).properties(
+        width=900,
+        height=300,
+        title=f"Average Monthly Resale Price in {selected_town if selected_town != 'All' else 'All Towns'}"
+    )
+
+    st.altair_chart(chart, use_container_width=True)
+    if forecast_series is not None:
+        st.caption(f"Dashed line: {len(forecast_series)}-month trend forecast with an 80% band "
+                   f"(recent trend {forecast.growth(trend_town):+.1%} a year)")
+
+
+ 
+# ---- MAP ----
+# Quantile edges over every town's average price, computed once per data snapshot
+@st.cache_resource(max_entries=1)
+def load_price_scale(version: str) -> PriceScale:
+    return PriceScale.from_values(cube.rollup(['town'])['mean'])
+
+# Marker data only depends on the selected town and the data snapshot, so it is built once per pair
+@st.cache_resource(max_entries=64)
+def town_markers(selected_town: str, version: str) -> list:
+    towns_to_plot = [selected_town] if selected_town != "All" else list(coordinates)
+
+    # Town price summary from the cube (one rollup for all towns) joined to the town centroids
+    town_stats = cube.rollup(['town'])
+    towns = gazetteer.town_frame([town for town in towns_to_plot if town in town_stats.index])
+    stats = town_stats.loc[towns['town']]
+    towns['avg_price'] = stats['mean'].to_numpy()
+    towns['count'] = stats['count'].to_numpy().astype(int)
+    towns['max_price'] = stats['max'].to_numpy()
+
+    # Colour every town in one call against the snapshot-wide scale, then pre-render the hover tooltips
+    towns['icon_color'] = load_price_scale(version).folium_colors(towns['avg_price'])
+    towns['tooltip'] = [f"""
+<b>🏘 {town}</b><br>
+💵 Avg Price: ${price:,.0f}<br>
+🔢 Units Sold: {count}<br>
+💰 Highest Price: ${max_price:,.0f}
+""" for town, price, count, max_price in zip(towns['town'], towns['avg_price'], towns['count'], towns['max_price'])]
+    return towns.to_dict('records')
+
+import folium
+from streamlit_folium import st_folium
+
+# Step 4: A fresh base map per rerun. It only holds the tiles and legend, so it is cheap to build
+# and serializes to the same script every time; st_folium attaches the marker layer to this
+# throwaway copy instead of to a long-lived map
+def base_map(version: str) -> folium.Map:
+    base = folium.Map(location=gazetteer.center, zoom_start=11, tiles="cartodbpositron")
+    # Legend generated from the same edges that colour the markers
+    base.get_root().html.add_child(folium.Element(load_price_scale(version).legend_html()))
+    return base
+
+# Step 5: Color-coded icon markers with hover tooltips, rebuilt only when the town changes
+# and kept per session, since st_folium re-parents the layer it is given
+markers_cache = st.session_state.setdefault('map_markers', {})
+with timed("map_markers"):
+    marker_key = (selected_town, cube.version)
+    if markers_cache.get('key') != marker_key:
+        markers = folium.FeatureGroup(name="Towns")
+        for town in town_markers(*marker_key):
+            folium.Marker(
+                location=[town['lat'], town['lon']],
+                tooltip=town['tooltip'],
+                icon=folium.Icon(color=town['icon_color'], icon="home")
+            ).add_to(markers)
+        markers_cache.update(key=marker_key, layer=markers)
+
+# Step 6: Show map in Streamlit; the base map keeps the same component key and script, so a
+# town change only sends the marker layer and pans the view instead of reloading the map
+st.subheader("🗺 Explore Average Prices on the Map")
+map_location = coordinates[selected_town] if selected_town != "All" else gazetteer.center
+zoom_level = 13 if selected_town != "All" else 11
+with timed("map_render"):
+    st_folium(
+        base_map(cube.version),
+        key="price_map",
+        center=map_location,
+        zoom=zoom_level,
+        feature_group_to_add=markers_cache['layer'],
+        returned_objects=[],  # Panning and zooming the map does not trigger a rerun
+        width=1000,
+        height=600
+    )
+
+ 
+if st.session_state['saved_flats']:
+    st.subheader("❤ Saved Flats")
+    st.write(plane.rows(st.session_state['saved_flats']).reset_index(drop=True))
+
+trace.finish()
+debug_panel("predictor")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the data, query and prediction hot paths.
+
+Each run works in its own directory, so the CSV parse, cache build and
+model training start cold and do not touch the app's .cache/ or models/.
+By default a synthetic dataset is generated there (see make_dataset.py);
+pass --dataset to benchmark a real Dataset.csv instead.
+
+Timed cases:
+    csv_load          parse the CSV into the Parquet cache (cold)
+    data_plane        cube, filter/option indexes and row store (DataPlane.load)
+    sidebar_filter    FilterIndex.query with random sidebar selections
+    trend_groupby     monthly average price for one town (cube rollup)
+    town_aggregation  per-town price summary for the map (cube rollup)
+    chatbot_answer    IntentRouter.answer over a fixed question set
+    forecast_fit      per-town and flat type trend forecasts from the cube (TrendForecast.fit)
+    train_model       full model fit (refresh_model --full)
+    calculate_price   one estimate with its prediction interval
+    predict_batch     vectorized estimates with intervals for --batch listings
+    scenario_sweep    what-if grid of 5 towns x 2 flat types x 2 storeys x 61 areas x 46 leases
+
+Results are written as JSON; --compare reports the change against an earlier
+run and exits non-zero if any case's median slowed by more than --threshold.
+
+Usage:
+    python benchmark.py --rows 1000000 --json bench-1m.json
+    python benchmark.py --rows 1000000 --compare bench-1m.json
+    python benchmark.py --dataset Dataset.csv --repeat 20
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from make_dataset import write_dataset
+
+QUESTIONS = [
+    "what towns are there", "average price", "average price in bedok", "average price of 4 room",
+    "highest priced 5 room", "how many flats", "most common flat type in yishun",
+    "average price in year 2019", "price trend", "average resale price of 3 room in bishan",
+    "show me 4 room in bedok", "cheapest resale flats", "most expensive resale flats",
+]
+
+
+def measure(function, repeat: int, warmup: int = 1) -> dict:
+    """
+    Time repeated calls of a function.
+
+    Args:
+        function: Zero-argument callable; its result is discarded
+        repeat: Timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        dict: runs plus min/mean/p50/p95/max in milliseconds
+    """
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - began) * 1000)
+    times = np.asarray(times)
+    return {
+        "runs": repeat,
+        "min_ms": round(float(times.min()), 3),
+        "mean_ms": round(float(times.mean()), 3),
+        "p50_ms": round(float(np.percentile(times, 50)), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "max_ms": round(float(times.max()), 3),
+    }
+
+
+def once(function) -> tuple:
+    """Time a single cold call; returns (result, timing dict)."""
+    began = time.perf_counter()
+    result = function()
+    elapsed = round((time.perf_counter() - began) * 1000, 3)
+    return result, {"runs": 1, "min_ms": elapsed, "mean_ms": elapsed, "p50_ms": elapsed,
+                    "p95_ms": elapsed, "max_ms": elapsed}
+
+
+def environment() -> dict:
+    """Versions and host details recorded with each run."""
+    import pandas as pd
+    import pyarrow
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "numpy": np.__version__, "pandas": pd.__version__, "pyarrow": pyarrow.__version__,
+        "scikit_learn": sklearn.__version__, "commit": commit,
+    }
+
+
+def run_benchmarks(dataset: str, repeat: int, batch: int, seed: int) -> dict:
+    """
+    Run every case against a dataset in the current working directory.
+
+    Args:
+        dataset: CSV path
+        repeat: Timed calls per warm case
+        batch: Listings per predict_batch call
+        seed: Seed for the random filter selections and listings
+
+    Returns:
+        dict: Case name -> timing dict
+    """
+    from hdb_data import build_cache, load_dataset
+    from hdb_dataplane import DataPlane
+    from hdb_forecast import TrendForecast
+    from hdb_intents import IntentRouter
+    from hdb_model import FEATURES, feature_frame, load_model, refresh_model
+    from hdb_scenarios import scenario_grid, sweep, value_range
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    _, results["csv_load"] = once(lambda: build_cache(dataset))
+    plane, results["data_plane"] = once(lambda: DataPlane.load(dataset))
+
+    # Random but valid sidebar selections, drawn the way the cascading selectboxes offer them
+    selections = []
+    for _ in range(max(repeat, 1)):
+        picked = []
+        for _ in range(4):
+            values = [value for value, _ in plane.options.options(*picked)]
+            picked.append(values[rng.integers(len(values))])
+        low = float(rng.uniform(40, 100))
+        selections.append(dict(zip(["flat_type", "flat_model", "storey_range", "street_name"], picked),
+                               floor_area_sqm=(low, low + 60)))
+    cycle = iter(selections * 2)
+    results["sidebar_filter"] = measure(lambda: plane.index.query(**next(cycle)), repeat, warmup=0)
+
+    towns = plane.cube.rollup(["town"]).index.tolist()
+    results["trend_groupby"] = measure(
+        lambda: plane.cube.rollup(["month"], town=towns[rng.integers(len(towns))])["mean"], repeat)
+    results["town_aggregation"] = measure(lambda: plane.cube.rollup(["town"]), repeat)
+
+    router = IntentRouter(plane.cube, plane.index)
+    results["chatbot_answer"] = measure(lambda: [router.answer(question) for question in QUESTIONS], repeat)
+    results["chatbot_answer"]["questions"] = len(QUESTIONS)
+    _, results["forecast_fit"] = once(lambda: TrendForecast.fit(plane.cube))
+
+    _, results["train_model"] = once(lambda: refresh_model(dataset, full=True))
+    model = load_model(dataset_path=dataset)
+    sample = load_dataset(dataset, columns=FEATURES[:-1] + ["month", "lease_commence_date"])
+    listings = feature_frame(sample.sample(batch, replace=True, random_state=seed))[FEATURES]
+    single = listings.iloc[0]
+    results["calculate_price"] = measure(lambda: model.predict_interval_one(
+        single["town"], single["flat_type"], single["flat_model"], single["storey_range"],
+        single["floor_area_sqm"], single["remaining_lease"]), repeat)
+    results["predict_batch"] = measure(lambda: model.predict_interval_batch(listings), repeat)
+    results["predict_batch"]["listings"] = batch
+
+    grid = scenario_grid(town=towns[:5], flat_type=["4 ROOM", "5 ROOM"], flat_model="MODEL A",
+                         storey_range=["04 TO 06", "10 TO 12"], floor_area_sqm=value_range(60, 120, 1),
+                         remaining_lease=value_range(50, 95, 1))
+    results["scenario_sweep"] = measure(lambda: sweep(model, grid), repeat)
+    results["scenario_sweep"]["scenarios"] = len(grid)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print the median change per case against a baseline run.
+
+    Args:
+        current: This run's report
+        baseline: An earlier report
+        threshold: Ratio of medians above which a case counts as a regression
+
+    Returns:
+        list: Names of the regressed cases
+    """
+    regressions = []
+    print(f"{'case':<18}{'baseline p50':>14}{'current p50':>14}{'ratio':>8}")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<18}{'-':>14}{result['p50_ms']:>14.3f}{'new':>8}")
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:<18}{before['p50_ms']:>14.3f}{result['p50_ms']:>14.3f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    if baseline.get("rows") != current.get("rows"):
+        print(f"Note: baseline has {baseline.get('rows')} rows, this run {current.get('rows')}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark data load, filtering, aggregation and prediction.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic dataset size (100k-10M)")
+    parser.add_argument("--dataset", help="Benchmark this CSV instead of a synthetic one")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data and random inputs")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per warm case")
+    parser.add_argument("--batch", type=int, default=10_000, help="Listings per predict_batch call")
+    parser.add_argument("--workdir", help="Directory for the dataset, cache and models (default: a temp dir)")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Median slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    dataset = os.path.abspath(args.dataset) if args.dataset else None
+    output = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    origin = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="hdb-bench-") as scratch:
+        workdir = os.path.abspath(args.workdir or scratch)
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)  # The cache and models go to .cache/ and models/ under the work directory
+        try:
+            generate_ms = None
+            if dataset is None:
+                dataset = os.path.join(workdir, "Dataset.csv")
+                began = time.perf_counter()
+                write_dataset(dataset, args.rows, seed=args.seed)
+                generate_ms = round((time.perf_counter() - began) * 1000, 1)
+            with open(dataset) as csv_file:
+                rows = sum(1 for _ in csv_file) - 1
+            report = {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "dataset": "synthetic" if generate_ms is not None else dataset,
+                "rows": rows,
+                "seed": args.seed,
+                "generate_ms": generate_ms,
+                "environment": environment(),
+                "results": run_benchmarks(dataset, args.repeat, args.batch, args.seed),
+            }
+        finally:
+            os.chdir(origin)
+
+    print(json.dumps(report, indent=2))
+    if output:
+        with open(output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if baseline_path:
+        with open(baseline_path) as handle:
+            regressions = compare(report, json.load(handle), args.threshold)
+        if regressions:
+            sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
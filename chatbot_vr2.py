@@ -1,79 +1,144 @@
-import streamlit as st
-import pydeck as pdk
-from geopy.geocoders import Nominatim
-import pandas as pd
-
-# Define page configuration and title
-st.set_page_config(page_title="HDB Chatbot Version 2", layout="wide")
-st.title("HDB Chatbot Version 2 - Interactive Map")
-
-# Define the options for dropdowns
-towns = [
-    "ANG MO KIO", "BEDOK", "BISHAN", "BUKIT BATOK", "BUKIT MERAH", "BUKIT PANJANG",
-    "BUKIT TIMAH", "CENTRAL AREA", "CHOA CHU KANG", "CLEMENTI", "GEYLANG", "HOUGANG",
-    "JURONG EAST", "JURONG WEST", "KALLANG/WHAMPOA", "MARINE PARADE", "PASIR RIS",
-    "PUNGGOL", "QUEENSTOWN", "SEMBAWANG", "SENGKANG", "SERANGOON", "TAMPINES",
-    "TOA PAYOH", "WOODLANDS", "YISHUN"
-]
-
-flat_types = ["3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI-GENERATION"]
-flat_models = ["STANDARD", "IMPROVED", "NEW GENERATION", "DBSS", "PREMIUM APARTMENT", "MODEL A", "MAISONETTE"]
-storey_ranges = ["01 TO 03", "04 TO 06", "07 TO 09", "10 TO 12", "13 TO 15", "16 TO 18",
-                 "19 TO 21", "22 TO 24", "25 TO 27", "28 TO 30"]
-
-# Geocoder initialization
-geolocator = Nominatim(user_agent="hdb_app")
-
-# Get coordinates for each town
-locations = []
-for town in towns:
-    location = geolocator.geocode(f"{town}, Singapore")
-    if location:
-        locations.append({
-            'town': town,
-            'lat': location.latitude,
-            'lon': location.longitude
-        })
-
-# Convert to DataFrame
-location_data = pd.DataFrame(locations)
-
-# Display the map
-st.subheader("Select a Town to View Details")
-layer = pdk.Layer(
-    "ScatterplotLayer",
-    data=location_data,
-    get_position='[lon, lat]',
-    get_color='[200, 30, 0, 160]',
-    get_radius=100
-)
-
-view_state = pdk.ViewState(
-    latitude=1.3521,
-    longitude=103.8198,
-    zoom=11,
-    pitch=45
-)
-
-r = pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip={"text": "{town}"})
-st.pydeck_chart(r)
-
-# Sidebar for details
-st.sidebar.header("HDB Flat Information")
-selected_town = st.sidebar.selectbox("Select Town", towns)
-flat_type = st.sidebar.selectbox("Flat Type", flat_types)
-flat_model = st.sidebar.selectbox("Flat Model", flat_models)
-storey_range = st.sidebar.selectbox("Storey Range", storey_ranges)
-floor_area = st.sidebar.slider("Floor Area (sqm)", min_value=40, max_value=150, value=90)
-lease = st.sidebar.slider("Remaining Lease (years)", min_value=0, max_value=99, value=60)
-
-# Estimate price
-if st.sidebar.button("Estimate Resale Price"):
-    estimated_price = 300000 + floor_area * 300 + lease * 100
-    confidence_range = (round(estimated_price * 0.9), round(estimated_price * 1.1))
-
-    st.sidebar.subheader("Estimated Resale Price:")
-    st.sidebar.write(f"${estimated_price:,.2f}")
-    st.sidebar.write(f"Confidence Range: ${confidence_range[0]:,.2f} - ${confidence_range[1]:,.2f}")
-
-
+import json
+import streamlit as st
+from hdb_data import dataset_signature, load_dataset
+from hdb_gazetteer import load_gazetteer
+from hdb_spatial import SpatialIndex, deck_frame, viewport
+from hdb_metrics import debug_panel, start_rerun, timed
+from hdb_warmup import result, warm, warm_imports
+
+# Define page configuration and title
+st.set_page_config(page_title="HDB Chatbot Version 2", layout="wide")
+trace = start_rerun("chatbot_vr2")  # Per-stage timings of this rerun; shown with HDB_DEBUG=1 or ?debug=1
+st.title("HDB Chatbot Version 2 - Interactive Map")
+
+# Define the options for dropdowns
+towns = [
+    "ANG MO KIO", "BEDOK", "BISHAN", "BUKIT BATOK", "BUKIT MERAH", "BUKIT PANJANG",
+    "BUKIT TIMAH", "CENTRAL AREA", "CHOA CHU KANG", "CLEMENTI", "GEYLANG", "HOUGANG",
+    "JURONG EAST", "JURONG WEST", "KALLANG/WHAMPOA", "MARINE PARADE", "PASIR RIS",
+    "PUNGGOL", "QUEENSTOWN", "SEMBAWANG", "SENGKANG", "SERANGOON", "TAMPINES",
+    "TOA PAYOH", "WOODLANDS", "YISHUN"
+]
+
+flat_types = ["3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI-GENERATION"]
+flat_models = ["STANDARD", "IMPROVED", "NEW GENERATION", "DBSS", "PREMIUM APARTMENT", "MODEL A", "MAISONETTE"]
+storey_ranges = ["01 TO 03", "04 TO 06", "07 TO 09", "10 TO 12", "13 TO 15", "16 TO 18",
+                 "19 TO 21", "22 TO 24", "25 TO 27", "28 TO 30"]
+MODEL_POINTER = "models/latest.json"  # Written by hdb_model on every training run
+
+def build_price_model():
+    from hdb_model import load_model  # Imported on first use: pulls in scikit-learn
+    return load_model()
+
+# Read on every rerun so a model written by train_model.py is picked up without a restart
+def model_version():
+    try:
+        with open(MODEL_POINTER) as pointer:
+            return json.load(pointer)["version"]
+    except (OSError, ValueError, KeyError):  # Not trained yet or being replaced
+        return None
+
+# Trained pipeline, loaded once per artifact version and shared across sessions
+@st.cache_resource(max_entries=1)
+def get_price_model(version):
+    return result(("price_model", version), build_price_model)
+
+# Town coordinates come from the local gazetteer, so startup needs no network access
+@st.cache_resource
+def get_gazetteer():
+    return load_gazetteer()
+
+# Block points and their zoom-level clusters are built once per dataset snapshot
+@st.cache_resource(max_entries=1)
+def load_spatial_index(signature: str):
+    return result(("spatial_index", signature), build_spatial_index, get_gazetteer())
+
+# Takes the gazetteer as an argument so the background warm-up never calls into Streamlit
+def build_spatial_index(gazetteer):
+    return SpatialIndex.from_transactions(load_dataset(columns=["block", "street_name", "town", "resale_price"]), gazetteer)
+
+# Price bins over all blocks, computed once per snapshot; the legend is generated from the same edges
+@st.cache_resource(max_entries=1)
+def load_block_scale(signature: str):
+    return load_spatial_index(signature).price_scale()
+
+# The map library, block index and model load in the background while the page renders
+signature = dataset_signature()
+warm_imports("pydeck")
+warm(("spatial_index", signature), build_spatial_index, get_gazetteer())
+warm(("price_model", model_version()), build_price_model)
+
+with timed("load"):
+    location_data = get_gazetteer().town_frame(towns)
+
+# Sidebar for details
+st.sidebar.header("HDB Flat Information")
+selected_town = st.sidebar.selectbox("Select Town", towns)
+flat_type = st.sidebar.selectbox("Flat Type", flat_types)
+flat_model = st.sidebar.selectbox("Flat Model", flat_models)
+storey_range = st.sidebar.selectbox("Storey Range", storey_ranges)
+floor_area = st.sidebar.slider("Floor Area (sqm)", min_value=40, max_value=150, value=90)
+lease = st.sidebar.slider("Remaining Lease (years)", min_value=0, max_value=99, value=60)
+
+# Display the map
+st.subheader("Select a Town to View Details")
+import pydeck as pdk  # Imported when the map renders; warmed in the background above
+# Without block coordinates every block sits on its town centroid, so the block view is only offered once some exist
+map_views = ["Towns", "Blocks"] if get_gazetteer().located_blocks() else ["Towns"]
+detail = st.radio("Map detail", map_views, horizontal=True)
+if len(map_views) == 1:
+    st.caption("Block-level detail appears once block coordinates are available: run `python hdb_gazetteer.py --resolve-blocks` and restart the app.")
+
+if detail == "Blocks":
+    # Only the clusters inside the current view are sent to the browser
+    zoom = st.slider("Zoom", min_value=11, max_value=17, value=14)
+    center = get_gazetteer().town(selected_town)
+    with timed("spatial_index"):
+        spatial = load_spatial_index(signature)
+        scale = load_block_scale(signature)
+    with timed("viewport_query"):
+        features = deck_frame(spatial.query(*viewport(center, zoom), zoom=zoom), scale=scale)
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=features,
+        get_position='[lon, lat]',
+        get_fill_color='[r, g, b, a]',
+        get_radius='radius',
+        pickable=True
+    )
+    view_state = pdk.ViewState(latitude=center[0], longitude=center[1], zoom=zoom, pitch=45)
+    tooltip = {"text": "{count} transactions\nAverage ${avg_price}"}
+else:
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=location_data,
+        get_position='[lon, lat]',
+        get_color='[200, 30, 0, 160]',
+        get_radius=100
+    )
+    view_state = pdk.ViewState(
+        latitude=1.3521,
+        longitude=103.8198,
+        zoom=11,
+        pitch=45
+    )
+    tooltip = {"text": "{town}"}
+
+with timed("map_render"):
+    r = pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip)
+    st.pydeck_chart(r)
+if detail == "Blocks":
+    st.markdown(scale.legend_html(floating=False), unsafe_allow_html=True)
+
+# Estimate price
+if st.sidebar.button("Estimate Resale Price"):
+    with timed("predict"):
+        model = get_price_model(model_version())
+        estimated_price, low, high = model.predict_interval_one(selected_town, flat_type, flat_model, storey_range, floor_area, lease)
+
+    st.sidebar.subheader("Estimated Resale Price:")
+    st.sidebar.write(f"${estimated_price:,.2f}")
+    st.sidebar.write(f"{model.intervals.coverage:.0%} Prediction Interval: ${round(low):,.2f} - ${round(high):,.2f}")
+
+trace.finish()
+debug_panel("chatbot_vr2")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precomputed aggregate cube over the resale transactions.
+
+Transactions are grouped once by town x month x flat_type x flat_model x
+storey_range. Each cell keeps count, sum, sum of squares, min and max of the
+resale price plus a sparse log-bucketed histogram used as a mergeable
+quantile sketch. Charts, map markers and chatbot answers roll cells up
+instead of scanning rows.
+
+Every statistic is additive, so cubes built from separate chunks of the
+dataset merge into the cube of the whole (AggregateCube.from_chunks).
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["town", "month", "flat_type", "flat_model", "storey_range"]
+
+# Log-spaced price buckets: each is ~6% wide, which bounds the quantile error
+SKETCH_EDGES = np.geomspace(5_000, 2_000_000, 97)
+SKETCH_BUCKETS = len(SKETCH_EDGES) + 1  # Includes the under- and overflow buckets
+
+
+class AggregateCube:
+    """
+    Resale price statistics keyed by DIMENSIONS.
+
+    Attributes:
+        cells: One row per non-empty cell with the dimension values, a derived
+            `year` and the count/sum/sum_sq/min/max of resale_price
+        sketch_cell: Cell position of each non-empty histogram bucket
+        sketch_bucket: Bucket index of each non-empty histogram bucket
+        sketch_count: Number of transactions in each non-empty bucket
+        version: Identifier of the data snapshot the cube was built from
+    """
+
+    def __init__(self, cells: pd.DataFrame, sketch_cell: np.ndarray, sketch_bucket: np.ndarray,
+                 sketch_count: np.ndarray, version: str = "") -> None:
+        self.cells = cells
+        self.sketch_cell = sketch_cell
+        self.sketch_bucket = sketch_bucket
+        self.sketch_count = sketch_count
+        self.version = version
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str = "") -> "AggregateCube":
+        """
+        Build the cube with a single grouping pass over the transactions.
+
+        Rows with a missing town, month, flat type, flat model or storey range
+        are left out of every cell.
+
+        Args:
+            df: Typed transactions as returned by hdb_data.load_dataset
+            version: Identifier of the data snapshot
+
+        Returns:
+            AggregateCube: The populated cube
+        """
+        df = df.dropna(subset=DIMENSIONS)  # A row missing a dimension belongs to no cell
+        grouped = df.groupby(DIMENSIONS, observed=True, sort=True)
+        cell_ids = grouped.ngroup().to_numpy()
+        prices = df["resale_price"].to_numpy(dtype="float64")
+
+        cells = grouped["resale_price"].agg(["count", "sum", "min", "max"])
+        cells["sum_sq"] = np.bincount(cell_ids, weights=prices * prices, minlength=len(cells))
+        cells = cells.reset_index()
+        cells["year"] = cells["month"].dt.year.astype("int16")
+
+        buckets = np.searchsorted(SKETCH_EDGES, prices, side="right")
+        keys, counts = np.unique(cell_ids.astype("int64") * SKETCH_BUCKETS + buckets, return_counts=True)
+        return cls(
+            cells,
+            (keys // SKETCH_BUCKETS).astype("int32"),
+            (keys % SKETCH_BUCKETS).astype("int16"),
+            counts.astype("int64"),
+            version,
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks, version: str = "") -> "AggregateCube":
+        """
+        Build the cube one chunk of transactions at a time.
+
+        Each chunk is reduced to a partial cube as it arrives and the partials
+        are merged once at the end, so memory is bounded by the cells rather
+        than the rows.
+
+        Args:
+            chunks: Iterable of typed transaction frames, e.g. hdb_data.iter_dataset()
+            version: Identifier of the data snapshot
+
+        Returns:
+            AggregateCube: The same cube from_frame would build over all chunks
+        """
+        partials = [cls.from_frame(chunk, version) for chunk in chunks]
+        if not partials:
+            raise ValueError("No transactions to aggregate")
+        return partials[0].merge(*partials[1:])
+
+    def merge(self, *others: "AggregateCube") -> "AggregateCube":
+        """
+        Combine cubes built over disjoint sets of transactions.
+
+        Args:
+            *others: Cubes to merge in
+
+        Returns:
+            AggregateCube: New cube with the cells and sketches of all inputs
+        """
+        cubes = tuple(cube for cube in (self,) + others if len(cube.cells))  # e.g. a chunk whose rows all lacked a dimension
+        if len(cubes) < 2:
+            return cubes[0] if cubes else self
+        cells = pd.concat([cube.cells for cube in cubes], ignore_index=True)
+        for column in DIMENSIONS:
+            if column != "month":
+                cells[column] = cells[column].astype("category")  # Inputs carry different categories
+        grouped = cells.groupby(DIMENSIONS, observed=True, sort=True)
+        cell_ids = grouped.ngroup().to_numpy()
+        merged = grouped.agg(count=("count", "sum"), sum=("sum", "sum"), min=("min", "min"),
+                             max=("max", "max"), sum_sq=("sum_sq", "sum")).reset_index()
+        merged["year"] = merged["month"].dt.year.astype("int16")
+
+        # Re-key every sketch entry from its input cell to the merged cell, then sum duplicates
+        offsets = np.cumsum([0] + [len(cube.cells) for cube in cubes[:-1]])
+        sketch_cell = np.concatenate([cell_ids[offset + cube.sketch_cell] for offset, cube in zip(offsets, cubes)])
+        keys = sketch_cell.astype("int64") * SKETCH_BUCKETS + np.concatenate([cube.sketch_bucket for cube in cubes])
+        keys, position = np.unique(keys, return_inverse=True)
+        counts = np.bincount(position, weights=np.concatenate([cube.sketch_count for cube in cubes]))
+        return AggregateCube(
+            merged,
+            (keys // SKETCH_BUCKETS).astype("int32"),
+            (keys % SKETCH_BUCKETS).astype("int16"),
+            counts.astype("int64"),
+            self.version,
+        )
+
+    def _select(self, filters: dict) -> np.ndarray:
+        """
+        Boolean mask over cells matching every filter.
+
+        Filter values may be a scalar or a list of accepted values; None
+        means no constraint on that column.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, value in filters.items():
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+            mask &= self.cells[column].isin(list(values)).to_numpy()
+        return mask
+
+    def rollup(self, by: list = None, **filters) -> pd.DataFrame:
+        """
+        Aggregate cells up to the requested grouping.
+
+        Args:
+            by: Columns to group by (any of DIMENSIONS or `year`); None
+                rolls everything up into a single row
+            **filters: Column constraints, e.g. town="BEDOK" or
+                flat_type=["3 ROOM", "4 ROOM"]
+
+        Returns:
+            pd.DataFrame: count, sum, min, max, mean and std per group
+        """
+        cells = self.cells[self._select(filters)]
+        if by:
+            grouped = cells.groupby(by, observed=True).agg(
+                count=("count", "sum"), sum=("sum", "sum"), sum_sq=("sum_sq", "sum"),
+                min=("min", "min"), max=("max", "max"),
+            )
+        else:
+            grouped = pd.DataFrame({
+                "count": [cells["count"].sum()], "sum": [cells["sum"].sum()],
+                "sum_sq": [cells["sum_sq"].sum()], "min": [cells["min"].min()], "max": [cells["max"].max()],
+            })
+        grouped["mean"] = grouped["sum"] / grouped["count"]
+        variance = grouped["sum_sq"] / grouped["count"] - grouped["mean"] ** 2
+        grouped["std"] = np.sqrt(variance.clip(lower=0))
+        return grouped.drop(columns="sum_sq")
+
+    def quantiles(self, q, by: list = None, **filters) -> pd.DataFrame:
+        """
+        Approximate price quantiles from the histogram sketches.
+
+        Args:
+            q: Quantile or list of quantiles in [0, 1]
+            by: Columns to group by; None for a single overall row
+            **filters: Column constraints as for rollup
+
+        Returns:
+            pd.DataFrame: One column per quantile, one row per group
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype="float64"))
+        mask = self._select(filters)
+        cells = self.cells[mask]
+        if by:
+            group_of_cell = np.full(len(self.cells), -1, dtype="int64")
+            group_of_cell[mask] = cells.groupby(by, observed=True, sort=True).ngroup().to_numpy()
+            index = cells.groupby(by, observed=True, sort=True).size().index
+        else:
+            group_of_cell = np.where(mask, 0, -1)
+            index = pd.RangeIndex(1)
+
+        groups = group_of_cell[self.sketch_cell]
+        keep = groups >= 0
+        hist = np.bincount(
+            groups[keep] * SKETCH_BUCKETS + self.sketch_bucket[keep],
+            weights=self.sketch_count[keep],
+            minlength=len(index) * SKETCH_BUCKETS,
+        ).reshape(len(index), SKETCH_BUCKETS)
+
+        # Bucket b spans [lower[b], upper[b]); the open-ended buckets are clamped to the sketch range
+        lower = np.concatenate(([SKETCH_EDGES[0]], SKETCH_EDGES))
+        upper = np.concatenate((SKETCH_EDGES, [SKETCH_EDGES[-1]]))
+        cumulative = hist.cumsum(axis=1)
+        totals = cumulative[:, -1:]
+        result = {}
+        for quantile in qs:
+            target = quantile * totals
+            bucket = (cumulative < target).sum(axis=1).clip(max=SKETCH_BUCKETS - 1)
+            rows = np.arange(len(index))
+            before = np.where(bucket > 0, cumulative[rows, bucket - 1], 0)
+            inside = hist[rows, bucket]
+            fraction = np.divide(target[:, 0] - before, inside, out=np.zeros(len(index)), where=inside > 0)
+            # Geometric interpolation matches the log-spaced bucket layout
+            value = lower[bucket] * (upper[bucket] / lower[bucket]) ** fraction
+            result[quantile] = np.where(totals[:, 0] > 0, value, np.nan)
+        return pd.DataFrame(result, index=index)
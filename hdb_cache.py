@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide memoization for price estimates.
+
+Users ask for the same handful of flats repeatedly, so estimates are kept
+in a bounded LRU cache with a time-to-live. Entries are tied to the model
+version that produced them and are dropped when the model changes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_key(town: str, flat_type: str, flat_model: str, storey_range: str,
+                 floor_area: float, lease: float) -> tuple:
+    """
+    Normalized cache key for an estimate request.
+
+    Args:
+        town: HDB town location
+        flat_type: Type of flat
+        flat_model: Model of flat
+        storey_range: Floor level range
+        floor_area: Floor area in square meters
+        lease: Remaining lease in years
+
+    Returns:
+        tuple: Upper-cased categoricals and rounded numerics
+    """
+    return (
+        town.strip().upper(), flat_type.strip().upper(), flat_model.strip().upper(),
+        storey_range.strip().upper(), round(float(floor_area), 1), round(float(lease), 1),
+    )
+
+
+class EstimateCache:
+    """
+    Thread-safe LRU cache with a TTL and hit/miss/eviction counters.
+
+    Streamlit serves each session on its own thread, so all access goes
+    through a lock. Expired entries count as misses and are replaced.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 6 * 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: tuple, compute, version: str = None):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Args:
+            key: Hashable request key, e.g. from estimate_key
+            compute: Zero-argument callable producing the value
+            version: Model version; a change clears every cached entry
+
+        Returns:
+            The cached or freshly computed value
+        """
+        now = time.monotonic()
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Computed outside the lock so a slow estimate does not block other sessions
+        value = compute()
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            dict: entries, hits, misses, evictions, invalidations and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Quantile colour scale for price maps.
+
+Edges are computed once per data snapshot from the prices of every region
+(town, block or cluster). Binning any number of regions is a single
+searchsorted call, and the same bins drive folium marker colours, pydeck
+RGBA fills and the legend, which is generated from the actual edges so it
+always matches what is drawn.
+"""
+import numpy as np
+
+# Leaflet awesome-marker colour names (lowest to highest) and their rendered RGB values
+FOLIUM_COLORS = ["lightblue", "blue", "cadetblue", "darkblue", "purple"]
+RGB_COLORS = np.array([
+    [138, 218, 255],
+    [56, 170, 221],
+    [67, 105, 120],
+    [0, 103, 163],
+    [210, 82, 185],
+], dtype="uint8")
+
+
+class PriceScale:
+    """
+    Price bins with one colour per bin.
+
+    Bins are right-closed like pandas.qcut: bin i covers (edges[i], edges[i + 1]],
+    and the first bin also includes its lower edge. When quantiles coincide the
+    duplicate edges are dropped and colours are spread over the remaining bins.
+
+    Attributes:
+        edges: Ascending bin edges, one more than the number of bins
+        colors: Folium colour name per bin
+        rgb: RGB colour per bin (uint8, shape bins x 3)
+    """
+
+    def __init__(self, edges: np.ndarray) -> None:
+        self.edges = np.unique(np.asarray(edges, dtype="float64"))
+        bins = max(len(self.edges) - 1, 1)
+        if bins == 1:
+            palette = np.array([len(FOLIUM_COLORS) // 2])  # A single bin gets the middle colour
+        else:
+            palette = np.linspace(0, len(FOLIUM_COLORS) - 1, bins).round().astype(int)
+        self.colors = np.array(FOLIUM_COLORS)[palette]
+        self.rgb = RGB_COLORS[palette]
+
+    @classmethod
+    def from_values(cls, values, bins: int = 5, weights=None) -> "PriceScale":
+        """
+        Quantile scale over a set of region prices.
+
+        Args:
+            values: Price per region
+            bins: Number of quantile bins before duplicates are dropped
+            weights: Optional weight per region (e.g. transaction counts)
+
+        Returns:
+            PriceScale: Scale with quantile edges
+        """
+        values = np.asarray(values, dtype="float64")
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return cls(np.array([0.0]))
+        qs = np.linspace(0, 1, bins + 1)
+        if weights is None:
+            return cls(np.quantile(values, qs))
+        order = np.argsort(values)
+        cumulative = np.cumsum(np.asarray(weights, dtype="float64")[order])
+        positions = np.searchsorted(cumulative, qs[1:-1] * cumulative[-1], side="left")
+        return cls(np.concatenate(([values[order[0]]], values[order[positions]], [values[order[-1]]])))
+
+    @property
+    def bins(self) -> int:
+        """Number of colour bins."""
+        return len(self.colors)
+
+    def bin(self, values) -> np.ndarray:
+        """
+        Bin index for each value; values outside the edges go to the end bins.
+
+        Args:
+            values: Prices to bin
+
+        Returns:
+            np.ndarray: int bin index per value
+        """
+        inner = self.edges[1:-1]
+        return np.searchsorted(inner, np.asarray(values, dtype="float64"), side="left").clip(0, self.bins - 1)
+
+    def folium_colors(self, values) -> np.ndarray:
+        """Folium marker colour name for each value."""
+        return self.colors[self.bin(values)]
+
+    def rgba(self, values, alpha: int = 180) -> np.ndarray:
+        """
+        RGBA fill for each value, for pydeck layers.
+
+        Returns:
+            np.ndarray: uint8 array of shape (len(values), 4)
+        """
+        rgb = self.rgb[self.bin(values)]
+        return np.column_stack([rgb, np.full(len(rgb), alpha, dtype="uint8")])
+
+    def labels(self) -> list:
+        """Price range label for each bin, e.g. "$420k – $510k"."""
+        def money(value: float) -> str:
+            return f"${value / 1e6:,.2f}M" if value >= 1e6 else f"${value / 1e3:,.0f}k"
+
+        if len(self.edges) == 1:
+            return [money(self.edges[0])]
+        return [f"{money(low)} – {money(high)}" for low, high in zip(self.edges[:-1], self.edges[1:])]
+
+    def legend_html(self, title: str = "Avg Resale Price", floating: bool = True) -> str:
+        """
+        Legend listing each bin's colour and price range.
+
+        Args:
+            title: Legend heading
+            floating: Position the legend over the map (folium); False for inline HTML
+
+        Returns:
+            str: HTML snippet
+        """
+        position = ("position: fixed; bottom: 50px; left: 50px; z-index:9999; "
+                    if floating else "display: inline-block; ")
+        rows = "".join(
+            f'<span style="display:inline-block; width:12px; height:12px; margin-right:6px; '
+            f'background-color:rgb({r},{g},{b}); border-radius:50%;"></span>{label}<br>'
+            for (r, g, b), label in zip(self.rgb.tolist(), self.labels())
+        )
+        return (
+            f'<div style="{position}background-color: white; font-size:14px; '
+            f'border:2px solid grey; padding: 10px; border-radius: 8px;">'
+            f"<b>Legend – {title}</b><br>{rows}</div>"
+        )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comparable-sales lookup.
+
+Recent transactions are split by town x flat type and each segment gets a
+KD-tree over scaled floor area, storey, remaining lease (at the time of
+sale) and sale age in months. A lookup queries only the flat's segment, so
+finding the k most similar recent sales takes a tree query instead of a
+scan and sort of the full history. The tree holds row ids only; the rows
+themselves are read from the Parquet cache on demand (see RowStore).
+"""
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from hdb_data import CACHE_DIR, DATASET_PATH, RowStore, dataset_signature, latest_month, load_dataset
+from hdb_model import LEASE_YEARS
+
+RECENT_MONTHS = 36  # Only sales from the last three years of the data are indexed
+# One unit of distance: 10 sqm of floor area, two storey ranges, 10 years of lease or one year of sale age
+SCALES = {"floor_area_sqm": 10.0, "storey": 6.0, "remaining_lease": 10.0, "months_ago": 12.0}
+INDEX_COLUMNS = ["month", "town", "flat_type", "storey_range", "floor_area_sqm", "lease_commence_date"]
+DISPLAY_COLUMNS = ["month", "block", "street_name", "storey_range", "floor_area_sqm",
+                   "flat_model", "lease_commence_date", "resale_price"]
+
+
+def storey_midpoint(storey_range) -> np.ndarray:
+    """
+    Middle storey of each storey range, e.g. "07 TO 09" -> 8.
+
+    Args:
+        storey_range: Storey range labels (array-like or categorical Series)
+
+    Returns:
+        np.ndarray: float midpoint per label; NaN when the label cannot be parsed
+    """
+    labels = pd.Series(storey_range, dtype="category")
+    bounds = labels.cat.categories.astype(str).str.extract(r"(\d+)\s*TO\s*(\d+)").astype("float64")
+    midpoints = bounds.mean(axis=1, skipna=False).to_numpy()
+    codes = labels.cat.codes.to_numpy()
+    return np.where(codes >= 0, midpoints[codes], np.nan)
+
+
+def scaled_points(floor_area, storey, lease, months_ago) -> np.ndarray:
+    """Stack the distance dimensions, each divided by its SCALES unit."""
+    return np.column_stack([
+        np.asarray(floor_area, dtype="float64") / SCALES["floor_area_sqm"],
+        np.asarray(storey, dtype="float64") / SCALES["storey"],
+        np.asarray(lease, dtype="float64") / SCALES["remaining_lease"],
+        np.asarray(months_ago, dtype="float64") / SCALES["months_ago"],
+    ])
+
+
+class ComparablesIndex:
+    """
+    Per-(town, flat type) KD-trees over recent transactions.
+
+    Attributes:
+        version: Dataset signature the index was built from
+        latest: Most recent sale month in the data; sale age is measured from it
+        trees: (town, flat_type) -> (KDTree, row ids in cache order)
+    """
+
+    def __init__(self, version: str, store: RowStore, latest: pd.Timestamp, trees: dict) -> None:
+        self.version = version
+        self.store = store
+        self.latest = latest
+        self.trees = trees
+
+    @classmethod
+    def build(cls, path: str = DATASET_PATH, cache_dir: str = CACHE_DIR,
+              recent_months: int = RECENT_MONTHS) -> "ComparablesIndex":
+        """
+        Index the recent transactions of the current dataset snapshot.
+
+        Args:
+            path: Path to the CSV file
+            cache_dir: Directory holding cache files
+            recent_months: Sales older than this many months before the latest month are left out
+
+        Returns:
+            ComparablesIndex: Trees for every town and flat type with recent sales
+        """
+        # Only the row groups that reach into the recent window are read
+        latest = latest_month(path, cache_dir)
+        df = load_dataset(path, cache_dir, columns=INDEX_COLUMNS, since=latest - pd.DateOffset(months=recent_months - 1))
+        months_ago = (latest.year - df["month"].dt.year) * 12 + (latest.month - df["month"].dt.month)
+        recent = (months_ago < recent_months).to_numpy() & df["lease_commence_date"].notna().to_numpy()
+        df, months_ago = df[recent], months_ago[recent].to_numpy()
+        sale_year = df["month"].dt.year + (df["month"].dt.month - 1) / 12
+        lease = LEASE_YEARS - (sale_year - df["lease_commence_date"].astype("float64"))
+        points = scaled_points(df["floor_area_sqm"], storey_midpoint(df["storey_range"]), lease, months_ago)
+        rows = df.index.to_numpy(dtype="int64")
+
+        trees = {}
+        grouped = df.groupby(["town", "flat_type"], observed=True, sort=False)
+        for key, positions in grouped.indices.items():
+            segment = points[positions]
+            usable = ~np.isnan(segment).any(axis=1)
+            if usable.any():
+                trees[(str(key[0]), str(key[1]))] = (KDTree(segment[usable]), rows[positions][usable])
+        return cls(dataset_signature(path), RowStore(path, cache_dir), latest, trees)
+
+    def query(self, town: str, flat_type: str, storey_range: str, floor_area: float,
+              lease: float, k: int = 5, columns: list = None) -> pd.DataFrame:
+        """
+        The k recent sales most similar to a flat.
+
+        The flat is compared as if it were sold in the latest month, so among
+        otherwise similar sales the more recent ones rank first.
+
+        Args:
+            town: HDB town location
+            flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
+            storey_range: Floor level range
+            floor_area: Floor area in square meters
+            lease: Remaining lease in years
+            k: Number of comparables to return
+            columns: Columns of the returned rows; defaults to DISPLAY_COLUMNS
+
+        Returns:
+            pd.DataFrame: The comparables, nearest first, with a `distance` column;
+                empty when the town has no recent sales of that flat type
+        """
+        columns = columns or DISPLAY_COLUMNS
+        segment = self.trees.get((str(town).upper(), str(flat_type).upper()))
+        if segment is None:
+            return pd.DataFrame(columns=columns + ["distance"])
+        tree, rows = segment
+        target = scaled_points([floor_area], storey_midpoint([storey_range]), [lease], [0])
+        if np.isnan(target).any():
+            raise ValueError(f"Unrecognised storey range: {storey_range!r}")
+        distances, positions = tree.query(target, k=min(k, len(rows)))
+        comparables = self.store.take(rows[positions[0]], columns)
+        comparables["distance"] = distances[0]
+        return comparables
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared data access for the ChopeFlat apps and notebooks.
+
+The resale history in Dataset.csv is parsed once into a typed, columnar
+Parquet cache (categorical text columns, datetime months, compact numeric
+types). Later loads read the cache directly until the CSV changes on disk.
+
+The CSV is parsed and written in chunks, so building the cache never holds
+the whole history in memory. Consumers that must not either can stream the
+cache batch by batch (iter_dataset), read a column projection
+(load_dataset(columns=...)) and fetch raw rows on demand through a RowStore.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATASET_PATH = "Dataset.csv"
+CACHE_DIR = ".cache"
+CACHE_FORMAT = 2  # Bump when the cached schema changes so old caches are rebuilt
+CHUNK_ROWS = 250_000  # CSV rows parsed per chunk
+ROW_GROUP_ROWS = 65_536  # Parquet row group size; the unit of on-demand row reads
+
+CATEGORICAL_COLUMNS = ["town", "flat_type", "flat_model", "storey_range", "street_name", "block"]
+NUMERIC_DTYPES = {
+    "floor_area_sqm": "float32",
+    "lease_commence_date": "Int16",
+    "resale_price": "float64",
+}
+
+
+def dataset_signature(path: str = DATASET_PATH) -> str:
+    """
+    Identify the current version of a CSV file without reading it.
+
+    Args:
+        path: Path to the CSV file
+
+    Returns:
+        str: Short hex digest of the file's name, size, mtime and cache format
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_FORMAT}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def read_csv(path: str = DATASET_PATH, **kwargs) -> pd.DataFrame:
+    """
+    Parse the resale CSV with explicit dtypes.
+
+    Args:
+        path: Path to the CSV file
+        **kwargs: Extra arguments passed through to pandas.read_csv
+
+    Returns:
+        pd.DataFrame: Raw rows with string columns left as object dtype
+    """
+    dtypes = {col: "string" for col in CATEGORICAL_COLUMNS}
+    dtypes.update({col: dtype for col, dtype in NUMERIC_DTYPES.items() if col != "lease_commence_date"})
+    return pd.read_csv(path, dtype=dtypes, **kwargs)
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a raw CSV frame into the typed layout used by the apps.
+
+    Text columns are upper-cased (older HDB releases mix "Improved" and
+    "IMPROVED") and stored as categoricals, `month` becomes a datetime and a
+    `year` column is derived from it.
+
+    Args:
+        df: Frame as returned by read_csv
+
+    Returns:
+        pd.DataFrame: Typed frame
+    """
+    df = df[df["resale_price"].notna()].reset_index(drop=True)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].str.strip().str.upper().astype("category")
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    df["month"] = pd.to_datetime(df["month"], format="%Y-%m")
+    df["year"] = df["month"].dt.year.astype("int16")
+    return df
+
+
+def iter_chunks(path: str = DATASET_PATH, chunk_rows: int = CHUNK_ROWS):
+    """
+    Stream the resale CSV as typed frames of at most chunk_rows rows.
+
+    Args:
+        path: Path to the CSV file
+        chunk_rows: Rows parsed per chunk
+
+    Yields:
+        pd.DataFrame: Chunks normalized as by normalize_frame
+    """
+    with read_csv(path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield normalize_frame(chunk)
+
+
+def arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Fixed Parquet schema for the typed layout.
+
+    Categorical columns are stored as dictionary<int32, string> so chunks with
+    different categories can be appended to the same file.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            schema = schema.set(schema.get_field_index(col), pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+
+def sort_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Put categories in sorted order; the cache unifies chunk dictionaries in encounter order."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def cache_path(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR) -> Path:
+    """
+    Location of the columnar cache for the current version of a CSV file.
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory holding cache files
+
+    Returns:
+        Path: Parquet file path named after the CSV signature
+    """
+    return Path(cache_dir) / f"{Path(path).stem}.{dataset_signature(path)}.parquet"
+
+
+def build_cache(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR, chunk_rows: int = CHUNK_ROWS) -> Path:
+    """
+    Make sure the columnar cache for the current CSV exists, building it chunk by chunk.
+
+    On a cache miss the CSV is streamed into a Parquet file one chunk at a time
+    and cache files written earlier for other versions of the same CSV are removed.
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory holding cache files
+        chunk_rows: Rows parsed per chunk
+
+    Returns:
+        Path: The current cache file
+    """
+    target = cache_path(path, cache_dir)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp")
+    writer = None
+    try:
+        for chunk in iter_chunks(path, chunk_rows):
+            if writer is None:
+                schema = arrow_schema(chunk)
+                writer = pq.ParquetWriter(tmp, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+                               row_group_size=ROW_GROUP_ROWS)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        normalize_frame(read_csv(path)).to_parquet(tmp, index=False)  # Header-only CSV
+    os.replace(tmp, target)  # Atomic so concurrent workers never read a partial file
+
+    remove_stale(target, f"{Path(path).stem}.*.parquet")
+    return target
+
+
+def remove_stale(target: Path, pattern: str) -> None:
+    """
+    Delete the files next to target that match pattern and were written before it.
+
+    Files written after target belong to a newer snapshot that another
+    process may already be serving, so they are left alone.
+
+    Args:
+        target: The file just written
+        pattern: Glob matching every version of the file, e.g. "Dataset.*.parquet"
+    """
+    written = target.stat().st_mtime_ns
+    for stale in target.parent.glob(pattern):
+        try:
+            if stale != target and stale.stat().st_mtime_ns < written:
+                stale.unlink()
+        except FileNotFoundError:
+            pass  # Removed by another process in the meantime
+
+
+def load_dataset(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR, columns: list = None,
+                 since: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Load the resale dataset, reusing the columnar cache when it is current.
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory holding cache files
+        columns: Columns to read; None for all. A projection only reads
+            those columns from disk.
+        since: Only transactions from this month on. Row groups whose
+            month statistics end before it are skipped without being read.
+
+    Returns:
+        pd.DataFrame: Typed resale transactions, indexed by cache position
+            so they can be fetched again through a RowStore
+    """
+    cache = build_cache(path, cache_dir)
+    if since is None:
+        return sort_categories(pd.read_parquet(cache, columns=columns))
+    since = pd.Timestamp(since)
+    parquet = pq.ParquetFile(cache)
+    offsets = np.cumsum([0] + [parquet.metadata.row_group(group).num_rows for group in range(parquet.num_row_groups)])
+    groups = [group for group, (_, end) in enumerate(month_statistics(parquet)) if end is None or end >= since]
+    read = None if columns is None else list(dict.fromkeys(list(columns) + ["month"]))
+    if groups:
+        df = parquet.read_row_groups(groups, columns=read).to_pandas()
+    else:
+        df = parquet.schema_arrow.empty_table().select(read or parquet.schema_arrow.names).to_pandas()
+    # Keep each row's position in the cache, as a full read would
+    df.index = np.concatenate([np.arange(offsets[group], offsets[group + 1]) for group in groups] + [np.empty(0, "int64")])
+    df = df[(df["month"] >= since).to_numpy()]
+    return sort_categories((df if columns is None else df[list(columns)]).copy())
+
+
+def month_statistics(parquet: pq.ParquetFile) -> list:
+    """
+    First and last month of every row group, from the file footer.
+
+    Args:
+        parquet: Open cache file
+
+    Returns:
+        list: (first, last) timestamps per row group; (None, None) where the
+            group carries no statistics
+    """
+    column = parquet.schema_arrow.get_field_index("month")
+    bounds = []
+    for group in range(parquet.num_row_groups):
+        stats = parquet.metadata.row_group(group).column(column).statistics
+        if stats is None or not stats.has_min_max:
+            bounds.append((None, None))
+        else:
+            bounds.append((pd.Timestamp(stats.min), pd.Timestamp(stats.max)))
+    return bounds
+
+
+def latest_month(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR) -> pd.Timestamp:
+    """
+    Latest transaction month, read from the cache footer rather than the rows.
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory holding cache files
+
+    Returns:
+        pd.Timestamp: The latest month; NaT for an empty dataset
+    """
+    cache = build_cache(path, cache_dir)
+    ends = [end for _, end in month_statistics(pq.ParquetFile(cache))]
+    if None in ends:  # Written without statistics: read the one column instead
+        return pd.read_parquet(cache, columns=["month"])["month"].max()
+    return max(ends, default=pd.NaT)
+
+
+def iter_dataset(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR, columns: list = None):
+    """
+    Stream the cached dataset one row group at a time.
+
+    Categories differ between batches, so consumers should fold on values
+    rather than category codes.
+
+    Args:
+        path: Path to the CSV file
+        cache_dir: Directory holding cache files
+        columns: Columns to read; None for all
+
+    Yields:
+        pd.DataFrame: Typed batches of at most ROW_GROUP_ROWS rows
+    """
+    parquet = pq.ParquetFile(build_cache(path, cache_dir))
+    for group in range(parquet.num_row_groups):
+        yield sort_categories(parquet.read_row_group(group, columns=columns).to_pandas())
+
+
+class RowStore:
+    """
+    On-demand access to raw rows of the cached dataset.
+
+    Only the row groups that contain the requested rows are read, so a
+    table page or a handful of sample rows never loads the full history.
+    """
+
+    def __init__(self, path: str = DATASET_PATH, cache_dir: str = CACHE_DIR) -> None:
+        self.parquet = pq.ParquetFile(build_cache(path, cache_dir))
+        sizes = [self.parquet.metadata.row_group(group).num_rows for group in range(self.parquet.num_row_groups)]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes))).astype("int64")
+        self.rows = int(self.offsets[-1])
+        self.columns = self.parquet.schema_arrow.names
+
+    def take(self, rows: np.ndarray, columns: list = None) -> pd.DataFrame:
+        """
+        Materialise the given row positions.
+
+        Args:
+            rows: Row positions in cache order
+            columns: Columns to include; None for all
+
+        Returns:
+            pd.DataFrame: The rows in the requested order, indexed by position
+        """
+        rows = np.asarray(rows, dtype="int64")
+        group_of = np.searchsorted(self.offsets, rows, side="right") - 1
+        groups = np.unique(group_of)
+        if groups.size == 0:
+            return self.parquet.schema_arrow.empty_table().select(columns or self.columns).to_pandas()
+        table = self.parquet.read_row_groups(groups.tolist(), columns=columns)
+        # Position of each requested row inside the concatenated row groups
+        sizes = self.offsets[groups + 1] - self.offsets[groups]
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        local = rows - self.offsets[group_of] + starts[np.searchsorted(groups, group_of)]
+        frame = sort_categories(table.take(pa.array(local)).to_pandas())
+        frame.index = rows
+        return frame
+
+    def page(self, number: int, size: int = 100, columns: list = None) -> pd.DataFrame:
+        """
+        One page of rows in cache order.
+
+        Args:
+            number: Zero-based page number
+            size: Rows per page
+            columns: Columns to include; None for all
+        """
+        start = min(number * size, self.rows)
+        return self.take(np.arange(start, min(start + size, self.rows)), columns)
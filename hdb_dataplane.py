@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide, read-only data plane shared by every Streamlit session.
+
+One DataPlane per dataset snapshot holds the aggregate cube, the filter and
+option indexes and the on-demand row store. The apps keep it in a single
+st.cache_resource, so memory does not grow with the number of sessions:
+sessions only hold filter state and row ids, and materialise rows through
+DataPlane.rows when they display them.
+
+The numpy arrays behind the indexes are marked read-only, so a session that
+accidentally writes into shared state fails loudly instead of corrupting
+what every other session sees.
+"""
+import numpy as np
+import pandas as pd
+
+from hdb_aggregates import DIMENSIONS, AggregateCube
+from hdb_data import CACHE_DIR, DATASET_PATH, RowStore, dataset_signature, iter_dataset, load_dataset
+from hdb_query import CASCADE_COLUMNS, INDEX_COLUMNS, RANGE_COLUMNS, FilterIndex, OptionIndex
+
+
+def freeze(*containers) -> None:
+    """Mark every numpy array in the given dicts or objects as read-only."""
+    for container in containers:
+        values = container.values() if isinstance(container, dict) else vars(container).values()
+        for value in values:
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            elif isinstance(value, dict):
+                freeze(value)
+
+
+class DataPlane:
+    """
+    Immutable shared state for one dataset snapshot.
+
+    Attributes:
+        version: Dataset signature the plane was built from
+        store: On-demand access to raw rows
+        cube: Aggregate cube for charts, map markers and chatbot answers
+        index: Filter index over the indexed columns (rows come from store)
+        options: Cascading sidebar option counts
+    """
+
+    def __init__(self, version: str, store: RowStore, cube: AggregateCube,
+                 index: FilterIndex, options: OptionIndex) -> None:
+        self.version = version
+        self.store = store
+        self.cube = cube
+        self.index = index
+        self.options = options
+        freeze(cube, index)
+
+    @classmethod
+    def load(cls, path: str = DATASET_PATH, cache_dir: str = CACHE_DIR) -> "DataPlane":
+        """
+        Build the data plane for the current version of the dataset.
+
+        Args:
+            path: Path to the CSV file
+            cache_dir: Directory holding cache files
+
+        Returns:
+            DataPlane: Shared structures for the snapshot
+        """
+        version = dataset_signature(path)
+        store = RowStore(path, cache_dir)
+        cube = AggregateCube.from_chunks(iter_dataset(path, cache_dir, columns=DIMENSIONS + ["resale_price"]),
+                                         version=version)
+        index = FilterIndex(load_dataset(path, cache_dir, columns=INDEX_COLUMNS), store=store)
+        options = OptionIndex.from_chunks(iter_dataset(path, cache_dir, columns=CASCADE_COLUMNS + RANGE_COLUMNS))
+        return cls(version, store, cube, index, options)
+
+    def rows(self, row_ids, columns: list = None) -> pd.DataFrame:
+        """
+        Materialise rows by id for display.
+
+        Args:
+            row_ids: Row positions, e.g. from index.query or a session's saved flats
+            columns: Columns to include; None for all
+
+        Returns:
+            pd.DataFrame: The rows, indexed by row id
+        """
+        return self.store.take(np.asarray(row_ids, dtype="int64"), columns)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trend forecasts of monthly resale prices per town and flat type.
+
+Every series (all towns, each town, each flat type, each town x flat type)
+is fitted from the aggregate cube's monthly cells, never from raw rows: a
+weighted least-squares line through the log of the monthly mean price over
+the last WINDOW_MONTHS, weighted by the month's number of sales. The line
+is extended HORIZON_MONTHS ahead with a prediction band that widens with
+the distance from the data.
+
+Towns are fitted in parallel on a process pool. The forecasts of a data
+snapshot are written to .cache/ next to the columnar dataset cache, named
+after the snapshot version, so the apps only read a small table and never
+fit at request time. To fit ahead of the apps after updating Dataset.csv:
+
+    python hdb_forecast.py
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from hdb_aggregates import AggregateCube
+from hdb_data import CACHE_DIR, DATASET_PATH, remove_stale
+from hdb_intervals import INTERVAL_COVERAGE
+from hdb_warmup import MAX_PROCESS_WORKERS, process_pool, process_workers
+
+FORECAST_FORMAT = 1  # Bump when the fit or the table layout changes so old forecasts are refitted
+HORIZON_MONTHS = 12
+WINDOW_MONTHS = 60  # Only the recent trend is extrapolated
+MIN_MONTHS = 12  # Series with fewer months of sales in the window are not forecast
+MAX_WORKERS = MAX_PROCESS_WORKERS
+ALL = "ALL"  # Town or flat type of a series that spans all of them
+
+COLUMNS = ["town", "flat_type", "month", "estimate", "lower", "upper", "annual_growth"]
+
+
+def forecast_path(version: str, cache_dir: str = CACHE_DIR) -> Path:
+    """Location of the persisted forecasts for a data snapshot."""
+    return Path(cache_dir) / f"forecast{FORECAST_FORMAT}.{version}.parquet"
+
+
+def fit_series(monthly: pd.DataFrame, horizon: int = HORIZON_MONTHS, window: int = WINDOW_MONTHS,
+               coverage: float = INTERVAL_COVERAGE) -> pd.DataFrame:
+    """
+    Fit a log-linear trend to one monthly series and extend it.
+
+    Args:
+        monthly: count and sum of resale_price, indexed by month (Timestamp), sorted
+        horizon: Months to forecast after the last month
+        window: Months of history used for the fit
+        coverage: Share of future monthly means the band should cover
+
+    Returns:
+        pd.DataFrame: month, estimate, lower, upper and annual_growth per
+            forecast month; empty if the series is too short
+    """
+    months = monthly.index.year * 12 + monthly.index.month - 1
+    recent = months > months.max() - window
+    if recent.sum() < MIN_MONTHS:
+        return pd.DataFrame(columns=COLUMNS[2:])
+    t = (months[recent] - months.max()).to_numpy(dtype="float64")  # 0 at the last observed month
+    counts = monthly["count"].to_numpy(dtype="float64")[recent]
+    y = np.log(monthly["sum"].to_numpy(dtype="float64")[recent] / counts)
+    w = counts / counts.mean()  # A month with average volume has weight 1
+
+    design = np.column_stack([np.ones_like(t), t])
+    weighted = design * np.sqrt(w)[:, None]
+    beta, *_ = np.linalg.lstsq(weighted, y * np.sqrt(w), rcond=None)
+    residuals = y - design @ beta
+    variance = (w * residuals ** 2).sum() / max(len(t) - 2, 1)
+    covariance = np.linalg.pinv(weighted.T @ weighted)
+
+    ahead = np.arange(1, horizon + 1, dtype="float64")
+    future = np.column_stack([np.ones_like(ahead), ahead])
+    # Spread of a new average-volume month around the line, plus the uncertainty of the line itself
+    spread = np.sqrt(variance * (1 + np.einsum("ij,jk,ik->i", future, covariance, future)))
+    z = NormalDist().inv_cdf(0.5 + coverage / 2)
+    centre = future @ beta
+    last = monthly.index.max()
+    return pd.DataFrame({
+        "month": pd.date_range(last + pd.offsets.MonthBegin(1), periods=horizon, freq="MS"),
+        "estimate": np.exp(centre),
+        "lower": np.exp(centre - z * spread),
+        "upper": np.exp(centre + z * spread),
+        "annual_growth": np.expm1(12 * beta[1]),
+    })
+
+
+def fit_town(town: str, cells: pd.DataFrame, horizon: int = HORIZON_MONTHS,
+             window: int = WINDOW_MONTHS) -> pd.DataFrame:
+    """
+    Forecast one town overall and per flat type; the unit of work on the pool.
+
+    Args:
+        town: Town name, or ALL for the series across towns
+        cells: count and sum per flat_type and month for the town
+        horizon: Months to forecast
+        window: Months of history used for each fit
+
+    Returns:
+        pd.DataFrame: COLUMNS rows for every series of the town that could be fitted
+    """
+    series = {ALL: cells.groupby("month")[["count", "sum"]].sum()}
+    for flat_type, monthly in cells.groupby("flat_type", observed=True):
+        series[flat_type] = monthly.set_index("month")[["count", "sum"]]
+    frames = []
+    for flat_type, monthly in series.items():
+        forecast = fit_series(monthly.sort_index(), horizon, window)
+        if len(forecast):
+            frames.append(forecast.assign(town=town, flat_type=flat_type))
+    return pd.concat(frames, ignore_index=True)[COLUMNS] if frames else pd.DataFrame(columns=COLUMNS)
+
+
+class TrendForecast:
+    """
+    Persisted trend forecasts for one data snapshot.
+
+    Attributes:
+        version: Dataset signature the forecasts were fitted on
+        table: COLUMNS rows, HORIZON_MONTHS per fitted series
+    """
+
+    def __init__(self, version: str, table: pd.DataFrame) -> None:
+        self.version = version
+        self.table = table
+        self._series = {key: frame.set_index("month")[["estimate", "lower", "upper"]]
+                        for key, frame in table.groupby(["town", "flat_type"], sort=False)}
+        self._growth = {key: float(frame["annual_growth"].iloc[0])
+                        for key, frame in table.groupby(["town", "flat_type"], sort=False)}
+
+    @classmethod
+    def fit(cls, cube: AggregateCube, horizon: int = HORIZON_MONTHS, window: int = WINDOW_MONTHS,
+            workers: int = None) -> "TrendForecast":
+        """
+        Fit every series of a cube, one pool task per town.
+
+        Args:
+            cube: Aggregate cube of the snapshot
+            horizon: Months to forecast
+            window: Months of history used for each fit
+            workers: Pool size; defaults to the CPU count, capped at MAX_WORKERS.
+                With one worker the towns are fitted in-process.
+
+        Returns:
+            TrendForecast: Forecasts for the cube's version
+        """
+        cells = cube.rollup(["town", "flat_type", "month"])[["count", "sum"]].reset_index()
+        cells["town"] = cells["town"].astype(str)
+        tasks = [(town, frame.drop(columns="town")) for town, frame in cells.groupby("town", sort=True)]
+        tasks.append((ALL, cells.groupby(["flat_type", "month"], observed=True)[["count", "sum"]].sum().reset_index()))
+
+        workers = process_workers(workers, MAX_WORKERS)
+        towns, frames = zip(*tasks)
+        args = (towns, frames, [horizon] * len(tasks), [window] * len(tasks))
+        if workers < 2:
+            results = list(map(fit_town, *args))
+        else:
+            with process_pool(workers) as pool:
+                results = list(pool.map(fit_town, *args))
+        table = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=COLUMNS)
+        table[["town", "flat_type"]] = table[["town", "flat_type"]].astype(str)
+        return cls(cube.version, table)
+
+    def save(self, cache_dir: str = CACHE_DIR) -> Path:
+        """
+        Write the forecasts for this snapshot and remove those written earlier for other snapshots.
+
+        Every writer uses its own temporary file, so processes fitting the
+        same snapshot at once never write into each other's output.
+
+        Args:
+            cache_dir: Directory holding cache files
+
+        Returns:
+            Path: The written file
+        """
+        target = forecast_path(self.version, cache_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=target.parent, prefix=f"{target.name}.", suffix=".tmp", delete=False)
+        try:
+            with tmp:
+                self.table.to_parquet(tmp, index=False)
+            os.replace(tmp.name, target)  # Atomic so concurrent workers never read a partial file
+        finally:
+            Path(tmp.name).unlink(missing_ok=True)  # Only still there if the write failed
+        remove_stale(target, "forecast*.parquet")
+        return target
+
+    @classmethod
+    def load(cls, cube: AggregateCube, cache_dir: str = CACHE_DIR, workers: int = None) -> "TrendForecast":
+        """
+        Read the forecasts of the cube's snapshot, fitting and saving them on a miss.
+
+        Args:
+            cube: Aggregate cube of the current snapshot
+            cache_dir: Directory holding cache files
+            workers: Pool size used when a fit is needed
+
+        Returns:
+            TrendForecast: Forecasts for the cube's version
+        """
+        path = forecast_path(cube.version, cache_dir)
+        if path.exists():
+            return cls(cube.version, pd.read_parquet(path))
+        forecast = cls.fit(cube, workers=workers)
+        forecast.save(cache_dir)
+        return forecast
+
+    def series(self, town: str = None, flat_type: str = None) -> pd.DataFrame:
+        """
+        Forecast months of one series.
+
+        Args:
+            town: Town, or None across towns
+            flat_type: Flat type, or None across flat types
+
+        Returns:
+            pd.DataFrame: estimate, lower and upper indexed by month; None if
+                the series had too little data to fit
+        """
+        return self._series.get((town or ALL, flat_type or ALL))
+
+    def growth(self, town: str = None, flat_type: str = None) -> float:
+        """Fitted annual growth rate of a series (0.03 for +3% a year), or None."""
+        return self._growth.get((town or ALL, flat_type or ALL))
+
+
+def main() -> None:
+    """
+    Fit and persist the forecasts for the current dataset.
+    """
+    from hdb_dataplane import DataPlane
+
+    parser = argparse.ArgumentParser(description="Fit town price trend forecasts for the current dataset.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Resale transactions CSV")
+    parser.add_argument("--workers", type=int, help="Processes used for the fit (default: CPU count, up to 4)")
+    args = parser.parse_args()
+
+    cube = DataPlane.load(args.dataset).cube
+    forecast = TrendForecast.fit(cube, workers=args.workers)
+    path = forecast.save()
+    series = forecast.table.groupby(["town", "flat_type"]).ngroups
+    print(f"Wrote {series:,} series x {HORIZON_MONTHS} months to {path}")
+    overall = forecast.series()
+    if overall is not None:
+        print(f"All towns: ${overall['estimate'].iloc[-1]:,.0f} by {overall.index[-1]:%b %Y} "
+              f"({forecast.growth():+.1%} a year)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local gazetteer for HDB towns and blocks.
+
+Town centroids (and any known block coordinates) ship in the versioned
+data/gazetteer.json, so the apps start without network access. Addresses
+that are not in the gazetteer are looked up through a persistent on-disk
+geocode cache; misses are resolved in the background, one rate-limited
+batch at a time, and served from disk on every later run.
+
+To pre-resolve every block in the dataset into the cache:
+
+    python hdb_gazetteer.py --resolve-blocks
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from hdb_data import CACHE_DIR, DATASET_PATH, load_dataset
+
+GAZETTEER_PATH = "data/gazetteer.json"
+GEOCODE_CACHE_PATH = f"{CACHE_DIR}/geocode.json"
+NOMINATIM_USER_AGENT = "chopeflat"
+NOMINATIM_DELAY_SECONDS = 1.0  # Nominatim usage policy: at most one request per second
+
+
+def address_key(block: str, street: str) -> str:
+    """Normalized lookup key for a block address, e.g. "123|ANG MO KIO AVE 3"."""
+    return f"{str(block).strip().upper()}|{str(street).strip().upper()}"
+
+
+class GeocodeCache:
+    """
+    Persistent address -> (lat, lon) cache stored as JSON.
+
+    Addresses Nominatim has no match for are stored as None so they are not
+    retried on every run. Timeouts and service errors are never stored.
+    """
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def resolved(self) -> set:
+        """Keys that resolved to coordinates (unresolvable addresses excluded)."""
+        return {key for key, value in self._entries.items() if value}
+
+    def get(self, key: str):
+        """Cached (lat, lon) for a key, or None if unknown or unresolvable."""
+        value = self._entries.get(key)
+        return tuple(value) if value else None
+
+    def update(self, results: dict) -> None:
+        """Store resolved entries and persist the cache atomically."""
+        with self._lock:
+            self._entries.update({key: list(value) if value else None for key, value in results.items()})
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entries))
+            os.replace(tmp, self.path)
+
+
+class BatchGeocoder:
+    """
+    Background resolver for addresses missing from the geocode cache.
+
+    A single worker thread processes submitted batches in order, respecting
+    Nominatim's rate limit, so callers never block on network I/O.
+    """
+
+    def __init__(self, cache: GeocodeCache) -> None:
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocoder")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, addresses: dict) -> Future:
+        """
+        Queue addresses for resolution.
+
+        Args:
+            addresses: key -> free-text query ("123 ANG MO KIO AVE 3, Singapore")
+
+        Returns:
+            Future: Resolves to the dict of results once the batch is written to the
+                cache; addresses that failed with a timeout or service error are
+                left out and can be submitted again
+        """
+        with self._lock:
+            todo = {key: query for key, query in addresses.items()
+                    if key not in self.cache and key not in self._pending}
+            self._pending.update(todo)
+        return self._executor.submit(self._resolve, todo)
+
+    def _resolve(self, addresses: dict) -> dict:
+        from geopy.exc import GeocoderServiceError, GeocoderTimedOut, GeocoderUnavailable
+        from geopy.extra.rate_limiter import RateLimiter  # Network client only loaded when a lookup is needed
+        from geopy.geocoders import Nominatim
+
+        geocode = RateLimiter(Nominatim(user_agent=NOMINATIM_USER_AGENT).geocode,
+                              min_delay_seconds=NOMINATIM_DELAY_SECONDS, swallow_exceptions=False)
+        results = {}
+        try:
+            for key, query in addresses.items():
+                try:
+                    location = geocode(query)
+                except GeocoderUnavailable:
+                    break  # Service down: leave the rest of the batch uncached so it is retried later
+                except (GeocoderTimedOut, GeocoderServiceError):
+                    continue  # Transient failure: not cached, retried on the next submit
+                # Only a definitive empty answer from Nominatim is cached as unresolvable
+                results[key] = (location.latitude, location.longitude) if location else None
+                if len(results) % 50 == 0:
+                    self.cache.update(results)  # Checkpoint long batches
+        finally:
+            self.cache.update(results)
+            with self._lock:
+                self._pending.difference_update(addresses)
+        return results
+
+
+class Gazetteer:
+    """
+    Town and block coordinates loaded from disk.
+
+    Attributes:
+        version: Gazetteer file version
+        center: Default map centre (lat, lon)
+        towns: Town name -> (lat, lon)
+        blocks: address_key -> (lat, lon) shipped with the gazetteer
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH, cache: GeocodeCache = None) -> None:
+        document = json.loads(Path(path).read_text())
+        self.version = document["version"]
+        self.center = tuple(document["center"])
+        self.towns = {town: tuple(point) for town, point in document["towns"].items()}
+        self.blocks = {key: tuple(point) for key, point in document.get("blocks", {}).items()}
+        self.cache = cache or GeocodeCache()
+        self._geocoder = None
+
+    def town(self, name: str):
+        """Centroid of a town, or None if unknown."""
+        return self.towns.get(name.strip().upper())
+
+    def town_frame(self, towns: list = None) -> pd.DataFrame:
+        """
+        Town centroids as a frame with town, lat and lon columns.
+
+        Args:
+            towns: Towns to include, in order; None for all
+        """
+        names = [town for town in (towns or self.towns) if town in self.towns]
+        return pd.DataFrame({
+            "town": names,
+            "lat": [self.towns[town][0] for town in names],
+            "lon": [self.towns[town][1] for town in names],
+        })
+
+    def block(self, block: str, street: str):
+        """Coordinates of a block from the gazetteer or the geocode cache, or None."""
+        key = address_key(block, street)
+        return self.blocks.get(key) or self.cache.get(key)
+
+    def located_blocks(self) -> int:
+        """
+        Number of block addresses with known coordinates, shipped or cached.
+
+        Zero until data/gazetteer.json ships blocks or
+        `python hdb_gazetteer.py --resolve-blocks` has filled the geocode cache;
+        until then every block falls back to its town centroid.
+        """
+        return len(self.blocks.keys() | self.cache.resolved())
+
+    def locate_blocks(self, addresses: pd.DataFrame, resolve: bool = False) -> pd.DataFrame:
+        """
+        Coordinates for many block addresses, falling back to the town centroid.
+
+        Args:
+            addresses: Frame with block, street_name and town columns
+            resolve: Queue unknown addresses for background geocoding
+
+        Returns:
+            pd.DataFrame: lat, lon and an `exact` flag aligned with addresses
+        """
+        keys = [address_key(block, street) for block, street in zip(addresses["block"], addresses["street_name"])]
+        points, exact, missing = [], [], {}
+        for key, town in zip(keys, addresses["town"]):
+            point = self.blocks.get(key) or self.cache.get(key)
+            exact.append(point is not None)
+            if point is None:
+                if key not in self.cache:
+                    block, street = key.split("|", 1)
+                    missing[key] = f"{block} {street}, Singapore"
+                point = self.towns.get(str(town), self.center)
+            points.append(point)
+        if resolve and missing:
+            self.resolve_async(missing)
+        return pd.DataFrame({
+            "lat": [point[0] for point in points],
+            "lon": [point[1] for point in points],
+            "exact": exact,
+        }, index=addresses.index)
+
+    def resolve_async(self, addresses: dict) -> Future:
+        """Resolve addresses in the background; results land in the geocode cache."""
+        if self._geocoder is None:
+            self._geocoder = BatchGeocoder(self.cache)
+        return self._geocoder.submit(addresses)
+
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    """
+    Load the local gazetteer.
+
+    Args:
+        path: Gazetteer JSON file
+
+    Returns:
+        Gazetteer: Town and block coordinates
+    """
+    return Gazetteer(path)
+
+
+def main() -> None:
+    """
+    Resolve every distinct block in the dataset into the geocode cache.
+    """
+    parser = argparse.ArgumentParser(description="Pre-resolve HDB block coordinates into the local geocode cache.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Resale transactions CSV")
+    parser.add_argument("--resolve-blocks", action="store_true", help="Geocode blocks missing from the cache")
+    args = parser.parse_args()
+
+    gazetteer = load_gazetteer()
+    addresses = load_dataset(args.dataset)[["block", "street_name", "town"]].drop_duplicates()
+    located = gazetteer.locate_blocks(addresses)
+    print(f"{int(located['exact'].sum()):,} of {len(addresses):,} blocks already located")
+    if args.resolve_blocks:
+        missing = {address_key(block, street): f"{block} {street}, Singapore"
+                   for block, street, exact in zip(addresses["block"], addresses["street_name"], located["exact"])
+                   if not exact}
+        results = gazetteer.resolve_async(missing).result()
+        print(f"Resolved {sum(1 for point in results.values() if point):,} of {len(missing):,} addresses; "
+              f"{len(missing) - len(results):,} failed and will be retried on the next run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Intent router for the ChopeFlat chatbot.
+
+A question is tokenized once and scanned with a token-level phrase trie that
+recognises both intent trigger phrases ("average price", "which town has the
+most") and entities (towns, flat types, years). The best matching intent is
+dispatched to a handler that answers from a summary table precomputed from
+the aggregate cube, so answering a question never scans transactions.
+"""
+import re
+from dataclasses import dataclass, field
+from itertools import combinations
+
+import pandas as pd
+
+from hdb_aggregates import AggregateCube
+from hdb_query import FilterIndex
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+ENTITY_KINDS = ["town", "flat_type", "year"]
+
+
+def tokenize(text: str) -> list:
+    """
+    Lower-cased alphanumeric tokens ("4-Room" -> ["4", "room"]).
+
+    Args:
+        text: Raw question or phrase
+
+    Returns:
+        list: Tokens in order
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class PhraseTrie:
+    """
+    Token-level trie mapping multi-word phrases to payloads.
+
+    scan() walks the trie from every token position and reports every phrase
+    that ends there, so overlapping phrases ("average price" and "average
+    price in") are both found in one pass.
+    """
+
+    def __init__(self) -> None:
+        self._root = {}
+
+    def add(self, phrase: str, payload: tuple) -> None:
+        """Register a phrase; a phrase may carry several payloads."""
+        node = self._root
+        for token in tokenize(phrase):
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(payload)
+
+    def scan(self, tokens: list) -> list:
+        """
+        All phrase matches in a token list.
+
+        Args:
+            tokens: Output of tokenize
+
+        Returns:
+            list: (start, end, payload) tuples, end exclusive
+        """
+        matches = []
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for payload in node.get(None, ()):
+                    matches.append((start, end + 1, payload))
+        return matches
+
+
+@dataclass
+class Answer:
+    """
+    A rendered chatbot reply.
+
+    Attributes:
+        text: Markdown message
+        warning: Render the text as a warning instead of markdown
+        table: Optional frame to show below the text
+        chart: Optional frame (index on x) to draw as a line chart
+    """
+    text: str
+    warning: bool = False
+    table: pd.DataFrame = None
+    chart: pd.DataFrame = None
+
+
+@dataclass
+class Intent:
+    """
+    A question type the router can answer.
+
+    Attributes:
+        name: Identifier used in the dispatch table
+        triggers: Phrases that signal the intent
+        requires: Entity kinds that must be present for the intent to apply
+        priority: Rank among matched intents before trigger length; generic
+            intents get a negative priority so specific ones win
+    """
+    name: str
+    triggers: list
+    requires: list = field(default_factory=list)
+    priority: int = 0
+
+
+INTENTS = [
+    Intent("list_towns", ["town", "towns", "which towns", "what towns", "list towns", "how many towns",
+                          "number of towns"]),
+    Intent("list_flat_types", ["flat type", "flat types", "types of flat", "types of flats", "kinds of flats"]),
+    Intent("average_price", ["average price", "average resale price", "average price in", "average price of",
+                             "average resale price of", "mean price", "avg price"]),
+    Intent("highest_price", ["highest price", "highest priced", "most expensive", "max price"]),
+    Intent("lowest_price", ["lowest price", "lowest priced", "cheapest", "min price"]),
+    Intent("count_flats", ["how many flats", "how many", "number of flats", "number of transactions"]),
+    Intent("most_common_flat_type", ["most common flat type", "most common flat type in", "most popular flat type"]),
+    # Generic phrasing ("flats in", "show me") also appears in trend and price questions, so this is the fallback
+    Intent("sample_flats", ["resale flats in", "flats in", "show me", "examples of"], requires=["town"], priority=-1),
+    Intent("cheapest_town", ["cheapest resale flats", "cheapest town", "cheapest towns", "cheapest area"]),
+    Intent("most_expensive_town", ["most expensive resale flats", "most expensive town", "most expensive area",
+                                   "priciest town"]),
+    Intent("price_trend", ["price trend", "trend", "changed over time", "over time", "over the years"]),
+    Intent("highest_year", ["which year had highest", "which year had the highest", "most expensive year"]),
+    Intent("town_with_most", ["which town has the most", "which town has most", "which town had the most"]),
+]
+
+MISSING_ENTITY_MESSAGES = {
+    "town": "❓ I couldn't find that town in the dataset.",
+    "flat_type": "❓ I couldn't find that flat type in the dataset.",
+    "year": "❓ I couldn't find that year in the dataset.",
+}
+# Words after "in" that do not name a place, e.g. "in the year 2019", "in singapore"
+NOT_A_TOWN = {"the", "a", "an", "all", "each", "every", "total", "general", "year", "years", "singapore", "sg",
+              "town", "towns", "hdb", "resale", "flats", "flat", "my", "this", "that", "last", "recent", "terms",
+              "dataset", "data"}
+FALLBACK_MESSAGE = "🤖 I didn’t understand that. Try asking about towns, flat types, prices, or years."
+
+
+class SummaryTable:
+    """
+    Price statistics for every (town, flat_type, year) combination, with
+    None standing for "all", precomputed from the aggregate cube.
+    """
+
+    def __init__(self, cube: AggregateCube) -> None:
+        base = cube.rollup(ENTITY_KINDS).reset_index()
+        self.towns = sorted(base["town"].unique())
+        self.flat_types = sorted(base["flat_type"].unique())
+        self.years = sorted(int(year) for year in base["year"].unique())
+        self._stats = {}
+        for size in range(len(ENTITY_KINDS) + 1):
+            for keys in combinations(ENTITY_KINDS, size):
+                if keys:
+                    grouped = base.groupby(list(keys), observed=True).agg(
+                        count=("count", "sum"), sum=("sum", "sum"), min=("min", "min"), max=("max", "max"))
+                    rows = grouped.itertuples()
+                else:
+                    rows = [(None, base["count"].sum(), base["sum"].sum(), base["min"].min(), base["max"].max())]
+                for row in rows:
+                    values = row[0] if isinstance(row[0], tuple) else (row[0],)
+                    key = dict(zip(keys, values))
+                    if "year" in key:
+                        key["year"] = int(key["year"])
+                    count, total, low, high = row[1:]
+                    self._stats[tuple(key.get(kind) for kind in ENTITY_KINDS)] = {
+                        "count": int(count), "mean": total / count, "min": low, "max": high}
+
+    def get(self, town: str = None, flat_type: str = None, year: int = None) -> dict:
+        """
+        Statistics for one combination.
+
+        Returns:
+            dict: count, mean, min and max; None if there were no transactions
+        """
+        return self._stats.get((town, flat_type, year))
+
+
+def describe_scope(entities: dict) -> str:
+    """Markdown suffix naming the filters, e.g. " of **4 ROOM** flats in **BEDOK**"."""
+    scope = ""
+    if entities.get("flat_type"):
+        scope += f" of **{entities['flat_type']}** flats"
+    if entities.get("town"):
+        scope += f" in **{entities['town']}**"
+    if entities.get("year"):
+        scope += f" in **{entities['year']}**"
+    return scope
+
+
+class IntentRouter:
+    """
+    Tokenize, extract entities, pick an intent and answer it.
+
+    Questions that match no trigger phrase fall back to the optional
+    semantic matcher (hdb_semantic.SemanticMatcher); entities are still taken
+    from the trie scan. With a forecast (hdb_forecast.TrendForecast) the
+    price trend answer also shows the projected trend.
+
+    Example:
+        router = IntentRouter(cube, index)
+        answer = router.answer("average price of 4 room in bedok")
+    """
+
+    def __init__(self, cube: AggregateCube, index: FilterIndex, semantic=None, forecast=None) -> None:
+        self.summary = SummaryTable(cube)
+        self.index = index
+        self.semantic = semantic
+        self.forecast = forecast
+        self.trie = PhraseTrie()
+        for intent in INTENTS:
+            for trigger in intent.triggers:
+                self.trie.add(trigger, ("intent", intent))
+        for town in self.summary.towns:
+            self.trie.add(town, ("town", town))
+            if "/" in town:  # "KALLANG/WHAMPOA" is also asked about as "kallang" or "whampoa"
+                for part in town.split("/"):
+                    self.trie.add(part, ("town", town))
+        for flat_type in self.summary.flat_types:
+            self.trie.add(flat_type, ("flat_type", flat_type))
+            if flat_type.endswith("ROOM"):
+                self.trie.add(flat_type + "S", ("flat_type", flat_type))
+        for year in self.summary.years:
+            self.trie.add(str(year), ("year", year))
+        self._handlers = {intent.name: getattr(self, f"_answer_{intent.name}") for intent in INTENTS}
+
+    def route(self, question: str) -> tuple:
+        """
+        Choose the intent for a question.
+
+        Intents whose required entities are present win over those missing
+        them, then the higher priority, then the longest trigger phrase;
+        remaining ties go to the intent with more required entities, then to
+        INTENTS order. A place after "in" that is not a known town, or a year
+        that is not in the data, is reported as missing rather than answered
+        for all towns or all years.
+
+        Args:
+            question: Raw user question
+
+        Returns:
+            tuple: (Intent or None, entities dict, missing entity kind or None)
+        """
+        tokens = tokenize(question)
+        entities = {}
+        entity_spans = {}
+        best = {}
+        starts = set()
+        for start, end, (kind, value) in self.trie.scan(tokens):
+            starts.add(start)
+            if kind == "intent":
+                best[value.name] = max(best.get(value.name, 0), end - start)
+            elif end - start > entity_spans.get(kind, 0):
+                # Longest mention wins, e.g. "kallang whampoa" over "kallang"
+                entities[kind] = value
+                entity_spans[kind] = end - start
+
+        ranked = sorted(
+            (intent for intent in INTENTS if intent.name in best),
+            key=lambda intent: (-all(kind in entities for kind in intent.requires), -intent.priority,
+                                -best[intent.name], -len(intent.requires)),
+        )
+        if ranked:
+            intent = ranked[0]
+        elif self.semantic is not None:
+            name, _ = self.semantic.match(question)
+            intent = next((intent for intent in INTENTS if intent.name == name), None)
+        else:
+            intent = None
+        if intent is None:
+            return None, entities, None
+        missing = next((kind for kind in intent.requires if kind not in entities), None)
+        if missing is None and "town" not in entities and self._unknown_place(tokens, starts):
+            missing = "town"
+        if missing is None and "year" not in entities and self._unknown_year(tokens, starts):
+            missing = "year"
+        return intent, entities, missing
+
+    @staticmethod
+    def _unknown_place(tokens: list, starts: set) -> bool:
+        """Whether a word after "in" names something that is not a recognised entity or phrase."""
+        for position, token in enumerate(tokens):
+            if token != "in":
+                continue
+            following = position + 1
+            while following < len(tokens) and tokens[following] in NOT_A_TOWN and following not in starts:
+                following += 1
+            if following < len(tokens) and tokens[following].isalpha() and following not in starts:
+                return True
+        return False
+
+    @staticmethod
+    def _unknown_year(tokens: list, starts: set) -> bool:
+        """Whether the question names a four-digit year that is not in the data, e.g. "in 1995"."""
+        return any(len(token) == 4 and token.isdigit() and position not in starts
+                   for position, token in enumerate(tokens))
+
+    def answer(self, question: str) -> Answer:
+        """
+        Answer a question.
+
+        Args:
+            question: Raw user question
+
+        Returns:
+            Answer: Text plus an optional table or chart
+        """
+        intent, entities, missing = self.route(question)
+        if intent is None:
+            return Answer(FALLBACK_MESSAGE, warning=True)
+        if missing:
+            return Answer(MISSING_ENTITY_MESSAGES[missing], warning=True)
+        return self._handlers[intent.name](entities)
+
+    def _stats(self, entities: dict) -> dict:
+        return self.summary.get(entities.get("town"), entities.get("flat_type"), entities.get("year"))
+
+    def _no_data(self, entities: dict) -> Answer:
+        return Answer(f"❓ There are no resale transactions{describe_scope(entities)} in the dataset.", warning=True)
+
+    def _answer_list_towns(self, entities: dict) -> Answer:
+        return Answer("📍 The dataset includes resale flats in these towns:\n- " + "\n- ".join(self.summary.towns))
+
+    def _answer_list_flat_types(self, entities: dict) -> Answer:
+        return Answer("🏢 Available flat types in the dataset:\n- " + "\n- ".join(self.summary.flat_types))
+
+    def _answer_average_price(self, entities: dict) -> Answer:
+        stats = self._stats(entities)
+        if stats is None:
+            return self._no_data(entities)
+        return Answer(f"💰 The average resale price{describe_scope(entities)} is **${stats['mean']:,.0f}**.")
+
+    def _answer_highest_price(self, entities: dict) -> Answer:
+        stats = self._stats(entities)
+        if stats is None:
+            return self._no_data(entities)
+        return Answer(f"🏆 The highest resale price{describe_scope(entities)} is **${stats['max']:,.0f}**.")
+
+    def _answer_lowest_price(self, entities: dict) -> Answer:
+        stats = self._stats(entities)
+        if stats is None:
+            return self._no_data(entities)
+        return Answer(f"📉 The lowest resale price{describe_scope(entities)} is **${stats['min']:,.0f}**.")
+
+    def _answer_count_flats(self, entities: dict) -> Answer:
+        stats = self._stats(entities)
+        count = stats["count"] if stats else 0
+        return Answer(f"🏘️ The dataset contains **{count:,}** resale flat records{describe_scope(entities)}.")
+
+    def _answer_most_common_flat_type(self, entities: dict) -> Answer:
+        counts = {flat_type: self.summary.get(entities.get("town"), flat_type, entities.get("year"))
+                  for flat_type in self.summary.flat_types}
+        counts = {flat_type: stats["count"] for flat_type, stats in counts.items() if stats}
+        if not counts:
+            return self._no_data(entities)
+        common = max(counts, key=counts.get)
+        return Answer(f"🔢 The most common flat type{describe_scope(entities)} is **{common}**.")
+
+    def _answer_sample_flats(self, entities: dict) -> Answer:
+        rows = self.index.query(town=entities["town"], flat_type=entities.get("flat_type"))[:10]
+        if entities.get("flat_type"):
+            text = f"📄 Sample **{entities['flat_type']}** flats in **{entities['town']}**:"
+        else:
+            text = f"📄 Sample resale flats in **{entities['town']}**:"
+        return Answer(text, table=self.index.frame(rows))
+
+    def _town_means(self, entities: dict) -> dict:
+        means = {town: self.summary.get(town, entities.get("flat_type"), entities.get("year"))
+                 for town in self.summary.towns}
+        return {town: stats["mean"] for town, stats in means.items() if stats}
+
+    def _answer_cheapest_town(self, entities: dict) -> Answer:
+        means = self._town_means(entities)
+        if not means:
+            return self._no_data(entities)
+        town = min(means, key=means.get)
+        return Answer(f"📉 The town with the cheapest average resale flats{describe_scope(dict(entities, town=None))} "
+                      f"is **{town}** with an average of **${means[town]:,.0f}**.")
+
+    def _answer_most_expensive_town(self, entities: dict) -> Answer:
+        means = self._town_means(entities)
+        if not means:
+            return self._no_data(entities)
+        town = max(means, key=means.get)
+        return Answer(f"💰 The most expensive town on average{describe_scope(dict(entities, town=None))} "
+                      f"is **{town}** with an average of **${means[town]:,.0f}**.")
+
+    def _year_means(self, entities: dict) -> pd.Series:
+        means = {year: self.summary.get(entities.get("town"), entities.get("flat_type"), year)
+                 for year in self.summary.years}
+        return pd.Series({year: stats["mean"] for year, stats in means.items() if stats}, name="resale_price")
+
+    def _answer_price_trend(self, entities: dict) -> Answer:
+        trend = self._year_means(dict(entities, year=None))
+        if trend.empty:
+            return self._no_data(entities)
+        scope = describe_scope(dict(entities, year=None))
+        text, chart = f"📈 Average resale price by year{scope}:", trend.to_frame()
+        town, flat_type = entities.get("town"), entities.get("flat_type")
+        forecast = self.forecast.series(town, flat_type) if self.forecast is not None else None
+        if forecast is not None:
+            last = forecast.iloc[-1]
+            # Escaped dollars: two unescaped $ in one message render as inline math
+            text += (f"\n\nIf the recent trend ({self.forecast.growth(town, flat_type):+.1%} a year) continues, "
+                     f"the average reaches about **\\${last['estimate']:,.0f}** by {forecast.index[-1]:%b %Y} "
+                     f"(80% band \\${last['lower']:,.0f} – \\${last['upper']:,.0f}).")
+            yearly = forecast.groupby(forecast.index.year).mean().rename(columns={"estimate": "forecast"})
+            chart = chart.join(yearly, how="outer")
+            latest = trend.index.max()  # Start the forecast lines at the last observed year
+            chart.loc[latest, yearly.columns] = chart.loc[latest, yearly.columns].fillna(trend[latest])
+        return Answer(text, chart=chart)
+
+    def _answer_highest_year(self, entities: dict) -> Answer:
+        trend = self._year_means(dict(entities, year=None))
+        if trend.empty:
+            return self._no_data(entities)
+        year = trend.idxmax()
+        return Answer(f"📈 The year with the highest average resale price{describe_scope(dict(entities, year=None))} "
+                      f"was **{year}**, with an average of **${trend[year]:,.0f}**.")
+
+    def _answer_town_with_most(self, entities: dict) -> Answer:
+        counts = {town: self.summary.get(town, entities.get("flat_type"), entities.get("year"))
+                  for town in self.summary.towns}
+        counts = {town: stats["count"] for town, stats in counts.items() if stats}
+        if not counts:
+            return self._no_data(entities)
+        town = max(counts, key=counts.get)
+        what = f"**{entities['flat_type']}** flats" if entities.get("flat_type") else "resale transactions"
+        year = f" in **{entities['year']}**" if entities.get("year") else ""
+        return Answer(f"📊 The town with the most {what}{year} is **{town}**.")
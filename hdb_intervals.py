@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prediction intervals from model residuals.
+
+At training time the relative residual (actual / estimate - 1) of every
+transaction is counted into a fixed-bucket histogram for its sale month and
+segment: town x flat type x remaining-lease bucket. Histograms are additive,
+so each monthly refresh only adds the residuals of the new months (scored by
+the model as it stood before seeing them) to those kept in the training
+state. The model has no time feature and prices drift, so residuals from
+years ago describe a different price level; only the most recent
+RESIDUAL_WINDOW_MONTHS months are kept and used.
+
+From the histograms an interval table is computed once per model and saved
+in the model artifact. Segments with too few transactions fall back to a
+coarser segment (town x flat type, then flat type, then everything). Serving
+an interval is a table lookup, vectorized over any number of listings.
+"""
+import numpy as np
+import pandas as pd
+
+RESIDUAL_EDGES = np.linspace(-0.6, 0.6, 241)  # Relative residual buckets, 0.5% wide
+RESIDUAL_BUCKETS = len(RESIDUAL_EDGES) + 1  # Includes the under- and overflow buckets
+LEASE_BUCKET_EDGES = [60, 70, 80, 90]  # Remaining-lease years; five buckets
+INTERVAL_COVERAGE = 0.8  # Central interval between the 10th and 90th residual percentiles
+MIN_SEGMENT_ROWS = 30  # Fewer residuals than this and the next coarser segment is used
+RESIDUAL_WINDOW_MONTHS = 12  # Intervals come from the residuals of this many most recent months
+
+SEGMENT = ["town", "flat_type", "lease_bucket"]
+SEGMENT_LEVELS = [SEGMENT, ["town", "flat_type"], ["flat_type"], []]
+
+
+def segment_frame(features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Segment columns for feature rows.
+
+    Args:
+        features: Frame with town, flat_type and remaining_lease
+
+    Returns:
+        pd.DataFrame: town, flat_type and lease_bucket aligned with features
+    """
+    return pd.DataFrame({
+        "town": features["town"].astype(str).to_numpy(),
+        "flat_type": features["flat_type"].astype(str).to_numpy(),
+        "lease_bucket": np.searchsorted(LEASE_BUCKET_EDGES,
+                                        features["remaining_lease"].to_numpy(dtype="float64"), side="right"),
+    }, index=features.index)
+
+
+def histogram_quantiles(hist: np.ndarray, q: float) -> np.ndarray:
+    """
+    Quantile of each histogram row, interpolated linearly inside the bucket.
+
+    Args:
+        hist: Counts of shape (rows, RESIDUAL_BUCKETS)
+        q: Quantile in [0, 1]
+
+    Returns:
+        np.ndarray: Relative residual per row; NaN for empty rows
+    """
+    # Bucket b spans [lower[b], upper[b]); the open-ended buckets are clamped to the edge range
+    lower = np.concatenate(([RESIDUAL_EDGES[0]], RESIDUAL_EDGES))
+    upper = np.concatenate((RESIDUAL_EDGES, [RESIDUAL_EDGES[-1]]))
+    cumulative = hist.cumsum(axis=1)
+    totals = cumulative[:, -1]
+    target = q * totals
+    bucket = (cumulative < target[:, None]).sum(axis=1).clip(max=RESIDUAL_BUCKETS - 1)
+    rows = np.arange(len(hist))
+    before = np.where(bucket > 0, cumulative[rows, np.maximum(bucket - 1, 0)], 0)
+    inside = hist[rows, bucket]
+    fraction = np.divide(target - before, inside, out=np.zeros(len(hist)), where=inside > 0)
+    value = lower[bucket] + (upper[bucket] - lower[bucket]) * fraction
+    return np.where(totals > 0, value, np.nan)
+
+
+class ResidualHistograms:
+    """
+    Mergeable per-month, per-segment residual histograms kept in the training state.
+
+    Attributes:
+        counts: Sale month ("YYYY-MM") -> segment tuple (town, flat_type,
+            lease_bucket) -> bucket counts
+        window: Number of most recent months kept; older months are dropped
+    """
+
+    def __init__(self, window: int = RESIDUAL_WINDOW_MONTHS) -> None:
+        self.counts = {}
+        self.window = window
+
+    @property
+    def rows(self) -> int:
+        """Number of residuals counted in the kept months."""
+        return int(sum(counts.sum() for segments in self.counts.values() for counts in segments.values()))
+
+    def add(self, features: pd.DataFrame, actual: np.ndarray, predicted: np.ndarray, months) -> None:
+        """
+        Count the residuals of a batch of scored transactions.
+
+        Args:
+            features: FEATURES columns of the transactions
+            actual: Observed resale prices
+            predicted: Model estimates for the same rows
+            months: Sale month of each row (datetimes)
+        """
+        if len(features) == 0:
+            return
+        residual = np.asarray(actual, dtype="float64") / np.asarray(predicted, dtype="float64") - 1
+        segments = segment_frame(features)
+        segments.insert(0, "month", pd.DatetimeIndex(months).strftime("%Y-%m"))
+        grouped = segments.groupby(["month"] + SEGMENT, sort=True)
+        segment_ids = grouped.ngroup().to_numpy()
+        table = np.zeros((grouped.ngroups, RESIDUAL_BUCKETS), dtype="int64")
+        np.add.at(table, (segment_ids, np.searchsorted(RESIDUAL_EDGES, residual, side="right")), 1)
+        for key, counts in zip(grouped.size().index, table):
+            month, key = key[0], (key[1], key[2], int(key[3]))
+            month_counts = self.counts.setdefault(month, {})
+            month_counts[key] = month_counts[key] + counts if key in month_counts else counts
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop every month older than the window."""
+        for month in sorted(self.counts)[:-self.window]:
+            del self.counts[month]
+
+    def merge(self, other: "ResidualHistograms") -> "ResidualHistograms":
+        """Combine with histograms over a disjoint set of residuals."""
+        merged = ResidualHistograms(self.window)
+        for source in (self, other):
+            for month, segments in source.counts.items():
+                month_counts = merged.counts.setdefault(month, {})
+                for key, counts in segments.items():
+                    month_counts[key] = month_counts[key] + counts if key in month_counts else counts.copy()
+        merged._trim()
+        return merged
+
+    def intervals(self, coverage: float = INTERVAL_COVERAGE, min_rows: int = MIN_SEGMENT_ROWS) -> "SegmentIntervals":
+        """
+        Interval table for every segment level, from the residuals of the kept months.
+
+        Args:
+            coverage: Central probability mass of the interval
+            min_rows: Minimum residuals for a segment to get its own interval
+
+        Returns:
+            SegmentIntervals: Lookup tables of relative lower/upper bounds
+        """
+        pooled = {}
+        for segments in self.counts.values():
+            for key, counts in segments.items():
+                pooled[key] = pooled[key] + counts if key in pooled else counts
+        keys = pd.DataFrame(list(pooled.keys()), columns=SEGMENT)
+        hist = np.array(list(pooled.values()), dtype="int64").reshape(len(keys), RESIDUAL_BUCKETS)
+        tail = (1 - coverage) / 2
+        tables = []
+        for level in SEGMENT_LEVELS:
+            if level:
+                grouped = keys.groupby(level, sort=True)
+                level_hist = np.zeros((grouped.ngroups, RESIDUAL_BUCKETS), dtype="int64")
+                np.add.at(level_hist, grouped.ngroup().to_numpy(), hist)
+                index = grouped.size().index
+            else:
+                level_hist = hist.sum(axis=0, keepdims=True)
+                index = pd.RangeIndex(1)
+            table = pd.DataFrame({
+                "rows": level_hist.sum(axis=1),
+                "lower": 1 + histogram_quantiles(level_hist, tail),
+                "upper": 1 + histogram_quantiles(level_hist, 1 - tail),
+            }, index=index)
+            # The overall level is always kept so every lookup resolves
+            tables.append(table if not level else table[table["rows"] >= min_rows])
+        return SegmentIntervals(tables, coverage)
+
+
+class SegmentIntervals:
+    """
+    Precomputed relative interval bounds per segment level, finest first.
+
+    Attributes:
+        tables: One frame per SEGMENT_LEVELS entry with rows, lower and upper
+        coverage: Nominal coverage of the intervals
+    """
+
+    def __init__(self, tables: list, coverage: float) -> None:
+        self.tables = tables
+        self.coverage = coverage
+
+    def lookup(self, features: pd.DataFrame) -> tuple:
+        """
+        Relative bounds for many listings.
+
+        Args:
+            features: Frame with town, flat_type and remaining_lease
+
+        Returns:
+            tuple: (lower, upper) arrays of multipliers for the estimate
+        """
+        segments = segment_frame(features)
+        lower = np.full(len(segments), np.nan)
+        upper = np.full(len(segments), np.nan)
+        for level, table in zip(SEGMENT_LEVELS, self.tables):
+            missing = np.isnan(lower)
+            if not missing.any():
+                break
+            if level:
+                wanted = segments.loc[missing, level]
+                keys = pd.MultiIndex.from_frame(wanted) if len(level) > 1 else pd.Index(wanted[level[0]])
+                found = table.reindex(keys)
+                lower[missing] = found["lower"].to_numpy()
+                upper[missing] = found["upper"].to_numpy()
+            else:
+                lower[missing] = table["lower"].iloc[0]
+                upper[missing] = table["upper"].iloc[0]
+        return lower, upper
+
+    def coverage_of(self, features: pd.DataFrame, actual: np.ndarray, predicted: np.ndarray) -> float:
+        """Share of transactions whose price falls inside their interval."""
+        lower, upper = self.lookup(features)
+        ratio = np.asarray(actual, dtype="float64") / np.asarray(predicted, dtype="float64")
+        return float(np.mean((ratio >= lower) & (ratio <= upper))) if len(ratio) else None
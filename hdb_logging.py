@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured, asynchronous application logging.
+
+Records are formatted as one JSON object per line on the calling thread and
+handed to a queue; a QueueListener thread does the disk writes, so a slow
+disk never adds latency to a rerun. The log file rotates by size (or by time
+when `when` is given) and keeps a fixed number of backups, so the logs/
+directory stays bounded.
+
+Timings are attached as structured fields, e.g.
+
+    timer = StageTimer()  # from hdb_metrics
+    with timer.stage("predict"):
+        ...
+    logger.info("estimate", extra={"event": "estimate", **timer.fields()})
+
+and summarised by log_summary.py.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+LOG_DIR = "logs"
+MAX_BYTES = 5 * 2 ** 20  # Rotate after 5 MiB
+BACKUP_COUNT = 5  # Rotated files kept per log
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_listeners = {}
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a single-line JSON object including its `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def log_path(name: str, log_dir: str = LOG_DIR) -> str:
+    """Current (unrotated) log file of a logger."""
+    return os.path.join(log_dir, f"{name}.log")
+
+
+def setup_logging(name: str, log_dir: str = LOG_DIR, level: int = logging.INFO,
+                  max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT,
+                  when: str = None) -> logging.Logger:
+    """
+    Return a logger that writes JSON lines to logs/<name>.log through a background thread.
+
+    Safe to call on every Streamlit rerun: handlers and the listener thread
+    are only created the first time for each name in a process.
+
+    Args:
+        name: Logger and log file name
+        log_dir: Directory for log files (created if missing)
+        level: Minimum level recorded
+        max_bytes: Size at which the file rotates (ignored when `when` is given)
+        backup_count: Number of rotated files kept
+        when: Optional TimedRotatingFileHandler interval (e.g. "midnight") instead of size rotation
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    logger = logging.getLogger(name)
+    with _lock:
+        if name in _listeners:
+            return logger
+        os.makedirs(log_dir, exist_ok=True)
+        if when:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_path(name, log_dir), when=when, backupCount=backup_count, encoding="utf-8")
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_path(name, log_dir), maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(message)s"))  # Records arrive already formatted
+
+        records = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False  # Keep application records out of Streamlit's console output
+        _listeners[name] = (listener, queue_handler)
+    return logger
+
+
+def shutdown_logging() -> None:
+    """Stop every listener thread, flushing queued records; runs at interpreter exit."""
+    with _lock:
+        for name, (listener, queue_handler) in _listeners.items():
+            logging.getLogger(name).removeHandler(queue_handler)
+            listener.stop()
+        _listeners.clear()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process timing and metrics for the Streamlit apps.
+
+Stages of a rerun are timed with `timed`, usable as a context manager or a
+decorator:
+
+    trace = start_rerun("predictor")
+    with timed("filter"):
+        rows = index.query(...)
+    trace.finish()
+    debug_panel("predictor")
+
+Each timing goes into a process-wide MetricsRegistry (counters and
+histograms, keyed "<app>.<stage>") and into the current rerun's trace; the
+last HISTORY traces per app are kept for the debug panel.
+
+Environment toggles:
+    HDB_DEBUG=1        show the timing panel in the sidebar (or add ?debug=1 to the URL)
+    HDB_PROFILE=<n>    capture the n-th rerun of each app with cProfile to HDB_PROFILE_DIR
+    HDB_PROFILE_DIR    where profiles are written (default: profiles/)
+"""
+import contextvars
+import cProfile
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime
+
+import numpy as np
+
+HISTORY = 20  # Rerun traces kept per app for the debug panel
+WINDOW = 1024  # Recent observations kept per histogram for percentiles
+PROFILE_DIR = "profiles"
+
+_current = contextvars.ContextVar("hdb_rerun_trace", default=None)  # Streamlit runs each rerun on a fresh thread
+
+
+class Histogram:
+    """
+    Running count/sum/min/max of a series plus a window of recent values for percentiles.
+    """
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> dict:
+        """Count, mean, min, max and p50/p95/p99 over the recent window."""
+        if not self.count:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(np.fromiter(self.recent, dtype="float64"), [50, 95, 99])
+        return {
+            "count": self.count, "mean": self.total / self.count, "min": self.min, "max": self.max,
+            "p50": float(p50), "p95": float(p95), "p99": float(p99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, histograms and recent rerun traces for one process.
+
+    Attributes:
+        counters: Name -> count
+        histograms: Name -> Histogram (timings in milliseconds)
+        traces: App -> deque of the most recent finished RerunTrace
+    """
+
+    def __init__(self, history: int = HISTORY) -> None:
+        self.counters = defaultdict(int)
+        self.histograms = defaultdict(Histogram)
+        self.traces = defaultdict(lambda: deque(maxlen=history))
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> int:
+        """Add to a counter and return its new value."""
+        with self._lock:
+            self.counters[name] += amount
+            return self.counters[name]
+
+    def observe(self, name: str, value: float) -> None:
+        """Add an observation to a histogram."""
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def record_trace(self, trace: "RerunTrace") -> None:
+        """Keep a finished rerun trace."""
+        with self._lock:
+            self.traces[trace.app].append(trace)
+
+    def recent_traces(self, app: str) -> list:
+        """Finished traces of an app, oldest first."""
+        with self._lock:
+            return list(self.traces[app])
+
+    def snapshot(self, prefix: str = "") -> dict:
+        """
+        Current counters and histogram summaries.
+
+        Args:
+            prefix: Only include metrics whose name starts with this (e.g. "predictor.")
+
+        Returns:
+            dict: {"counters": {...}, "histograms": {name: summary}}
+        """
+        with self._lock:
+            return {
+                "counters": {name: value for name, value in self.counters.items() if name.startswith(prefix)},
+                "histograms": {name: hist.summary() for name, hist in self.histograms.items()
+                               if name.startswith(prefix)},
+            }
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_stage(name: str, elapsed_ms: float) -> None:
+    """Record a stage timing in the registry and in the current rerun's trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.timings_ms[name] = trace.timings_ms.get(name, 0.0) + elapsed_ms
+        name = f"{trace.app}.{name}"
+    REGISTRY.observe(name, elapsed_ms)
+
+
+class timed(ContextDecorator):
+    """
+    Time a block or function as a named stage.
+
+    Attributes:
+        name: Stage name; prefixed with the app name when inside a rerun trace
+        elapsed_ms: Duration of the last completed block
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.elapsed_ms = None
+
+    def _recreate_cm(self) -> "timed":
+        return type(self)(self.name)  # A fresh timer per decorated call, so concurrent calls do not share state
+
+    def __enter__(self) -> "timed":
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.elapsed_ms = (time.perf_counter() - self._began) * 1000
+        record_stage(self.name, self.elapsed_ms)
+        return False
+
+
+class StageTimer:
+    """
+    Per-request stage timings for a structured log record.
+
+    Stages are also recorded through `timed`, so they show up in the
+    registry and the current rerun's trace.
+
+    Attributes:
+        timings_ms: Stage name -> elapsed milliseconds, in the order stages ran
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.timings_ms = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as `name`; repeated stages accumulate."""
+        timer = timed(name)
+        try:
+            with timer:
+                yield
+        finally:
+            self.timings_ms[name] = self.timings_ms.get(name, 0.0) + timer.elapsed_ms
+
+    def fields(self) -> dict:
+        """Log fields for the timings: timings_ms per stage and total_ms since the timer started."""
+        return {
+            "timings_ms": {name: round(value, 3) for name, value in self.timings_ms.items()},
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        }
+
+
+class RerunTrace:
+    """
+    Stage timings of one script run of an app.
+
+    Attributes:
+        app: App name used as the metric prefix
+        number: Rerun number of the app in this process, starting at 1
+        started_at: Wall-clock start time
+        timings_ms: Stage name -> elapsed milliseconds
+        total_ms: Duration of the whole rerun, set by finish()
+        profile_path: cProfile output written for this rerun, if it was captured
+    """
+
+    def __init__(self, app: str, number: int, profile: bool = False) -> None:
+        self.app = app
+        self.number = number
+        self.started_at = datetime.now()
+        self.timings_ms = {}
+        self.total_ms = None
+        self.profile_path = None
+        self._began = time.perf_counter()
+        self._token = _current.set(self)
+        self._profiler = cProfile.Profile() if profile else None
+        if self._profiler:
+            self._profiler.enable()
+
+    def finish(self) -> "RerunTrace":
+        """Close the trace: record the total, keep the trace and write the profile if one was captured."""
+        if self._profiler:
+            self._profiler.disable()
+            profile_dir = os.environ.get("HDB_PROFILE_DIR", PROFILE_DIR)
+            os.makedirs(profile_dir, exist_ok=True)
+            self.profile_path = os.path.join(
+                profile_dir, f"{self.app}-rerun{self.number}-{self.started_at:%Y%m%d_%H%M%S}.prof")
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+            REGISTRY.increment(f"{self.app}.profiles")
+        self.total_ms = (time.perf_counter() - self._began) * 1000
+        REGISTRY.observe(f"{self.app}.rerun", self.total_ms)
+        REGISTRY.record_trace(self)
+        _current.reset(self._token)
+        return self
+
+
+def start_rerun(app: str) -> RerunTrace:
+    """
+    Begin timing a rerun of an app; call finish() on the result at the end of the script.
+
+    The rerun selected by HDB_PROFILE (its number within this process) is
+    also captured with cProfile.
+
+    Args:
+        app: App name used as the metric prefix
+
+    Returns:
+        RerunTrace: The active trace
+    """
+    number = REGISTRY.increment(f"{app}.reruns")
+    profile_at = os.environ.get("HDB_PROFILE", "")
+    return RerunTrace(app, number, profile=profile_at.isdigit() and int(profile_at) == number)
+
+
+def debug_enabled() -> bool:
+    """Whether the debug panel is switched on by HDB_DEBUG or a ?debug=1 query parameter."""
+    import streamlit as st
+
+    return os.environ.get("HDB_DEBUG", "") not in ("", "0") or st.query_params.get("debug") == "1"
+
+
+def debug_panel(app: str, extra: dict = None) -> None:
+    """
+    Sidebar panel with per-stage timings of the app's last reruns, when debugging is enabled.
+
+    Args:
+        app: App name used as the metric prefix
+        extra: Further counters to show, title -> dict, e.g. {"Estimate cache": cache.stats()}
+    """
+    if not debug_enabled():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    traces = REGISTRY.recent_traces(app)
+    with st.sidebar.expander("⏱ Performance", expanded=True):
+        for title, counters in (extra or {}).items():
+            st.caption(title)
+            st.json(counters, expanded=False)
+        if not traces:
+            st.caption("No finished reruns yet.")
+            return
+        recent = pd.DataFrame(
+            [{"rerun": trace.number, **trace.timings_ms, "total": trace.total_ms} for trace in reversed(traces)]
+        ).set_index("rerun").round(1)
+        st.caption(f"Last {len(traces)} reruns (ms), newest first")
+        st.dataframe(recent)
+        stats = REGISTRY.snapshot(prefix=f"{app}.")
+        st.caption("Process-wide stage timings (ms)")
+        st.dataframe(pd.DataFrame(stats["histograms"]).T.round(1))
+        st.json(stats["counters"], expanded=False)
+        profiles = [trace.profile_path for trace in traces if trace.profile_path]
+        if profiles:
+            st.caption(f"Profile written to {profiles[-1]}")
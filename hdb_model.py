@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resale price prediction service.
+
+Wraps the notebooks' scikit-learn pipeline (one-hot encoded categoricals plus
+linear regression), extended to the inputs the apps collect: town, flat type,
+flat model, storey range, floor area and remaining lease. Trained pipelines
+are saved as versioned artifacts under models/ and loaded once per process.
+
+The regression is solved from sufficient statistics (X'X, X'y) kept in
+models/training_state.joblib, so a refresh only has to read the months
+published since the previous run. Residual histograms kept alongside them
+give every artifact a table of per-segment prediction intervals
+(see hdb_intervals).
+"""
+import copy
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from hdb_data import DATASET_PATH, dataset_signature, load_dataset
+from hdb_intervals import ResidualHistograms, SegmentIntervals
+
+MODEL_DIR = "models"
+LATEST_POINTER = "latest.json"
+TRAINING_STATE = "training_state.joblib"
+ARTIFACT_FORMAT = 3  # Artifacts and training state from older formats are rebuilt on load
+
+CATEGORICAL_FEATURES = ["town", "flat_type", "flat_model", "storey_range"]
+NUMERIC_FEATURES = ["floor_area_sqm", "remaining_lease"]
+FEATURES = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+LEASE_YEARS = 99
+
+
+def feature_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Model inputs for a frame of transactions.
+
+    Remaining lease is derived from lease_commence_date and the sale month
+    when the frame does not already carry it in years.
+
+    Args:
+        df: Typed transactions as returned by hdb_data.load_dataset
+
+    Returns:
+        pd.DataFrame: The FEATURES columns
+    """
+    features = pd.DataFrame({col: df[col].astype(str) for col in CATEGORICAL_FEATURES}, index=df.index)
+    features["floor_area_sqm"] = df["floor_area_sqm"].astype("float64")
+    if "month" in df.columns and "lease_commence_date" in df.columns:
+        sale_year = df["month"].dt.year + (df["month"].dt.month - 1) / 12
+        features["remaining_lease"] = LEASE_YEARS - (sale_year - df["lease_commence_date"].astype("float64"))
+    else:
+        features["remaining_lease"] = df["remaining_lease"].astype("float64")
+    return features
+
+
+def build_pipeline(categories: list = None) -> Pipeline:
+    """
+    Untrained pipeline: one-hot encoded categoricals, numeric passthrough and linear regression.
+
+    Args:
+        categories: Optional fixed category list per CATEGORICAL_FEATURES column
+
+    Returns:
+        Pipeline: scikit-learn pipeline accepting FEATURES columns
+    """
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(categories=categories or 'auto', handle_unknown='ignore'), CATEGORICAL_FEATURES),
+            ('num', 'passthrough', NUMERIC_FEATURES)
+        ])
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', LinearRegression())
+    ])
+
+
+class LinearStats:
+    """
+    Sufficient statistics (X'X, X'y) of the linear model.
+
+    The design matrix layout matches build_pipeline's output with a leading
+    intercept column: [1, one-hot blocks in CATEGORICAL_FEATURES order,
+    NUMERIC_FEATURES]. New months are folded in with update() and the
+    coefficients re-solved without revisiting earlier rows. Categories seen
+    for the first time get a new zero row/column.
+    """
+
+    def __init__(self) -> None:
+        self.categories = {col: [] for col in CATEGORICAL_FEATURES}
+        size = 1 + len(NUMERIC_FEATURES)
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.rows = 0
+
+    def _extend(self, features: pd.DataFrame) -> None:
+        """Add design columns for categories not seen before."""
+        offset = 1
+        for col in CATEGORICAL_FEATURES:
+            known = self.categories[col]
+            new = sorted(set(features[col].unique()) - set(known))
+            if new:
+                position = offset + len(known)
+                self.xtx = np.insert(self.xtx, [position] * len(new), 0.0, axis=0)
+                self.xtx = np.insert(self.xtx, [position] * len(new), 0.0, axis=1)
+                self.xty = np.insert(self.xty, [position] * len(new), 0.0)
+                known.extend(new)
+            offset += len(known)
+
+    def _design(self, features: pd.DataFrame) -> np.ndarray:
+        """Dense design matrix for a chunk of feature rows."""
+        design = np.zeros((len(features), len(self.xty)))
+        design[:, 0] = 1.0
+        rows = np.arange(len(features))
+        offset = 1
+        for col in CATEGORICAL_FEATURES:
+            codes = pd.Categorical(features[col], categories=self.categories[col]).codes
+            design[rows[codes >= 0], offset + codes[codes >= 0]] = 1.0
+            offset += len(self.categories[col])
+        design[:, offset:] = features[NUMERIC_FEATURES].to_numpy(dtype="float64")
+        return design
+
+    def update(self, features: pd.DataFrame, target: np.ndarray, chunk_size: int = 100_000) -> None:
+        """
+        Fold a batch of observations into the statistics.
+
+        Args:
+            features: FEATURES columns as returned by feature_frame
+            target: Resale prices aligned with features
+            chunk_size: Rows encoded per dense design block
+        """
+        self._extend(features)
+        target = np.asarray(target, dtype="float64")
+        for start in range(0, len(features), chunk_size):
+            design = self._design(features.iloc[start:start + chunk_size])
+            self.xtx += design.T @ design
+            self.xty += design.T @ target[start:start + chunk_size]
+        self.rows += len(features)
+
+    def coefficients(self) -> np.ndarray:
+        """Minimum-norm least-squares solution (the one-hot blocks are collinear with the intercept)."""
+        return np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+
+    def to_pipeline(self) -> Pipeline:
+        """
+        A fitted pipeline carrying the solved coefficients.
+
+        Returns:
+            Pipeline: Same structure as build_pipeline, ready to predict
+        """
+        pipeline = build_pipeline([list(self.categories[col]) for col in CATEGORICAL_FEATURES])
+        sample = pd.DataFrame({col: [self.categories[col][0]] for col in CATEGORICAL_FEATURES})
+        for col in NUMERIC_FEATURES:
+            sample[col] = 0.0
+        pipeline.named_steps['preprocessor'].fit(sample)
+
+        beta = self.coefficients()
+        regressor = pipeline.named_steps['regressor']
+        regressor.intercept_ = beta[0]
+        regressor.coef_ = beta[1:]
+        regressor.n_features_in_ = len(beta) - 1
+        return pipeline
+
+
+def single_listing(town: str, flat_type: str, flat_model: str,
+                   storey_range: str, floor_area: float, lease: float) -> pd.DataFrame:
+    """One-row FEATURES frame for a single flat."""
+    return pd.DataFrame({
+        "town": [town], "flat_type": [flat_type], "flat_model": [flat_model],
+        "storey_range": [storey_range], "floor_area_sqm": [float(floor_area)], "remaining_lease": [float(lease)],
+    })
+
+
+class PriceModel:
+    """
+    A trained, versioned price pipeline.
+
+    Attributes:
+        pipeline: Fitted scikit-learn pipeline
+        version: Artifact version, changes whenever the model is retrained
+        metadata: Training details (data signature, rows, holdout metrics)
+        intervals: Per-segment relative interval bounds from training residuals
+    """
+
+    def __init__(self, pipeline: Pipeline, version: str, metadata: dict = None,
+                 intervals: SegmentIntervals = None) -> None:
+        self.pipeline = pipeline
+        self.version = version
+        self.metadata = metadata or {}
+        self.intervals = intervals
+
+    def predict_batch(self, listings: pd.DataFrame) -> np.ndarray:
+        """
+        Score many listings in one vectorized call.
+
+        Args:
+            listings: Frame with the FEATURES columns, one row per flat
+
+        Returns:
+            np.ndarray: Estimated resale price per row
+        """
+        return self.pipeline.predict(listings[FEATURES])
+
+    def predict_interval_batch(self, listings: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score many listings with prediction intervals in one vectorized call.
+
+        Args:
+            listings: Frame with the FEATURES columns, one row per flat
+
+        Returns:
+            pd.DataFrame: estimate, lower and upper per row, aligned with listings
+        """
+        estimate = self.predict_batch(listings)
+        lower, upper = self.intervals.lookup(listings)
+        return pd.DataFrame({"estimate": estimate, "lower": estimate * lower, "upper": estimate * upper},
+                            index=listings.index)
+
+    def predict_one(self, town: str, flat_type: str, flat_model: str,
+                    storey_range: str, floor_area: float, lease: float) -> float:
+        """
+        Score a single flat.
+
+        Args:
+            town: HDB town location
+            flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
+            flat_model: Model of flat (e.g., STANDARD, IMPROVED)
+            storey_range: Floor level range
+            floor_area: Floor area in square meters
+            lease: Remaining lease in years
+
+        Returns:
+            float: Estimated resale price
+        """
+        listing = single_listing(town, flat_type, flat_model, storey_range, floor_area, lease)
+        return float(self.predict_batch(listing)[0])
+
+    def predict_interval_one(self, town: str, flat_type: str, flat_model: str,
+                             storey_range: str, floor_area: float, lease: float) -> tuple:
+        """
+        Score a single flat with its prediction interval.
+
+        Args:
+            town: HDB town location
+            flat_type: Type of flat (e.g., 3 ROOM, 4 ROOM)
+            flat_model: Model of flat (e.g., STANDARD, IMPROVED)
+            storey_range: Floor level range
+            floor_area: Floor area in square meters
+            lease: Remaining lease in years
+
+        Returns:
+            tuple: (estimate, lower, upper); the interval covers
+                `intervals.coverage` of past prices in the flat's segment
+        """
+        listing = single_listing(town, flat_type, flat_model, storey_range, floor_area, lease)
+        row = self.predict_interval_batch(listing).iloc[0]
+        return float(row["estimate"]), float(row["lower"]), float(row["upper"])
+
+    def save(self, model_dir: str = MODEL_DIR) -> Path:
+        """
+        Write the artifact and point models/latest.json at it.
+
+        Args:
+            model_dir: Directory holding model artifacts
+
+        Returns:
+            Path: Path of the written artifact
+        """
+        directory = Path(model_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"price_model-{self.version}.joblib"
+        tmp = path.with_suffix(".tmp")
+        joblib.dump({"pipeline": self.pipeline, "version": self.version, "metadata": self.metadata,
+                     "intervals": self.intervals, "format": ARTIFACT_FORMAT}, tmp)
+        os.replace(tmp, path)
+
+        pointer = directory / LATEST_POINTER
+        tmp = pointer.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": self.version, "path": path.name, **self.metadata}, indent=2))
+        os.replace(tmp, pointer)
+        return path
+
+
+def evaluate(pipeline: Pipeline, df: pd.DataFrame, intervals: SegmentIntervals = None,
+             recent_months: int = None) -> dict:
+    """
+    Error metrics of a pipeline on a frame of transactions.
+
+    Args:
+        pipeline: Fitted pipeline
+        df: Typed transactions to score
+        intervals: Interval table to check; adds the share of prices that fall
+            inside their interval as interval_coverage
+        recent_months: Only score the latest this many months of df, e.g. the
+            months held out of training
+
+    Returns:
+        dict: rows, mae, rmse and r2 (and interval_coverage)
+    """
+    if recent_months:
+        months = np.sort(df["month"].unique())
+        df = df[df["month"] >= months[-recent_months]]
+    features = feature_frame(df)
+    actual = df["resale_price"].to_numpy(dtype="float64")
+    predicted = pipeline.predict(features)
+    metrics = score(actual, predicted)
+    if intervals is not None:
+        metrics["interval_coverage"] = intervals.coverage_of(features, actual, predicted)
+    return metrics
+
+
+def score(actual: np.ndarray, predicted: np.ndarray) -> dict:
+    """Error metrics for aligned actual and predicted prices."""
+    return {
+        "rows": int(len(actual)),
+        "mae": float(mean_absolute_error(actual, predicted)),
+        "rmse": float(np.sqrt(np.mean((actual - predicted) ** 2))),
+        "r2": float(r2_score(actual, predicted)) if len(actual) > 1 else None,
+    }
+
+
+def refresh_model(dataset_path: str = DATASET_PATH, model_dir: str = MODEL_DIR, full: bool = False) -> tuple:
+    """
+    Train or incrementally update the price model and write a new artifact.
+
+    Only the last ingested month and the months after it are read from the
+    columnar cache. Before new months are folded in, the current model is
+    scored on them, so every report carries out-of-time metrics. The
+    training state keeps the statistics as they stood before the last
+    month, so that month is folded again from scratch on the next run and
+    rows published late for it are not lost. A full run (or the first run)
+    fits all but the latest month, scores it on the latest month, then adds it.
+
+    Args:
+        dataset_path: Resale CSV
+        model_dir: Directory holding model artifacts, training state and reports
+        full: Ignore any saved state and rebuild from the whole history
+
+    Returns:
+        tuple: (PriceModel, report dict); the model is None if nothing changed since the last run
+    """
+    started = time.perf_counter()
+    state_path = Path(model_dir) / TRAINING_STATE
+    state = None if full or not state_path.exists() else joblib.load(state_path)
+    if state is not None and (state.get("format") != ARTIFACT_FORMAT or "base" not in state):
+        state = None  # Saved before the state kept the statistics preceding the last month
+
+    # Only the columns the model reads; the text columns it does not use are never loaded
+    columns = CATEGORICAL_FEATURES + ["floor_area_sqm", "month", "lease_commence_date", "resale_price"]
+    if state is None:
+        df = load_dataset(dataset_path, columns=columns)
+        stats = LinearStats()
+        residuals = ResidualHistograms()
+        latest = df["month"].max()
+        history, new = df[df["month"] < latest], df[df["month"] == latest]
+        if len(history):
+            features = feature_frame(history)
+            target = history["resale_price"].to_numpy()
+            stats.update(features, target)
+            residuals.add(features, target, stats.to_pipeline().predict(features), history["month"])
+        unseen = np.ones(len(new), dtype=bool)
+        late_rows = 0
+    else:
+        # The last ingested month is read again with the new months and folded from scratch
+        new = load_dataset(dataset_path, columns=columns, since=state["last_month"])
+        stats = state["base"]  # Statistics as they stood before the last ingested month
+        residuals = state["base_residuals"]
+        unseen = (new["month"] > state["last_month"]).to_numpy()
+        late_rows = int((~unseen).sum()) - state["last_month_rows"]
+        if not unseen.any() and late_rows == 0:
+            return None, {"mode": "incremental", "new_rows": 0, "message": "No new months since the last run"}
+
+    # Out-of-time check: the model and intervals as they stood before seeing these months
+    features = feature_frame(new)
+    target = new["resale_price"].to_numpy(dtype="float64")
+    predicted = stats.to_pipeline().predict(features) if stats.rows else None
+    metrics = None
+    if predicted is not None and unseen.any():
+        metrics = score(target[unseen], predicted[unseen])
+        metrics["interval_coverage"] = residuals.intervals().coverage_of(
+            features[unseen], target[unseen], predicted[unseen])
+
+    # Fold every month but the latest, keep a copy as the next run's base, then fold the latest
+    last_month = new["month"].max()
+    latest = (new["month"] == last_month).to_numpy()
+    for part in (~latest, latest):
+        if part is latest:
+            base, base_residuals = copy.deepcopy(stats), copy.deepcopy(residuals)
+        if part.any():
+            if predicted is not None:
+                residuals.add(features[part], target[part], predicted[part], new["month"][part])
+            stats.update(features[part], target[part])
+
+    trained_at = datetime.now()
+    signature = dataset_signature(dataset_path)
+    version = f"{trained_at:%Y%m%d%H%M%S}-{signature[:8]}"
+    new_months = sorted(new.loc[unseen, "month"].dt.strftime("%Y-%m").unique())
+    metadata = {
+        "trained_at": trained_at.isoformat(timespec="seconds"),
+        "data_signature": signature,
+        "rows": int(stats.rows),
+        "last_month": f"{last_month:%Y-%m}",
+        "metrics": metrics,
+    }
+    pipeline = stats.to_pipeline()
+    if not residuals.rows:
+        residuals.add(features, target, pipeline.predict(features), new["month"])  # Only one month of data: in-sample residuals
+    intervals = residuals.intervals()
+    metadata["interval_coverage"] = intervals.coverage
+    model = PriceModel(pipeline, version, metadata, intervals)
+    model.save(model_dir)
+
+    tmp = state_path.with_suffix(".tmp")
+    joblib.dump({"base": base, "base_residuals": base_residuals, "last_month": last_month,
+                 "last_month_rows": int(latest.sum()), "version": version, "format": ARTIFACT_FORMAT}, tmp)
+    os.replace(tmp, state_path)
+
+    report = {
+        "version": version,
+        "mode": "incremental" if state is not None else "full",
+        "new_months": new_months,
+        "new_rows": int(unseen.sum()),
+        "late_rows": late_rows,
+        "total_rows": int(stats.rows),
+        "holdout": metrics,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    report_dir = Path(model_dir) / "reports"
+    report_dir.mkdir(parents=True, exist_ok=True)
+    (report_dir / f"price_model-{version}.json").write_text(json.dumps(report, indent=2))
+    return model, report
+
+
+def load_model(model_dir: str = MODEL_DIR, dataset_path: str = DATASET_PATH) -> PriceModel:
+    """
+    Load the latest model artifact, training one if none exists.
+
+    A pointer to an artifact that has been deleted is an error rather than
+    a reason to retrain, so a broken deploy is not hidden behind a slow start.
+
+    Args:
+        model_dir: Directory holding model artifacts
+        dataset_path: CSV used when a model has to be trained
+
+    Returns:
+        PriceModel: The current model
+    """
+    pointer = Path(model_dir) / LATEST_POINTER
+    if pointer.exists():
+        path = Path(model_dir) / json.loads(pointer.read_text())["path"]
+        if not path.exists():
+            raise FileNotFoundError(f"{pointer} points to the model artifact {path}, which does not exist; "
+                                    f"restore it or retrain with `python train_model.py --full`")
+        artifact = joblib.load(path)
+        if artifact.get("format") == ARTIFACT_FORMAT:
+            return PriceModel(artifact["pipeline"], artifact["version"], artifact["metadata"], artifact["intervals"])
+
+    model, _ = refresh_model(dataset_path, model_dir, full=True)
+    return model
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indexed multi-attribute filtering over the resale transactions.
+
+Categorical columns get inverted indexes (category code -> sorted row ids)
+and numeric columns get a sorted value index. A query starts from the most
+selective predicate and only checks the remaining predicates against the
+rows that survived, so a typical sidebar filter touches the matching rows
+rather than the whole frame.
+"""
+import numpy as np
+import pandas as pd
+
+from hdb_data import CATEGORICAL_COLUMNS, RowStore
+
+RANGE_COLUMNS = ["floor_area_sqm"]
+INDEX_COLUMNS = CATEGORICAL_COLUMNS + RANGE_COLUMNS  # Projection a FilterIndex needs when rows come from a RowStore
+
+
+class FilterIndex:
+    """
+    Query API over a typed transaction frame.
+
+    Criteria are keyword arguments: a categorical column takes a value or a
+    list of values, a range column takes an inclusive (low, high) tuple where
+    either end may be None. None as a criterion means "any".
+
+    Example:
+        rows = index.query(flat_type="4 ROOM", street_name="ANG MO KIO AVE 3",
+                           floor_area_sqm=(60, 120))
+        flats = index.frame(rows)
+
+    The frame only needs the indexed columns. When a RowStore is given,
+    frame() reads full rows from it on demand instead of from memory.
+    """
+
+    def __init__(self, df: pd.DataFrame, categorical: list = None, ranges: list = None,
+                 store: RowStore = None) -> None:
+        self.df = df
+        self.store = store
+        self.size = len(df)
+        self.codes = {}
+        self.categories = {}
+        self._code_of = {}
+        self._order = {}
+        self._offsets = {}
+        for col in categorical or [c for c in CATEGORICAL_COLUMNS if c in df.columns]:
+            codes = df[col].cat.codes.to_numpy()
+            self.codes[col] = codes
+            self.categories[col] = df[col].cat.categories
+            self._code_of[col] = {value: code for code, value in enumerate(self.categories[col])}
+            # Stable sort keeps row ids ascending inside each posting list
+            self._order[col] = np.argsort(codes, kind="stable").astype("int32")
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.categories[col]))
+            self._offsets[col] = np.concatenate(([0], np.cumsum(counts))) + np.count_nonzero(codes < 0)
+
+        self.values = {}
+        self._sorted_values = {}
+        self._sorted_rows = {}
+        for col in ranges or [c for c in RANGE_COLUMNS if c in df.columns]:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable").astype("int32")
+            self.values[col] = values
+            self._sorted_rows[col] = order
+            self._sorted_values[col] = values[order]
+
+    def _codes_for(self, col: str, value) -> np.ndarray:
+        """Category codes for one value or a list of values; unknown values are dropped."""
+        code_of = self._code_of[col]
+        if not isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+            code = code_of.get(value)
+            return np.array([] if code is None else [code], dtype="int64")
+        return np.unique([code_of[v] for v in value if v in code_of]).astype("int64")
+
+    def postings(self, col: str, value) -> np.ndarray:
+        """
+        Sorted row ids whose categorical column matches the value(s).
+
+        Args:
+            col: Indexed categorical column
+            value: Value or list of values
+
+        Returns:
+            np.ndarray: Ascending int32 row positions
+        """
+        return self._postings_for_codes(col, self._codes_for(col, value))
+
+    def _postings_for_codes(self, col: str, codes: np.ndarray) -> np.ndarray:
+        offsets, order = self._offsets[col], self._order[col]
+        parts = [order[offsets[code]:offsets[code + 1]] for code in codes]
+        if not parts:
+            return np.empty(0, dtype="int32")
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def _range_bounds(self, col: str, bounds: tuple) -> tuple:
+        """Slice of the sorted value index covering an inclusive (low, high) range."""
+        low, high = bounds
+        sorted_values = self._sorted_values[col]
+        # Cast bounds to the index dtype, otherwise numpy upcasts the whole array on every search
+        cast = sorted_values.dtype.type
+        start = 0 if low is None else np.searchsorted(sorted_values, cast(low), side="left")
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, cast(high), side="right")
+        return start, max(start, stop)
+
+    def query(self, **criteria) -> np.ndarray:
+        """
+        Row positions matching every criterion.
+
+        Args:
+            **criteria: Column constraints as described on the class
+
+        Returns:
+            np.ndarray: Ascending int32 row positions
+        """
+        plans = []
+        for col, value in criteria.items():
+            if value is None:
+                continue
+            if col in self._sorted_values:
+                start, stop = self._range_bounds(col, value)
+                plans.append((stop - start, col, (start, stop)))
+            elif col in self._offsets:
+                codes = self._codes_for(col, value)
+                offsets = self._offsets[col]
+                plans.append((int((offsets[codes + 1] - offsets[codes]).sum()), col, codes))
+            else:
+                raise KeyError(f"Column {col!r} is not indexed")
+
+        if not plans:
+            return np.arange(self.size, dtype="int32")
+
+        # Smallest candidate set first; later predicates only inspect surviving rows
+        plans.sort(key=lambda plan: plan[0])
+        size, col, spec = plans[0]
+        if size == 0:
+            return np.empty(0, dtype="int32")
+        if col in self._sorted_values:
+            rows = np.sort(self._sorted_rows[col][spec[0]:spec[1]])
+        else:
+            rows = self._postings_for_codes(col, spec)
+
+        for _, col, _ in plans[1:]:
+            if rows.size == 0:
+                break
+            value = criteria[col]
+            if col in self.values:
+                low, high = value
+                column = self.values[col][rows]
+                keep = np.ones(rows.size, dtype=bool)
+                if low is not None:
+                    keep &= column >= low
+                if high is not None:
+                    keep &= column <= high
+            else:
+                wanted = self._codes_for(col, value)
+                column = self.codes[col][rows]
+                keep = column == wanted[0] if wanted.size == 1 else np.isin(column, wanted)
+            rows = rows[keep]
+        return rows
+
+    def value_range(self, col: str) -> tuple:
+        """Smallest and largest value of an indexed range column, read from the sorted index."""
+        sorted_values = self._sorted_values[col]
+        return sorted_values[0], sorted_values[-1]
+
+    def count(self, **criteria) -> int:
+        """Number of rows matching every criterion."""
+        return int(self.query(**criteria).size)
+
+    def frame(self, rows: np.ndarray, columns: list = None) -> pd.DataFrame:
+        """
+        Materialise the given rows (and optionally only some columns).
+
+        Args:
+            rows: Row positions as returned by query
+            columns: Columns to include; None for all
+
+        Returns:
+            pd.DataFrame: The selected transactions
+        """
+        if self.store is not None:
+            return self.store.take(rows, columns)
+        df = self.df if columns is None else self.df[columns]
+        return df.iloc[rows]
+
+
+CASCADE_COLUMNS = ["flat_type", "flat_model", "storey_range", "street_name"]
+
+
+class OptionIndex:
+    """
+    Co-occurrence counts for dependent (cascading) option lists.
+
+    For every prefix of selected values along CASCADE_COLUMNS the index holds
+    the values of the next column that actually occur with that prefix, with
+    their transaction counts, and the smallest and largest value of each
+    range column among the prefix's transactions. Looking up the options or
+    the slider bounds for a sidebar widget is a single dictionary access.
+
+    Example:
+        index.options()                          # flat types
+        index.options("4 ROOM")                  # models seen with 4 ROOM
+        index.options("4 ROOM", "MODEL A")       # storey ranges for both
+        index.value_range("floor_area_sqm", "4 ROOM", "MODEL A")  # (min, max) floor area of both
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list = None, ranges: list = None) -> None:
+        self.columns = columns or CASCADE_COLUMNS
+        self.ranges = [col for col in (ranges or RANGE_COLUMNS) if col in df.columns]
+        self._build(self._combine(self._partial(df)))
+
+    @classmethod
+    def from_chunks(cls, chunks, columns: list = None, ranges: list = None) -> "OptionIndex":
+        """
+        Build the index by combining co-occurrence counts and ranges chunk by chunk.
+
+        Args:
+            chunks: Iterable of typed transaction frames, e.g. hdb_data.iter_dataset()
+            columns: Cascade columns; defaults to CASCADE_COLUMNS
+            ranges: Range columns whose bounds are tracked; defaults to the
+                RANGE_COLUMNS present in the chunks
+        """
+        index = cls.__new__(cls)
+        index.columns = columns or CASCADE_COLUMNS
+        index.ranges = None
+        partials = []
+        for chunk in chunks:
+            if index.ranges is None:
+                index.ranges = [col for col in (ranges or RANGE_COLUMNS) if col in chunk.columns]
+            partials.append(index._partial(chunk))
+        index.ranges = index.ranges or []
+        index._options = {}
+        index._bounds = {}
+        if partials:
+            index._build(index._combine(pd.concat(partials)))
+        return index
+
+    def _partial(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Count, min and max per combination of the cascade columns in one frame."""
+        df = df.dropna(subset=self.columns)
+        # Plain string keys: categories differ between chunks
+        keys = [df[col].astype(str).rename(col) for col in self.columns]
+        aggregations = {"count": (self.columns[0], "size")}
+        for col in self.ranges:
+            aggregations[f"{col}_min"] = (col, "min")
+            aggregations[f"{col}_max"] = (col, "max")
+        return df.groupby(keys, sort=False).agg(**aggregations)
+
+    def _combine(self, stats: pd.DataFrame, depth: int = None) -> pd.DataFrame:
+        """Merge statistics that share the first `depth` key levels (all levels by default)."""
+        levels = list(range(len(self.columns) if depth is None else depth))
+        how = {"count": "sum"}
+        how.update({f"{col}_min": "min" for col in self.ranges})
+        how.update({f"{col}_max": "max" for col in self.ranges})
+        return stats.groupby(level=levels, sort=True).agg(how)
+
+    def _build(self, stats: pd.DataFrame) -> None:
+        """Fill the prefix -> options and prefix -> bounds tables from statistics keyed by every cascade column."""
+        self._options = {}
+        self._bounds = {(): {col: (stats[f"{col}_min"].min(), stats[f"{col}_max"].max()) for col in self.ranges}}
+        for depth in range(len(self.columns)):
+            level = stats if depth == len(self.columns) - 1 else self._combine(stats, depth + 1)
+            bounds = [zip(level[f"{col}_min"], level[f"{col}_max"]) for col in self.ranges]
+            for key, count, *limits in zip(level.index, level["count"], *bounds):
+                key = key if isinstance(key, tuple) else (key,)
+                self._options.setdefault(key[:-1], []).append((key[-1], int(count)))
+                self._bounds[key] = dict(zip(self.ranges, limits))
+
+    def options(self, *selected) -> list:
+        """
+        Values of the next cascade column given the values selected so far.
+
+        Args:
+            *selected: Values for the leading CASCADE_COLUMNS, in order
+
+        Returns:
+            list: (value, count) pairs in category order; empty if the
+                prefix never occurs
+        """
+        return self._options.get(tuple(selected), [])
+
+    def value_range(self, col: str, *selected) -> tuple:
+        """
+        Smallest and largest value of a range column among the transactions with the selected values.
+
+        Args:
+            col: Tracked range column, e.g. "floor_area_sqm"
+            *selected: Values for the leading CASCADE_COLUMNS, in order
+
+        Returns:
+            tuple: (min, max), or None if the prefix never occurs
+        """
+        bounds = self._bounds.get(tuple(selected))
+        return bounds[col] if bounds else None
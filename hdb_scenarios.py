@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+What-if price sweeps over a grid of flat attributes.
+
+A sweep takes one value, a list of values or a numeric range for each model
+input and prices every combination at once. The grid is built as a single
+frame and scored with PriceModel.predict_interval_batch, so tens of
+thousands of scenarios cost one vectorized call. Grids larger than
+CHUNK_ROWS are split into chunks and scored on a process pool whose workers
+each hold a copy of the model; the pool is kept for later sweeps and
+rebuilt when the model version changes.
+
+    grid = scenario_grid(town=["BEDOK", "BISHAN"], flat_type="4 ROOM", flat_model="MODEL A",
+                         storey_range="07 TO 09", floor_area_sqm=value_range(60, 120, 5),
+                         remaining_lease=value_range(50, 95, 5))
+    prices = sweep(model, grid)  # grid columns plus estimate, lower and upper
+"""
+import atexit
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from hdb_model import FEATURES, NUMERIC_FEATURES, PriceModel
+from hdb_warmup import MAX_PROCESS_WORKERS, process_pool, process_workers
+
+MAX_SCENARIOS = 2_000_000  # Larger grids are rejected rather than exhausting memory
+CHUNK_ROWS = 250_000  # Grids up to this size are scored in-process; one vectorized call takes ~0.3 s
+MAX_WORKERS = MAX_PROCESS_WORKERS
+
+_pool = None  # Process pool shared by all sweeps in this process
+_pool_key = None  # (model version, workers) the pool's workers were loaded with
+_pool_lock = threading.Lock()
+_worker_model = None  # The model inside a pool worker
+
+
+def value_range(start: float, stop: float, step: float) -> np.ndarray:
+    """
+    Evenly spaced values from start to stop, including stop when it falls on a step.
+
+    Args:
+        start: First value
+        stop: Last value
+        step: Spacing, greater than zero
+
+    Returns:
+        np.ndarray: The values as floats
+    """
+    if step <= 0:
+        raise ValueError(f"Step must be positive, got {step!r}")
+    return np.arange(start, stop + step / 2, step, dtype=float)
+
+
+def scenario_grid(max_scenarios: int = MAX_SCENARIOS, **axes) -> pd.DataFrame:
+    """
+    Every combination of the given model inputs, one row per scenario.
+
+    Args:
+        max_scenarios: Largest grid accepted
+        **axes: One keyword per FEATURES column; each a single value or a list/array of values
+
+    Returns:
+        pd.DataFrame: FEATURES columns, varying fastest in the last axis
+    """
+    missing = [name for name in FEATURES if name not in axes]
+    unknown = [name for name in axes if name not in FEATURES]
+    if missing or unknown:
+        raise ValueError(f"Grid axes must be exactly {FEATURES}; missing {missing}, unknown {unknown}")
+    values = []
+    for name in FEATURES:
+        axis = axes[name]
+        axis = list(axis) if isinstance(axis, (list, tuple, np.ndarray, pd.Index, pd.Series)) else [axis]
+        if not axis:
+            raise ValueError(f"No values given for {name}")
+        values.append([float(value) for value in axis] if name in NUMERIC_FEATURES else axis)
+    size = math.prod(len(axis) for axis in values)
+    if size > max_scenarios:
+        raise ValueError(f"{size:,} scenarios exceed the limit of {max_scenarios:,}")
+    return pd.MultiIndex.from_product(values, names=FEATURES).to_frame(index=False)
+
+
+def _load_worker_model(model: PriceModel) -> None:
+    global _worker_model
+    _worker_model = model
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _worker_model.predict_interval_batch(chunk)
+
+
+def _map_on_pool(model: PriceModel, workers: int, chunks: list):
+    """
+    Submit chunks to a pool whose workers hold this model version.
+
+    A pool loaded with another version is replaced. The old pool is shut down
+    without cancelling, so sweeps other sessions already submitted to it run
+    to completion before its workers exit. Work is submitted under the lock,
+    so a pool is never shut down between being picked and being given work.
+
+    Returns:
+        Iterator over the scored chunks, in order
+    """
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool_key != (model.version, workers):
+            previous = _pool
+            _pool = process_pool(workers, initializer=_load_worker_model, initargs=(model,))
+            _pool_key = (model.version, workers)
+            if previous is not None:
+                previous.shutdown(wait=False, cancel_futures=False)
+        return _pool.map(_score_chunk, chunks)
+
+
+def shutdown_pool() -> None:
+    """Stop the sweep workers; called at interpreter exit."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+atexit.register(shutdown_pool)
+
+
+def sweep(model: PriceModel, grid: pd.DataFrame, chunk_rows: int = CHUNK_ROWS, workers: int = None) -> pd.DataFrame:
+    """
+    Price every scenario in a grid with its prediction interval.
+
+    Args:
+        model: Trained price model
+        grid: Frame with the FEATURES columns, e.g. from scenario_grid
+        chunk_rows: Rows per chunk; grids no larger than this are scored in-process
+        workers: Pool size for larger grids; defaults to the CPU count, capped at MAX_WORKERS
+
+    Returns:
+        pd.DataFrame: The grid with estimate, lower and upper columns added
+    """
+    workers = process_workers(workers, MAX_WORKERS)
+    if len(grid) <= chunk_rows or workers < 2:
+        scored = model.predict_interval_batch(grid)
+    else:
+        chunks = [grid.iloc[start:start + chunk_rows] for start in range(0, len(grid), chunk_rows)]
+        scored = pd.concat(_map_on_pool(model, workers, chunks))
+    return grid.join(scored)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Semantic intent matching for paraphrased chatbot questions.
+
+A catalogue of canonical questions per intent is embedded once with a
+sentence-transformers model and persisted as a .npy file under .cache/,
+named after a hash of the model and catalogue so edits trigger a rebuild.
+Later processes memory-map the vectors instead of re-embedding. The encoder
+itself is only loaded when the first question actually needs it.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from hdb_data import CACHE_DIR
+
+ENCODER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MIN_SIMILARITY = 0.55  # Below this the question is treated as not understood
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE = {
+    "list_towns": [
+        "Which towns are in the dataset?",
+        "What areas can I look at?",
+        "List the HDB estates you know about",
+        "Where are the flats located?",
+    ],
+    "list_flat_types": [
+        "What kinds of flats are there?",
+        "Which flat sizes are available?",
+        "What room types can I choose from?",
+    ],
+    "average_price": [
+        "What does a flat usually cost?",
+        "What is the typical resale price?",
+        "How much do flats sell for on average?",
+        "How much would I pay for a flat?",
+    ],
+    "highest_price": [
+        "What is the priciest flat ever sold?",
+        "What is the record resale price?",
+        "Top price paid for a flat",
+    ],
+    "lowest_price": [
+        "What is the least anyone paid for a flat?",
+        "What is the minimum resale price?",
+        "Lowest amount a flat sold for",
+    ],
+    "count_flats": [
+        "How big is the dataset?",
+        "How many transactions are recorded?",
+        "Number of flats sold",
+    ],
+    "most_common_flat_type": [
+        "Which flat type sells the most?",
+        "What is the most popular kind of flat?",
+        "Which room type is bought most often?",
+    ],
+    "sample_flats": [
+        "Give me some example listings in this town",
+        "Let me see a few flats sold there",
+        "Display some transactions in this estate",
+    ],
+    "cheapest_town": [
+        "Where are flats most affordable?",
+        "Which area has the lowest prices?",
+        "Which estate is the least expensive?",
+    ],
+    "most_expensive_town": [
+        "Which area has the highest prices?",
+        "Where are flats the priciest?",
+        "Which estate costs the most?",
+    ],
+    "price_trend": [
+        "How have prices moved through the years?",
+        "Are resale prices going up?",
+        "Show the price history",
+    ],
+    "highest_year": [
+        "When were prices at their peak?",
+        "In which year did prices top out?",
+        "Which year was the most expensive to buy?",
+    ],
+    "town_with_most": [
+        "Where are the most flats sold?",
+        "Which estate has the largest number of transactions?",
+        "Which town is the busiest resale market?",
+    ],
+}
+
+
+class SemanticMatcher:
+    """
+    Cosine-similarity matcher from free-text questions to intent names.
+
+    Attributes:
+        intents: Intent name for each catalogue row
+        vectors: L2-normalised catalogue embeddings (memory-mapped)
+        available: False when the encoder cannot be imported or loaded
+    """
+
+    def __init__(self, encoder_name: str = ENCODER_NAME, cache_dir: str = CACHE_DIR,
+                 catalogue: dict = None) -> None:
+        self.encoder_name = encoder_name
+        self.cache_dir = Path(cache_dir)
+        catalogue = catalogue or CATALOGUE
+        self.questions = [question for questions in catalogue.values() for question in questions]
+        self.intents = [name for name, questions in catalogue.items() for _ in questions]
+        self._encoder = None
+        self._vectors = None
+        self.available = True
+
+    @property
+    def vectors_path(self) -> Path:
+        """Cache file named after the encoder and catalogue contents."""
+        key = json.dumps([self.encoder_name, self.questions, self.intents])
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"intent_embeddings.{digest}.npy"
+
+    def _load_encoder(self) -> bool:
+        """
+        Load the encoder on first use.
+
+        Any failure (missing package, no network for the first model download,
+        a corrupt model cache) is logged once and turns semantic matching off
+        for the lifetime of the matcher.
+
+        Returns:
+            bool: True if the encoder is ready
+        """
+        if self._encoder is None and self.available:
+            try:
+                from sentence_transformers import SentenceTransformer  # Imported lazily: pulls in torch
+                self._encoder = SentenceTransformer(self.encoder_name, device="cpu")
+            except Exception:
+                logger.warning("Semantic matching disabled: could not load %s", self.encoder_name, exc_info=True)
+                self.available = False
+        return self._encoder is not None
+
+    def _encode(self, texts: list) -> np.ndarray:
+        """Embed texts as L2-normalised float32 vectors; the encoder must be loaded."""
+        return self._encoder.encode(texts, batch_size=64, normalize_embeddings=True,
+                                    convert_to_numpy=True).astype("float32")
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Catalogue embeddings, memory-mapped from disk or built and persisted once."""
+        if self._vectors is None:
+            path = self.vectors_path
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp.npy")
+                np.save(tmp, self._encode(self.questions))
+                os.replace(tmp, path)
+            self._vectors = np.load(path, mmap_mode="r")
+        return self._vectors
+
+    def match_batch(self, questions: list) -> list:
+        """
+        Best intent for each question.
+
+        Args:
+            questions: Free-text questions
+
+        Returns:
+            list: (intent name or None, similarity) per question
+        """
+        if not questions or not self._load_encoder():
+            return [(None, 0.0)] * len(questions)
+        scores = self._encode(list(questions)) @ np.asarray(self.vectors).T
+        best = scores.argmax(axis=1)
+        return [
+            (self.intents[row] if score >= MIN_SIMILARITY else None, float(score))
+            for row, score in zip(best, scores[np.arange(len(best)), best])
+        ]
+
+    def match(self, question: str) -> tuple:
+        """
+        Best intent for one question.
+
+        Returns:
+            tuple: (intent name or None, similarity)
+        """
+        return self.match_batch([question])[0]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block-level spatial index and server-side clustering for the map views.
+
+Transactions are rolled up to one point per block (count and price sum),
+located through the gazetteer, and stored in a uniform grid index sorted by
+cell key. Clusters for each zoom level are precomputed by snapping points to
+a grid whose cells are a fixed number of screen pixels wide, so the number
+of features sent to the browser depends on the viewport and zoom, not on how
+many transactions the dataset holds.
+"""
+import numpy as np
+import pandas as pd
+
+from hdb_colorscale import PriceScale
+from hdb_gazetteer import Gazetteer
+
+CLUSTER_ZOOMS = range(10, 17)  # Beyond the last level individual blocks are returned
+CELL_PIXELS = 64  # Screen size of a cluster cell
+TILE_PIXELS = 256
+
+
+def cell_degrees(zoom: int) -> float:
+    """
+    Width in degrees of a cluster cell at a web-map zoom level.
+
+    Singapore sits near the equator, so a square cell in degrees is close to
+    square on screen.
+    """
+    return 360.0 / (2 ** zoom) * CELL_PIXELS / TILE_PIXELS
+
+
+def block_points(df: pd.DataFrame, gazetteer: Gazetteer) -> pd.DataFrame:
+    """
+    One point per block with transaction count and price sum.
+
+    Blocks the gazetteer cannot place exactly are merged into a single point
+    per town at the town centroid, instead of stacking one marker per block.
+
+    Args:
+        df: Typed transactions as returned by hdb_data.load_dataset
+        gazetteer: Source of block and town coordinates
+
+    Returns:
+        pd.DataFrame: block, street_name, town, count, price_sum, lat, lon, exact
+    """
+    blocks = df.groupby(["block", "street_name", "town"], observed=True)["resale_price"].agg(
+        count="count", price_sum="sum").reset_index()
+    blocks = pd.concat([blocks, gazetteer.locate_blocks(blocks)], axis=1)
+    unplaced = blocks[~blocks["exact"]].groupby(["town", "lat", "lon"], observed=True)[["count", "price_sum"]].sum()
+    unplaced = unplaced.reset_index().assign(block="", street_name="", exact=False)
+    return pd.concat([blocks[blocks["exact"]], unplaced[blocks.columns]], ignore_index=True)
+
+
+class SpatialIndex:
+    """
+    Uniform-grid index over weighted points plus per-zoom clusters.
+
+    Attributes:
+        points: Points sorted by fine grid cell (lat, lon, count, price_sum, ...)
+        clusters: Zoom level -> frame of lat, lon, count, avg_price, points
+    """
+
+    def __init__(self, points: pd.DataFrame) -> None:
+        lat = points["lat"].to_numpy(dtype="float64")
+        lon = points["lon"].to_numpy(dtype="float64")
+        self.origin = (float(lat.min()), float(lon.min())) if len(points) else (0.0, 0.0)
+        self.grid_size = cell_degrees(max(CLUSTER_ZOOMS))
+        iy, ix = self._cells(lat, lon, self.grid_size)
+        self.width = int(ix.max()) + 1 if len(points) else 1
+        keys = iy * self.width + ix
+        order = np.argsort(keys, kind="stable")
+        self.points = points.iloc[order].reset_index(drop=True)
+        self._keys = keys[order]
+        self._lat = lat[order]
+        self._lon = lon[order]
+        self.clusters = {zoom: self._cluster(cell_degrees(zoom)) for zoom in CLUSTER_ZOOMS}
+
+    @classmethod
+    def from_transactions(cls, df: pd.DataFrame, gazetteer: Gazetteer) -> "SpatialIndex":
+        """Index the block-level points of a transaction frame."""
+        return cls(block_points(df, gazetteer))
+
+    def _cells(self, lat: np.ndarray, lon: np.ndarray, size: float) -> tuple:
+        iy = np.floor((lat - self.origin[0]) / size).astype("int64")
+        ix = np.floor((lon - self.origin[1]) / size).astype("int64")
+        return iy, ix
+
+    def _cluster(self, size: float) -> pd.DataFrame:
+        """Aggregate points into grid cells of the given size (count-weighted centroids)."""
+        iy, ix = self._cells(self._lat, self._lon, size)
+        _, cell = np.unique(iy * (int(ix.max(initial=0)) + 1) + ix, return_inverse=True)
+        weights = self.points["count"].to_numpy(dtype="float64")
+        count = np.bincount(cell, weights=weights)
+        return pd.DataFrame({
+            "lat": (np.bincount(cell, weights=self._lat * weights) / count).astype("float32"),
+            "lon": (np.bincount(cell, weights=self._lon * weights) / count).astype("float32"),
+            "count": count.astype("int32"),
+            "avg_price": (np.bincount(cell, weights=self.points["price_sum"].to_numpy()) / count).astype("float32"),
+            "points": np.bincount(cell).astype("int32"),
+        })
+
+    def price_scale(self, bins: int = 5) -> PriceScale:
+        """Quantile colour scale over block average prices, weighted by transaction count."""
+        prices = self.points["price_sum"] / self.points["count"]
+        return PriceScale.from_values(prices, bins=bins, weights=self.points["count"])
+
+    def points_in(self, south: float, west: float, north: float, east: float) -> pd.DataFrame:
+        """
+        Points inside a bounding box, read row by row from the grid index.
+
+        Args:
+            south, west, north, east: Bounding box in degrees
+
+        Returns:
+            pd.DataFrame: Matching rows of `points`
+        """
+        (y0, y1), (x0, x1) = self._cells(np.array([south, north]), np.array([west, east]), self.grid_size)
+        y0, x0 = max(int(y0), 0), max(int(x0), 0)
+        y1, x1 = int(y1), min(int(x1), self.width - 1)
+        slices = []
+        for row in range(y0, y1 + 1):
+            start = np.searchsorted(self._keys, row * self.width + x0, side="left")
+            stop = np.searchsorted(self._keys, row * self.width + x1, side="right")
+            if stop > start:
+                slices.append(np.arange(start, stop))
+        if not slices:
+            return self.points.iloc[0:0]
+        rows = np.concatenate(slices)
+        inside = ((self._lat[rows] >= south) & (self._lat[rows] <= north)
+                  & (self._lon[rows] >= west) & (self._lon[rows] <= east))
+        return self.points.iloc[rows[inside]]
+
+    def query(self, south: float, west: float, north: float, east: float, zoom: int) -> pd.DataFrame:
+        """
+        Map features for a viewport: clusters up to the last cluster zoom, blocks beyond it.
+
+        Args:
+            south, west, north, east: Viewport bounding box in degrees
+            zoom: Web-map zoom level
+
+        Returns:
+            pd.DataFrame: lat, lon, count and avg_price per feature
+        """
+        if zoom > max(CLUSTER_ZOOMS):
+            blocks = self.points_in(south, west, north, east)
+            return pd.DataFrame({
+                "lat": blocks["lat"].astype("float32"), "lon": blocks["lon"].astype("float32"),
+                "count": blocks["count"].astype("int32"),
+                "avg_price": (blocks["price_sum"] / blocks["count"]).astype("float32"),
+                "points": np.ones(len(blocks), dtype="int32"),
+            }).reset_index(drop=True)
+        clusters = self.clusters[max(zoom, min(CLUSTER_ZOOMS))]
+        inside = (clusters["lat"].between(south, north) & clusters["lon"].between(west, east)).to_numpy()
+        return clusters[inside].reset_index(drop=True)
+
+
+def viewport(center: tuple, zoom: int, width_px: int = 1000, height_px: int = 600) -> tuple:
+    """
+    Approximate bounding box of a map view.
+
+    Returns:
+        tuple: (south, west, north, east) in degrees
+    """
+    degrees_per_pixel = 360.0 / (2 ** zoom) / TILE_PIXELS
+    half_width, half_height = width_px / 2 * degrees_per_pixel, height_px / 2 * degrees_per_pixel
+    return center[0] - half_height, center[1] - half_width, center[0] + half_height, center[1] + half_width
+
+
+def deck_frame(features: pd.DataFrame, max_radius: float = 400.0, scale: PriceScale = None) -> pd.DataFrame:
+    """
+    Compact payload for a pydeck ScatterplotLayer.
+
+    Only the columns the layer reads are kept, rounded so the JSON that
+    Streamlit sends stays short (float32 values would serialise with spurious
+    digits), with the marker radius (metres) scaled by the square root of the
+    transaction count.
+
+    Args:
+        features: Output of SpatialIndex.query
+        max_radius: Radius of the largest feature in metres
+        scale: Colour scale for the average price; adds uint8 r, g, b, a columns
+
+    Returns:
+        pd.DataFrame: lon, lat, count, avg_price, radius (and r, g, b, a)
+    """
+    counts = features["count"].to_numpy(dtype="float32")
+    size = np.sqrt(counts / counts.max()) if len(counts) else counts
+    frame = pd.DataFrame({
+        "lon": features["lon"].astype("float64").round(5),
+        "lat": features["lat"].astype("float64").round(5),
+        "count": features["count"].astype("int32"),
+        "avg_price": features["avg_price"].round(0).astype("int64"),
+        "radius": (40 + size * (max_radius - 40)).round(0).astype("int32"),
+    })
+    if scale is not None:
+        frame[["r", "g", "b", "a"]] = scale.rgba(frame["avg_price"])
+    return frame
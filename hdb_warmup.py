@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background warm-up of heavy imports and shared state.
+
+The first script run of an app submits the expensive work its sections will
+need (map, chart and ML library imports, the data plane, the model) to a
+small background pool and goes on rendering. A section that needs a warmed
+object calls `result`, which waits for the background job if it is still
+running and runs the work inline if it was never submitted. Each key is
+submitted once per process; keys carry the dataset signature where the
+result depends on the data, so a new snapshot is warmed again.
+
+    warm(("data_plane", signature), DataPlane.load)   # at the top of the script
+    ...
+    @st.cache_resource(max_entries=1)
+    def load_data_plane(signature):
+        return result(("data_plane", signature), DataPlane.load)
+
+CPU-bound work that does not fit on threads (scenario sweeps, forecast
+fits) runs on process pools created with `process_pool`.
+"""
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+WORKERS = 2  # Enough to overlap an import with a data load without starving the script thread
+MAX_PROCESS_WORKERS = 4  # Default cap on process pool size; the apps share the machine with the server
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="warmup")
+_futures = {}  # Submitted jobs not yet collected by `result`
+_collected = set()  # Keys already handed to a caller; never warmed again
+_lock = threading.Lock()
+
+
+def warm(key, function, *args) -> Future:
+    """
+    Start a job in the background unless it was already submitted or collected.
+
+    Args:
+        key: Hashable job identity, e.g. ("data_plane", signature)
+        function: Work to run
+        *args: Arguments for function
+
+    Returns:
+        Future: The job, or None if its result was already collected
+    """
+    with _lock:
+        if key in _collected:
+            return None
+        if key not in _futures:
+            _futures[key] = _executor.submit(function, *args)
+        return _futures[key]
+
+
+def warm_imports(*modules: str) -> Future:
+    """Import modules in the background so later `import` statements are free."""
+    return warm(("import",) + modules, lambda: [importlib.import_module(module) for module in modules])
+
+
+def result(key, function, *args):
+    """
+    Result of a warmed job, waiting for it if necessary; runs the work inline if it was never warmed.
+
+    The job is forgotten once collected, so the process does not keep a
+    second reference to large results (the caller's cache owns them).
+
+    Args:
+        key: Job identity passed to `warm`
+        function: Work to run if the job was not submitted
+        *args: Arguments for function
+
+    Returns:
+        The job's return value; exceptions raised by the job propagate
+    """
+    with _lock:
+        future = _futures.pop(key, None)
+        _collected.add(key)
+    return future.result() if future is not None else function(*args)
+
+
+def process_workers(workers: int = None, limit: int = MAX_PROCESS_WORKERS) -> int:
+    """Requested pool size, or the CPU count capped at limit."""
+    return workers or min(os.cpu_count() or 1, limit)
+
+
+def process_pool(workers: int, initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Process pool for CPU-bound work started from an app or a script.
+
+    Workers are started with spawn, not fork: the Streamlit server process
+    runs many threads, and a forked child can inherit a lock held by one of
+    them. Spawned workers import the calling module afresh, so task
+    functions and initializers must be module-level.
+
+    Args:
+        workers: Number of worker processes
+        initializer: Called once in each worker, e.g. to keep a model in a module global
+        initargs: Arguments for initializer
+
+    Returns:
+        ProcessPoolExecutor: The pool; the caller owns its shutdown
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=initializer, initargs=initargs)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulate concurrent Streamlit sessions against one of the apps.
+
+Each simulated session is a streamlit AppTest in this process, so sessions
+share st.cache_resource exactly as they do on a server. All sessions are
+kept alive at once and rerun in turn, each rerun changing a random sidebar
+widget, and the harness reports process memory per live session and rerun
+latency percentiles. AppTest installs a process-wide runtime for every run,
+so reruns are interleaved rather than executed in parallel threads.
+
+Usage:
+    python load_test.py                                  # HDB_Predictor.py, 50 sessions
+    python load_test.py --app "ChopeFlat Chatbot.py" --sessions 20 --reruns 10
+    python load_test.py --json load_test.json            # also write the report as JSON
+"""
+import argparse
+import json
+import random
+import resource
+import time
+
+import numpy as np
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:  # No procfs (macOS); peak RSS is the closest portable figure
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def interact(app, rng: random.Random) -> None:
+    """Change a random sidebar selectbox or slider, if the app has any."""
+    # AppTest can only pick selectbox options by label when labels are the values themselves
+    boxes = [box for box in app.sidebar.selectbox
+             if box.options and box.format_func(box.value) == str(box.value)]
+    sliders = [slider for slider in app.sidebar.slider if slider.max > slider.min]
+    widgets = boxes + sliders
+    if not widgets:
+        return
+    widget = rng.choice(widgets)
+    if widget in boxes:
+        widget.select_index(rng.randrange(len(widget.options)))
+    else:
+        low, high = sorted(rng.uniform(widget.min, widget.max) for _ in range(2))
+        step = type(widget.min)
+        widget.set_value((step(low), step(high)) if isinstance(widget.value, tuple) else step(high))
+
+
+def load_test(app_path: str, sessions: int, reruns: int, timeout: float = 300) -> dict:
+    """
+    Warm the shared caches with one session, then keep N sessions alive and rerun them in turn.
+
+    Args:
+        app_path: Streamlit script to exercise
+        sessions: Number of simulated concurrent sessions
+        reruns: Reruns per session after the first run
+        timeout: Per-run AppTest timeout in seconds
+
+    Returns:
+        dict: Memory and latency report
+    """
+    from streamlit.testing.v1 import AppTest
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    warm_session = AppTest.from_file(app_path, default_timeout=timeout).run()  # Builds the shared caches
+    warmup_seconds = time.perf_counter() - started
+    warm = rss_mb()
+
+    apps = [AppTest.from_file(app_path, default_timeout=timeout) for _ in range(sessions)]
+    rngs = [random.Random(seed) for seed in range(sessions)]
+    for app in apps:
+        app.run()  # First run sets up each session's widgets
+    errors = sum(len(app.exception) for app in apps) + len(warm_session.exception)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(reruns):
+        for app, rng in zip(apps, rngs):
+            interact(app, rng)
+            began = time.perf_counter()
+            app.run()
+            latencies.append(time.perf_counter() - began)
+            errors += len(app.exception)
+    elapsed = time.perf_counter() - started
+    loaded = rss_mb()
+
+    times = np.asarray(latencies) * 1000
+    return {
+        "app": app_path,
+        "sessions": sessions,
+        "reruns_per_session": reruns,
+        "errors": errors,
+        "rss_mb": {
+            "baseline": round(baseline, 1),
+            "after_warmup": round(warm, 1),
+            "after_sessions": round(loaded, 1),
+            "shared": round(warm - baseline, 1),
+            "per_session": round((loaded - warm) / max(sessions, 1), 2),
+        },
+        "latency_ms": {
+            "p50": round(float(np.percentile(times, 50)), 1) if times.size else None,
+            "p95": round(float(np.percentile(times, 95)), 1) if times.size else None,
+            "max": round(float(times.max()), 1) if times.size else None,
+        },
+        "warmup_seconds": round(warmup_seconds, 2),
+        "reruns_per_second": round(times.size / elapsed, 1) if elapsed else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions and report RSS and rerun latency.")
+    parser.add_argument("--app", default="HDB_Predictor.py", help="Streamlit script to exercise")
+    parser.add_argument("--sessions", type=int, default=50, help="Number of simulated sessions")
+    parser.add_argument("--reruns", type=int, default=5, help="Reruns per session after the first run")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = load_test(args.app, args.sessions, args.reruns)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Summarise the structured application logs.
+
+Reads logs/<name>.log and its rotated backups (JSON lines written by
+hdb_logging) and reports, per event, the request count and p50/p95/p99 of
+the total latency and of each stage.
+
+Usage:
+    python log_summary.py                        # logs/hdb_chatbot.log*
+    python log_summary.py --name hdb_chatbot --since 2024-06-01
+    python log_summary.py --json summary.json    # also write the summary as JSON
+"""
+import argparse
+import glob
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from hdb_logging import LOG_DIR, log_path
+
+PERCENTILES = [50, 95, 99]
+
+
+def read_records(name: str, log_dir: str = LOG_DIR, since: str = None):
+    """
+    Yield the JSON records of a log and its rotated files, oldest file first.
+
+    Args:
+        name: Logger name (log file stem)
+        log_dir: Directory holding the log files
+        since: Optional ISO date or timestamp; earlier records are skipped
+
+    Yields:
+        dict: One parsed record per line; lines that are not JSON are skipped
+    """
+    current = log_path(name, log_dir)
+    for path in sorted(glob.glob(current + ".*"), reverse=True) + glob.glob(current):
+        with open(path, encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or record.get("time", "") >= since:
+                    yield record
+
+
+def latency_summary(values: list) -> dict:
+    """p50/p95/p99 and max of a list of millisecond timings."""
+    times = np.asarray(values, dtype="float64")
+    summary = {f"p{q}": round(float(np.percentile(times, q)), 2) for q in PERCENTILES}
+    summary["max"] = round(float(times.max()), 2)
+    return summary
+
+
+def summarise(records) -> dict:
+    """
+    Request counts and latency percentiles per event.
+
+    Args:
+        records: Parsed log records
+
+    Returns:
+        dict: event -> {"count", "levels", "total_ms", "stages_ms"}
+    """
+    counts = defaultdict(int)
+    levels = defaultdict(lambda: defaultdict(int))
+    totals = defaultdict(list)
+    stages = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        event = record.get("event", "other")
+        counts[event] += 1
+        levels[event][record.get("level", "INFO")] += 1
+        if "total_ms" in record:
+            totals[event].append(record["total_ms"])
+        for stage, elapsed in (record.get("timings_ms") or {}).items():
+            stages[event][stage].append(elapsed)
+
+    return {
+        event: {
+            "count": count,
+            "levels": dict(levels[event]),
+            "total_ms": latency_summary(totals[event]) if totals[event] else None,
+            "stages_ms": {stage: latency_summary(values) for stage, values in stages[event].items()},
+        }
+        for event, count in sorted(counts.items())
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report request counts and p50/p95/p99 latency from the JSON logs.")
+    parser.add_argument("--name", default="hdb_chatbot", help="Log name (file stem under the log directory)")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="Directory holding the log files")
+    parser.add_argument("--since", help="Only records at or after this ISO date/time (UTC)")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    summary = summarise(read_records(args.name, args.log_dir, args.since))
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(summary, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generate a synthetic Dataset.csv for benchmarks and load tests.
+
+Rows follow the layout of the HDB resale CSV and roughly its shape: large
+estates (Sengkang, Tampines, Woodlands, ...) sell more flats, 4-room flats
+are the most common, floor area and flat model depend on the flat type,
+low storeys are more common, monthly volume and prices drift upwards over
+time and prices fall with the remaining lease. Output is deterministic for
+a given seed and written month by month, so 10M rows never sit in memory.
+
+Usage:
+    python make_dataset.py --rows 1000000 --output bench/Dataset.csv
+    python make_dataset.py --rows 100000 --seed 7 --start 2020-01 --end 2024-12
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Relative transaction volume and price level per town
+TOWNS = {
+    "ANG MO KIO": (5, 1.00), "BEDOK": (6, 0.97), "BISHAN": (2, 1.25), "BUKIT BATOK": (4, 0.92),
+    "BUKIT MERAH": (4, 1.20), "BUKIT PANJANG": (4, 0.90), "BUKIT TIMAH": (0.3, 1.35), "CENTRAL AREA": (0.8, 1.40),
+    "CHOA CHU KANG": (4, 0.88), "CLEMENTI": (3, 1.10), "GEYLANG": (3, 1.00), "HOUGANG": (5, 0.95),
+    "JURONG EAST": (2.5, 0.95), "JURONG WEST": (7, 0.88), "KALLANG/WHAMPOA": (3, 1.15), "MARINE PARADE": (0.8, 1.20),
+    "PASIR RIS": (3, 0.98), "PUNGGOL": (6, 1.00), "QUEENSTOWN": (3, 1.25), "SEMBAWANG": (3.5, 0.87),
+    "SENGKANG": (8, 0.98), "SERANGOON": (2, 1.05), "TAMPINES": (7, 1.00), "TOA PAYOH": (3.5, 1.12),
+    "WOODLANDS": (7.5, 0.86), "YISHUN": (7, 0.87),
+}
+# Share of transactions, typical floor area (sqm) and likely flat models per flat type
+FLAT_TYPES = {
+    "1 ROOM": (0.001, 31, ["IMPROVED"]),
+    "2 ROOM": (0.02, 45, ["MODEL A", "STANDARD", "IMPROVED"]),
+    "3 ROOM": (0.25, 68, ["NEW GENERATION", "IMPROVED", "MODEL A", "SIMPLIFIED"]),
+    "4 ROOM": (0.42, 93, ["MODEL A", "PREMIUM APARTMENT", "NEW GENERATION", "SIMPLIFIED", "DBSS"]),
+    "5 ROOM": (0.24, 117, ["IMPROVED", "PREMIUM APARTMENT", "MODEL A", "STANDARD", "DBSS"]),
+    "EXECUTIVE": (0.068, 145, ["APARTMENT", "MAISONETTE", "PREMIUM APARTMENT"]),
+    "MULTI-GENERATION": (0.001, 164, ["MULTI GENERATION"]),
+}
+STOREY_RANGES = ["01 TO 03", "04 TO 06", "07 TO 09", "10 TO 12", "13 TO 15", "16 TO 18",
+                 "19 TO 21", "22 TO 24", "25 TO 27", "28 TO 30", "31 TO 33", "34 TO 36",
+                 "37 TO 39", "40 TO 42"]
+STOREY_WEIGHTS = np.array([20, 20, 18, 15, 10, 6, 4, 2.5, 1.5, 1, 0.6, 0.4, 0.3, 0.2])
+STREETS_PER_TOWN = 40
+COLUMNS = ["month", "town", "flat_type", "block", "street_name", "storey_range", "floor_area_sqm",
+           "flat_model", "lease_commence_date", "remaining_lease", "resale_price"]
+
+
+def month_counts(rows: int, months: pd.PeriodIndex, rng: np.random.Generator) -> np.ndarray:
+    """Rows per month: volume grows ~40% over the period, with seasonal dips in Feb and Dec."""
+    trend = np.linspace(1.0, 1.4, len(months))
+    season = np.where(np.isin(months.month, [2, 12]), 0.85, 1.0)
+    weights = trend * season
+    return rng.multinomial(rows, weights / weights.sum())
+
+
+def generate_month(month: pd.Period, rows: int, position: float, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Synthetic transactions for one month.
+
+    Args:
+        month: Sale month
+        rows: Number of transactions
+        position: Position of the month in the period, 0 (first) to 1 (last), driving the price trend
+        rng: Random generator
+
+    Returns:
+        pd.DataFrame: Rows with the COLUMNS of the resale CSV
+    """
+    town_names = np.array(list(TOWNS))
+    town_volume = np.array([volume for volume, _ in TOWNS.values()])
+    town_level = np.array([level for _, level in TOWNS.values()])
+    type_names = np.array(list(FLAT_TYPES))
+    type_share = np.array([share for share, _, _ in FLAT_TYPES.values()])
+    type_area = np.array([area for _, area, _ in FLAT_TYPES.values()])
+
+    town = rng.choice(len(town_names), rows, p=town_volume / town_volume.sum())
+    flat_type = rng.choice(len(type_names), rows, p=type_share / type_share.sum())
+    area = np.clip(type_area[flat_type] * rng.normal(1, 0.08, rows), 28, 280).round()
+    storey = rng.choice(len(STOREY_RANGES), rows, p=STOREY_WEIGHTS / STOREY_WEIGHTS.sum())
+    models = [FLAT_TYPES[name][2] for name in type_names]
+    flat_model = np.array([models[kind][pick % len(models[kind])]
+                           for kind, pick in zip(flat_type, rng.integers(0, 12, rows))])
+    lease_start = rng.integers(1967, month.year - 4, rows)
+    lease_months = (lease_start + 99 - month.year) * 12 - (month.month - 1)
+    street = rng.integers(0, STREETS_PER_TOWN, rows)
+    block = rng.integers(1, 999, rows)
+
+    remaining = lease_months / 12
+    price = (
+        4_200 * area * town_level[town]
+        * (0.55 + 0.45 * remaining / 99)  # Older flats sell for less
+        * (1 + 0.015 * storey)  # Higher floors sell for more
+        * (1 + 0.35 * position)  # Market trend over the period
+        * rng.lognormal(0, 0.08, rows)
+    ).round(-2)
+    return pd.DataFrame({
+        "month": str(month),
+        "town": town_names[town],
+        "flat_type": type_names[flat_type],
+        "block": [f"{number}{'A' if number % 17 == 0 else ''}" for number in block],
+        "street_name": [f"{town_names[t].split('/')[0]} ST {s + 1}" for t, s in zip(town, street)],
+        "storey_range": np.array(STOREY_RANGES)[storey],
+        "floor_area_sqm": area,
+        "flat_model": flat_model,
+        "lease_commence_date": lease_start,
+        "remaining_lease": [f"{m // 12} years {m % 12:02d} months" for m in lease_months],
+        "resale_price": price,
+    }, columns=COLUMNS)
+
+
+def write_dataset(path: str, rows: int, seed: int = 0, start: str = "2017-01", end: str = "2024-12") -> str:
+    """
+    Write a synthetic resale CSV, one month at a time.
+
+    Args:
+        path: Output CSV path
+        rows: Total number of transactions
+        seed: Random seed; the same seed gives the same file
+        start: First sale month (YYYY-MM)
+        end: Last sale month (YYYY-MM)
+
+    Returns:
+        str: The output path
+    """
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(start, end, freq="M")
+    counts = month_counts(rows, months, rng)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="") as output:
+        output.write(",".join(COLUMNS) + "\n")
+        for position, (month, count) in enumerate(zip(months, counts)):
+            if count:
+                frame = generate_month(month, int(count), position / max(len(months) - 1, 1), rng)
+                frame.to_csv(output, header=False, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic HDB resale dataset.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of transactions")
+    parser.add_argument("--output", default="Dataset.csv", help="Output CSV path")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--start", default="2017-01", help="First sale month (YYYY-MM)")
+    parser.add_argument("--end", default="2024-12", help="Last sale month (YYYY-MM)")
+    args = parser.parse_args()
+
+    write_dataset(args.output, args.rows, args.seed, args.start, args.end)
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure import time and cold-start latency of the Streamlit apps.
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported or cached in memory:
+
+    dependencies   `python -X importtime -c "import <module>"` per heavy library
+    imports        the app's top-level import statements together, i.e. the
+                   work done before the script can draw anything
+    first paint    time from the start of a cold run until the app's rerun
+                   trace starts (right after set_page_config), with the
+                   first and second run durations and per-stage timings
+
+Usage:
+    python startup_report.py
+    python startup_report.py --app HDB_Predictor.py --json startup.json
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+APPS = ["HDB_Predictor.py", "ChopeFlat Chatbot.py", "chatbot_vr2.py", "HDB_Chatbot.py"]
+DEPENDENCIES = ["streamlit", "pandas", "pyarrow.parquet", "sklearn.linear_model", "sklearn.neighbors",
+                "folium", "streamlit_folium", "altair", "pydeck", "sentence_transformers", "geopy"]
+
+COLD_RUN = """
+import json, sys
+from datetime import datetime
+from streamlit.testing.v1 import AppTest
+from hdb_metrics import REGISTRY
+
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+started = datetime.now()
+app.run()
+first = (datetime.now() - started).total_seconds()
+began = datetime.now()
+app.run()
+second = (datetime.now() - began).total_seconds()
+traces = [trace for traces in REGISTRY.traces.values() for trace in traces]
+cold = traces[0] if traces else None
+print(json.dumps({
+    "first_paint_ms": round((cold.started_at - started).total_seconds() * 1000, 1) if cold else None,
+    "first_run_s": round(first, 3),
+    "second_run_s": round(second, 3),
+    "stages_ms": {name: round(value, 1) for name, value in cold.timings_ms.items()} if cold else {},
+    "errors": [str(exception.message) for exception in app.exception],
+}))
+"""
+
+
+def import_times(code: str) -> list:
+    """
+    Top-level imports executed by a code snippet and their cumulative cost.
+
+    Args:
+        code: Python source run with -X importtime in a fresh interpreter
+
+    Returns:
+        list: (module, cumulative ms) for each top-level import, slowest first;
+            None if the snippet failed to import
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if completed.returncode:
+        return None
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):  # Nested imports are indented
+            times.append((name.strip(), int(cumulative) / 1000))
+    return sorted(times, key=lambda item: -item[1])
+
+
+def app_imports(app_path: str) -> str:
+    """The top-level import statements of a script, as source."""
+    with open(app_path, encoding="utf-8") as source:
+        tree = ast.parse(source.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def cold_run(app_path: str) -> dict:
+    """Run an app twice in a fresh interpreter and report first-paint and run timings."""
+    completed = subprocess.run([sys.executable, "-c", COLD_RUN, app_path], capture_output=True, text=True)
+    if completed.returncode:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def report(apps: list) -> dict:
+    """
+    Import and cold-start measurements for the given apps.
+
+    Args:
+        apps: Streamlit scripts to measure
+
+    Returns:
+        dict: {"dependencies": {module: ms}, "apps": {app: {...}}}
+    """
+    dependencies = {}
+    for module in DEPENDENCIES:
+        times = import_times(f"import {module}")
+        dependencies[module] = round(times[0][1], 1) if times else None  # None: not installed
+    results = {}
+    for app in apps:
+        times = import_times(app_imports(app)) or []
+        results[app] = {
+            "import_ms": round(sum(ms for _, ms in times), 1),
+            "slowest_imports_ms": {module: round(ms, 1) for module, ms in times[:5]},
+            **cold_run(app),
+        }
+    return {"dependencies": dependencies, "apps": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report import time and cold-start latency of the apps.")
+    parser.add_argument("--app", action="append", help="App to measure (repeatable); default: all apps")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    result = report(args.app or APPS)
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(result, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures: a small synthetic resale dataset and the structures built from it.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hdb_data import load_dataset  # noqa: E402
+from make_dataset import write_dataset  # noqa: E402
+
+ROWS = 6_000
+
+
+@pytest.fixture(scope="session")
+def dataset_path(tmp_path_factory):
+    """Deterministic synthetic Dataset.csv covering 2021-01 to 2023-12."""
+    directory = tmp_path_factory.mktemp("data")
+    return write_dataset(str(directory / "Dataset.csv"), ROWS, seed=7, start="2021-01", end="2023-12")
+
+
+@pytest.fixture(scope="session")
+def cache_dir(dataset_path):
+    return os.path.join(os.path.dirname(dataset_path), ".cache")
+
+
+@pytest.fixture(scope="session")
+def transactions(dataset_path, cache_dir):
+    """The dataset as typed by hdb_data."""
+    return load_dataset(dataset_path, cache_dir)
+
+
+@pytest.fixture(scope="session")
+def plane(dataset_path, cache_dir):
+    from hdb_dataplane import DataPlane
+
+    return DataPlane.load(dataset_path, cache_dir)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from hdb_aggregates import AggregateCube
+
+
+@pytest.fixture(scope="module")
+def cube(transactions):
+    return AggregateCube.from_frame(transactions)
+
+
+def chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize("by, filters", [
+    (["town"], {}),
+    (["year"], {"flat_type": "4 ROOM"}),
+    (["town", "flat_type"], {"storey_range": ["01 TO 03", "04 TO 06"]}),
+    (["month"], {"town": "BEDOK", "flat_type": None}),
+])
+def test_rollup_matches_groupby(cube, transactions, by, filters):
+    df = transactions
+    for col, value in filters.items():
+        if value is not None:
+            df = df[df[col].isin(value if isinstance(value, list) else [value])]
+    expected = df.groupby(by, observed=True)["resale_price"].agg(["count", "sum", "min", "max", "mean", "std"])
+    rolled = cube.rollup(by, **filters)
+    pd.testing.assert_frame_equal(rolled[["count", "sum", "min", "max", "mean"]],
+                                  expected[["count", "sum", "min", "max", "mean"]],
+                                  check_dtype=False, check_names=False, check_index_type=False)
+    # The cube keeps the population standard deviation
+    population_std = expected["std"] * np.sqrt((expected["count"] - 1) / expected["count"])
+    np.testing.assert_allclose(rolled["std"], population_std.fillna(0), rtol=1e-6, atol=1e-3)
+
+
+def test_overall_rollup(cube, transactions):
+    overall = cube.rollup()
+    assert overall["count"].iloc[0] == len(transactions)
+    assert overall["mean"].iloc[0] == pytest.approx(transactions["resale_price"].mean())
+
+
+@pytest.mark.parametrize("size", [1_000, 2_345])
+def test_merged_chunks_match_single_pass(cube, transactions, size):
+    merged = AggregateCube.from_chunks(chunks(transactions, size))
+    pd.testing.assert_frame_equal(merged.rollup(["town", "month"]), cube.rollup(["town", "month"]))
+    pd.testing.assert_frame_equal(merged.quantiles([0.1, 0.5, 0.9], by=["flat_type"]),
+                                  cube.quantiles([0.1, 0.5, 0.9], by=["flat_type"]))
+
+
+def test_merge_is_order_independent(transactions):
+    first, second, third = (AggregateCube.from_frame(part) for part in chunks(transactions, 2_000))
+    left = first.merge(second, third).rollup(["flat_type", "year"])
+    right = third.merge(first, second).rollup(["flat_type", "year"])
+    pd.testing.assert_frame_equal(left, right)
+
+
+def test_quantiles_within_sketch_error(cube, transactions):
+    estimated = cube.quantiles([0.25, 0.5, 0.75], by=["town"])
+    exact = transactions.groupby("town", observed=True)["resale_price"].quantile([0.25, 0.5, 0.75]).unstack()
+    busy = transactions["town"].value_counts()
+    busy = busy[busy >= 100].index
+    # Buckets are ~6% wide; sampling noise inside a bucket adds a little more
+    np.testing.assert_allclose(estimated.loc[busy].to_numpy(), exact.loc[busy].to_numpy(), rtol=0.08)
+
+
+def test_empty_chunks_are_rejected():
+    with pytest.raises(ValueError):
+        AggregateCube.from_chunks([])
+
+
+def test_rows_missing_a_dimension_are_skipped(transactions):
+    broken = transactions.copy()
+    broken.loc[broken.index[:3], "town"] = None
+    broken.loc[broken.index[3], "storey_range"] = None
+    cube = AggregateCube.from_frame(broken)
+    assert cube.rollup()["count"].iloc[0] == len(transactions) - 4
+    complete = broken.dropna(subset=["town", "storey_range"])
+    pd.testing.assert_frame_equal(cube.rollup(["town"]), AggregateCube.from_frame(complete).rollup(["town"]))
+
+    # A chunk made only of incomplete rows contributes nothing to the merge
+    merged = AggregateCube.from_chunks([broken.iloc[:3]] + chunks(broken.iloc[3:], 2_000))
+    pd.testing.assert_frame_equal(merged.rollup(["town", "month"]), cube.rollup(["town", "month"]))
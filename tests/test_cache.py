@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+
+import hdb_cache
+from hdb_cache import EstimateCache, estimate_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(hdb_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_hits_after_first_compute(clock):
+    cache = EstimateCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("a", lambda: calls.append(1) or 42, version="v1") == 42
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_recomputed(clock):
+    cache = EstimateCache(ttl_seconds=60)
+    cache.get_or_compute("a", lambda: 1)
+    clock.now += 59
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    clock.now += 61
+    assert cache.get_or_compute("a", lambda: 3) == 3
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = EstimateCache(max_entries=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 0)  # Touch a, so b is the oldest
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_compute("a", lambda: 0) == 1
+    assert cache.get_or_compute("b", lambda: 4) == 4
+
+
+def test_model_version_change_clears_entries(clock):
+    cache = EstimateCache()
+    cache.get_or_compute("a", lambda: 1, version="v1")
+    assert cache.get_or_compute("a", lambda: 2, version="v2") == 2
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_value_computed_for_an_old_version_is_not_stored(clock):
+    cache = EstimateCache()
+
+    def compute_during_retrain():
+        cache.get_or_compute("b", lambda: "new", version="v2")  # Another session sees the new model
+        return "old"
+
+    assert cache.get_or_compute("a", compute_during_retrain, version="v1") == "old"
+    assert cache.get_or_compute("a", lambda: "new", version="v2") == "new"
+
+
+def test_estimate_key_normalizes_inputs():
+    assert estimate_key(" bedok", "4 room", "Model A", "04 to 06", 92.04, 70) == \
+        estimate_key("BEDOK", "4 ROOM", "MODEL A", "04 TO 06", 92.0, 70.0)
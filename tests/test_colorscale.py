@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from hdb_colorscale import FOLIUM_COLORS, PriceScale
+
+
+def test_bins_are_right_closed_like_qcut():
+    values = np.arange(1, 101, dtype="float64") * 1_000
+    scale = PriceScale.from_values(values)
+    expected = pd.qcut(values, 5, labels=False)
+    assert np.array_equal(scale.bin(values), expected)
+    # An edge value belongs to the bin it closes
+    assert list(scale.bin(scale.edges)) == [0, 0, 1, 2, 3, 4]
+
+
+def test_values_outside_the_edges_go_to_the_end_bins():
+    scale = PriceScale(np.array([100, 200, 300]))
+    assert list(scale.bin([0, 100, 150, 200, 201, 300, 10_000])) == [0, 0, 0, 0, 1, 1, 1]
+
+
+def test_duplicate_quantiles_are_dropped():
+    scale = PriceScale.from_values([500_000] * 60 + [600_000] * 20 + [700_000] * 20)
+    assert len(scale.edges) - 1 == scale.bins < 5
+    assert scale.colors[0] == FOLIUM_COLORS[0] and scale.colors[-1] == FOLIUM_COLORS[-1]
+    assert len(scale.labels()) == scale.bins
+
+
+def test_single_value_gets_the_middle_colour():
+    scale = PriceScale.from_values([450_000, 450_000, np.nan])
+    assert scale.bins == 1
+    assert list(scale.folium_colors([1, 450_000, 10**7])) == [FOLIUM_COLORS[len(FOLIUM_COLORS) // 2]] * 3
+    assert scale.labels() == ["$450k"]
+
+
+def test_empty_values():
+    scale = PriceScale.from_values([np.nan])
+    assert scale.bins == 1
+    assert scale.bin([123]).tolist() == [0]
+
+
+def test_weights_shift_the_edges():
+    values = [100_000, 200_000, 300_000, 400_000]
+    heavy_top = PriceScale.from_values(values, bins=2, weights=[1, 1, 1, 97])
+    assert list(heavy_top.edges) == [100_000, 400_000]
+    even = PriceScale.from_values(values, bins=2, weights=[1, 1, 1, 1])
+    assert list(even.edges) == [100_000, 200_000, 400_000]
+
+
+def test_rgba_and_legend_follow_the_bins():
+    scale = PriceScale.from_values(np.linspace(300_000, 900_000, 50))
+    rgba = scale.rgba([300_000, 900_000], alpha=99)
+    assert rgba.shape == (2, 4) and rgba.dtype == np.uint8 and (rgba[:, 3] == 99).all()
+    assert scale.legend_html().count("border-radius:50%") == scale.bins
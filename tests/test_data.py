@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from hdb_data import RowStore, latest_month, load_dataset
+
+
+def test_recent_rows_keep_their_cache_positions(dataset_path, cache_dir, transactions):
+    assert latest_month(dataset_path, cache_dir) == transactions["month"].max()
+
+    since = pd.Timestamp("2023-07-01")
+    recent = load_dataset(dataset_path, cache_dir, columns=["town", "resale_price"], since=since)
+    expected = transactions.loc[transactions["month"] >= since, ["town", "resale_price"]]
+    assert list(recent.columns) == ["town", "resale_price"]
+    pd.testing.assert_frame_equal(recent, expected, check_categorical=False, check_index_type=False)
+
+    rows = RowStore(dataset_path, cache_dir).take(recent.index[:5].to_numpy())
+    assert (rows["month"] >= since).all()
+    assert rows["resale_price"].tolist() == recent["resale_price"].iloc[:5].tolist()
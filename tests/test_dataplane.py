@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from hdb_dataplane import DataPlane
+
+
+def test_plane_loads_with_missing_categories(dataset_path, tmp_path):
+    raw = pd.read_csv(dataset_path)
+    raw.loc[[0, 10], "town"] = None
+    raw.loc[20, "flat_model"] = None
+    raw.loc[30, "storey_range"] = None
+    raw.to_csv(tmp_path / "Dataset.csv", index=False)
+
+    plane = DataPlane.load(str(tmp_path / "Dataset.csv"), str(tmp_path / ".cache"))
+    assert plane.cube.rollup()["count"].iloc[0] == len(raw) - 4
+    assert plane.index.count() == len(raw)
+    assert plane.index.count(town="BEDOK") == int((raw["town"] == "BEDOK").sum())
+    assert plane.options.options()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pytest
+
+from hdb_intents import MISSING_ENTITY_MESSAGES, IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router(plane):
+    return IntentRouter(plane.cube, plane.index)
+
+
+@pytest.mark.parametrize("question, intent, entities", [
+    ("price trend for 4-room flats in kallang", "price_trend", {"town": "KALLANG/WHAMPOA", "flat_type": "4 ROOM"}),
+    ("executive flats in punggol average price", "average_price", {"town": "PUNGGOL", "flat_type": "EXECUTIVE"}),
+    ("average resale price of 3 room in bishan", "average_price", {"town": "BISHAN", "flat_type": "3 ROOM"}),
+    ("highest priced 5 room flats in tampines", "highest_price", {"town": "TAMPINES", "flat_type": "5 ROOM"}),
+    ("show me 4 room in bedok", "sample_flats", {"town": "BEDOK", "flat_type": "4 ROOM"}),
+    ("resale flats in yishun", "sample_flats", {"town": "YISHUN"}),
+    ("average price in year 2022", "average_price", {"year": 2022}),
+    ("which town has the most flats", "town_with_most", {}),
+    ("how many towns are there?", "list_towns", {}),
+    ("number of towns in the dataset", "list_towns", {}),
+])
+def test_route_picks_specific_intent(router, question, intent, entities):
+    routed, found, missing = router.route(question)
+    assert routed.name == intent
+    assert missing is None
+    for kind, value in entities.items():
+        assert found[kind] == value
+
+
+@pytest.mark.parametrize("question", [
+    "average price in atlantis",
+    "price trend in gotham",
+    "resale flats in",
+])
+def test_unknown_or_missing_town_is_reported(router, question):
+    answer = router.answer(question)
+    assert answer.warning
+    assert answer.text == MISSING_ENTITY_MESSAGES["town"]
+
+
+@pytest.mark.parametrize("question", [
+    "average price in 1995",
+    "most expensive flat in 2030",
+])
+def test_year_outside_the_data_is_reported(router, question):
+    answer = router.answer(question)
+    assert answer.warning
+    assert answer.text == MISSING_ENTITY_MESSAGES["year"]
+
+
+def test_place_words_that_are_not_towns_are_ignored(router):
+    _, entities, missing = router.route("cheapest resale flats in singapore")
+    assert missing is None and "town" not in entities
+
+
+def test_average_matches_cube(router, transactions):
+    answer = router.answer("average price in bedok")
+    expected = transactions.loc[transactions["town"] == "BEDOK", "resale_price"].mean()
+    assert f"${expected:,.0f}" in answer.text
+
+
+def test_unmatched_question_falls_back(router):
+    answer = router.answer("tell me a joke")
+    assert answer.warning
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hdb_intervals import INTERVAL_COVERAGE
+from hdb_model import LATEST_POINTER, LinearStats, build_pipeline, evaluate, feature_frame, load_model, refresh_model
+
+HOLDOUT_MONTHS = 3
+
+
+def test_incremental_stats_match_full_fit(transactions):
+    features = feature_frame(transactions)
+    target = transactions["resale_price"].to_numpy(dtype="float64")
+    full = LinearStats()
+    full.update(features, target)
+
+    # Month by month, with small design chunks, so categories keep appearing mid-stream
+    incremental = LinearStats()
+    for month in np.sort(transactions["month"].unique()):
+        rows = (transactions["month"] == month).to_numpy()
+        incremental.update(features[rows], target[rows], chunk_size=37)
+    assert incremental.rows == full.rows == len(transactions)
+
+    probe = features.sample(500, random_state=1)
+    np.testing.assert_allclose(incremental.to_pipeline().predict(probe), full.to_pipeline().predict(probe), rtol=1e-6)
+
+
+def test_stats_fit_at_least_as_well_as_sklearn(transactions):
+    features = feature_frame(transactions)
+    target = transactions["resale_price"].to_numpy(dtype="float64")
+    stats = LinearStats()
+    stats.update(features, target)
+    reference = build_pipeline().fit(features, target)
+    # Both are least-squares fits; the collinear one-hot blocks leave sklearn slightly off the optimum
+    sse = np.sum((target - stats.to_pipeline().predict(features)) ** 2)
+    assert sse <= np.sum((target - reference.predict(features)) ** 2) * (1 + 1e-9)
+
+
+def test_interval_coverage_on_held_out_recent_months(dataset_path, transactions, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The training data cache goes to ./.cache
+    raw = pd.read_csv(dataset_path)
+    held_out = sorted(raw["month"].unique())[-HOLDOUT_MONTHS:]
+    raw[~raw["month"].isin(held_out)].to_csv("Dataset.csv", index=False)
+
+    model, _ = refresh_model("Dataset.csv", "models", full=True)
+    metrics = evaluate(model.pipeline, transactions, model.intervals, recent_months=HOLDOUT_MONTHS)
+    assert metrics["rows"] == int(raw["month"].isin(held_out).sum())
+    assert metrics["interval_coverage"] >= INTERVAL_COVERAGE - 0.1
+
+
+def test_incremental_refresh_matches_full_retrain(dataset_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The training data cache goes to ./.cache
+    raw = pd.read_csv(dataset_path)
+    months = sorted(raw["month"].unique())
+    # The first run sees the history up to months[-3], with half of that month still unpublished
+    last = raw.index[raw["month"] == months[-3]]
+    late = last[len(last) // 2:]
+    first = raw[(raw["month"] <= months[-3]) & ~raw.index.isin(late)]
+    first.to_csv("Dataset.csv", index=False)
+    refresh_model("Dataset.csv", "incremental", full=True)
+
+    raw.to_csv("Dataset.csv", index=False)
+    model, report = refresh_model("Dataset.csv", "incremental")
+    assert report["mode"] == "incremental"
+    assert report["new_months"] == months[-2:]
+    assert report["late_rows"] == len(late)
+    assert report["total_rows"] == len(raw)
+
+    retrained, _ = refresh_model("Dataset.csv", "full", full=True)
+    probe = feature_frame(raw.sample(500, random_state=2).assign(month=lambda df: pd.to_datetime(df["month"])))
+    np.testing.assert_allclose(model.predict_batch(probe), retrained.predict_batch(probe), rtol=1e-6)
+
+    unchanged, report = refresh_model("Dataset.csv", "incremental")
+    assert unchanged is None and report["new_rows"] == 0
+
+
+def test_missing_artifact_is_reported(dataset_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model, _ = refresh_model(dataset_path, "models", full=True)
+    os.remove(os.path.join("models", json.loads(open(os.path.join("models", LATEST_POINTER)).read())["path"]))
+    with pytest.raises(FileNotFoundError, match="train_model.py --full"):
+        load_model("models", dataset_path)
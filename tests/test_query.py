@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from hdb_query import CASCADE_COLUMNS, FilterIndex, OptionIndex
+
+
+@pytest.fixture(scope="module")
+def index(transactions):
+    return FilterIndex(transactions)
+
+
+def mask_rows(df, **criteria):
+    """Reference result: a boolean mask per criterion, as the apps did before the index."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in criteria.items():
+        if value is None:
+            continue
+        if col == "floor_area_sqm":
+            low, high = value
+            if low is not None:
+                mask &= (df[col] >= low).to_numpy()
+            if high is not None:
+                mask &= (df[col] <= high).to_numpy()
+        else:
+            mask &= df[col].isin(value if isinstance(value, list) else [value]).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize("criteria", [
+    {},
+    {"town": "BEDOK"},
+    {"flat_type": "4 ROOM", "town": None},
+    {"flat_type": ["3 ROOM", "5 ROOM"], "storey_range": "04 TO 06"},
+    {"floor_area_sqm": (60, 100)},
+    {"floor_area_sqm": (None, 70), "town": ["TAMPINES", "YISHUN"]},
+    {"floor_area_sqm": (110, None), "flat_type": "EXECUTIVE", "flat_model": "MAISONETTE"},
+    {"town": "ATLANTIS"},
+    {"floor_area_sqm": (500, 600)},
+])
+def test_query_matches_pandas_masks(index, transactions, criteria):
+    rows = index.query(**criteria)
+    assert np.array_equal(rows, mask_rows(transactions, **criteria))
+    assert index.count(**criteria) == len(rows)
+
+
+def test_unindexed_column_is_rejected(index):
+    with pytest.raises(KeyError):
+        index.query(resale_price=(0, 1))
+
+
+def test_option_index_matches_groupby(transactions):
+    options = OptionIndex(transactions)
+    df = transactions.dropna(subset=CASCADE_COLUMNS)
+    flat_type = df["flat_type"].value_counts().index[0]
+    counts = df[df["flat_type"] == flat_type].groupby("flat_model", observed=True).size()
+    assert dict(options.options(flat_type)) == {model: int(count) for model, count in counts.items()}
+
+    flat_model = counts.idxmax()
+    subset = df[(df["flat_type"] == flat_type) & (df["flat_model"] == flat_model)]
+    low, high = options.value_range("floor_area_sqm", flat_type, flat_model)
+    assert (low, high) == (subset["floor_area_sqm"].min(), subset["floor_area_sqm"].max())
+    assert options.value_range("floor_area_sqm", "NO SUCH TYPE") is None
+
+
+def test_option_index_from_chunks_matches_whole_frame(transactions):
+    whole = OptionIndex(transactions)
+    chunked = OptionIndex.from_chunks(transactions.iloc[start:start + 1_500] for start in range(0, len(transactions), 1_500))
+    for flat_type, _ in whole.options():
+        assert chunked.options(flat_type) == whole.options(flat_type)
+        assert chunked.value_range("floor_area_sqm", flat_type) == whole.value_range("floor_area_sqm", flat_type)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import sys
+import types
+
+from hdb_semantic import SemanticMatcher
+
+
+def test_encoder_load_failure_falls_back_to_no_match(monkeypatch, tmp_path, caplog):
+    loads = []
+
+    def failing_encoder(name, device=None):
+        loads.append(name)
+        raise OSError("model download failed")
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=failing_encoder))
+    matcher = SemanticMatcher(cache_dir=str(tmp_path))
+    assert matcher.match("where are flats cheapest") == (None, 0.0)
+    assert matcher.match_batch(["how much is a flat", "list the estates"]) == [(None, 0.0)] * 2
+    assert not matcher.available
+    assert len(loads) == 1
+    assert sum("Semantic matching disabled" in record.getMessage() for record in caplog.records) == 1
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Train or refresh the HDB resale price model.
+
+Run after new resale months are added to Dataset.csv:
+
+    python train_model.py            # ingest months since the last run and late rows of the last one
+    python train_model.py --full     # rebuild from the whole history
+
+Each run writes a new versioned artifact to models/, moves
+models/latest.json to it and writes a metrics report to models/reports/.
+"""
+import argparse
+import json
+
+from hdb_data import DATASET_PATH
+from hdb_model import MODEL_DIR, refresh_model
+
+
+def main() -> None:
+    """
+    Parse arguments, refresh the model and print the metrics report.
+    """
+    parser = argparse.ArgumentParser(description="Train or incrementally refresh the resale price model.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Resale transactions CSV")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory for artifacts, state and reports")
+    parser.add_argument("--full", action="store_true", help="Ignore saved state and retrain on the whole history")
+    args = parser.parse_args()
+
+    _, report = refresh_model(args.dataset, args.model_dir, full=args.full)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()